@@ -0,0 +1,128 @@
+"""
+Parity check of the ONNX Runtime table detector against the torch backend.
+
+For every image, the raw detections of both backends must match box for box
+within a pixel tolerance, and the merged table boxes returned by
+TableDetector.detect must be identical. Per-backend latency is reported too.
+
+The repository has no test suite, so this script is the parity test: it
+exits 0 when all images match, 1 on a mismatch and 2 without images. Like
+a skipped test, it reports the reason and exits 0 when the weights or a
+backend package (ultralytics, torch, onnxruntime) is missing, so CI can
+run it unconditionally.
+
+Usage (from the repository root):
+
+    python benchmarks/detector_backend_parity.py images/ --tolerance 1.0
+"""
+import argparse
+import importlib.util
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+from models.image_utils import load_image  # noqa: E402
+from models.table_detector import TableDetector  # noqa: E402
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp')
+
+# Packages both backends need, torch's to run and export the weights
+REQUIRED_PACKAGES = ('ultralytics', 'torch', 'onnxruntime')
+
+
+def collect_images(paths: List[str]) -> List[Path]:
+    """Expand directories into the images they contain."""
+    images = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            images.extend(sorted(p for p in path.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS))
+        else:
+            images.append(path)
+    return images
+
+
+def skip_reason(model_path: Path) -> Optional[str]:
+    """Why the parity check cannot run here, or None when it can."""
+    missing = [name for name in REQUIRED_PACKAGES if importlib.util.find_spec(name) is None]
+    if missing:
+        return f"{', '.join(missing)} not installed"
+    if not model_path.exists():
+        return f'no weights at {model_path}'
+    return None
+
+
+def raw_boxes(detector: TableDetector, image: np.ndarray) -> np.ndarray:
+    """Detections of one image before merging, sorted by confidence."""
+    handle = detector.handle
+    with handle.lock:
+        result = handle.model.predict(image[..., ::-1], verbose=False, iou=detector.iou, conf=detector.min_conf)[0]
+    return np.asarray(result.boxes.xyxy, dtype=np.float64).reshape(-1, 4)
+
+
+def boxes_match(a: np.ndarray, b: np.ndarray, tolerance: float) -> bool:
+    """Whether every box of a has a distinct counterpart in b within tolerance."""
+    if len(a) != len(b):
+        return False
+    unmatched = list(range(len(b)))
+    for box in a:
+        for j in unmatched:
+            if np.abs(box - b[j]).max() <= tolerance:
+                unmatched.remove(j)
+                break
+        else:
+            return False
+    return True
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('images', nargs='+', help='Images or directories of images')
+    parser.add_argument('--tolerance', type=float, default=1.0, help='Largest allowed box coordinate difference in pixels')
+    parser.add_argument('--model-path', help='YOLO weights, the bundled model by default')
+    args = parser.parse_args()
+
+    images = collect_images(args.images)
+    if not images:
+        print('No images found', file=sys.stderr)
+        return 2
+    reason = skip_reason(TableDetector(model_path=args.model_path).model_path)
+    if reason:
+        print(f'Skipped: {reason}')
+        return 0
+    backends = {name: TableDetector(model_path=args.model_path, backend=name) for name in TableDetector.BACKENDS}
+    for detector in backends.values():
+        detector.warmup()
+
+    timings = {name: [] for name in backends}
+    failures = 0
+    for path in images:
+        image = load_image(path)
+        raw, merged = {}, {}
+        for name, detector in backends.items():
+            start = time.perf_counter()
+            raw[name] = raw_boxes(detector, image)
+            timings[name].append(time.perf_counter() - start)
+            merged[name] = np.asarray(detector.detect(image, multi_table=True)).reshape(-1, 4)
+
+        raw_ok = boxes_match(raw['torch'], raw['onnx'], args.tolerance)
+        merged_ok = np.array_equal(merged['torch'], merged['onnx'])
+        failures += not (raw_ok and merged_ok)
+        print(
+            f"{'ok  ' if raw_ok and merged_ok else 'FAIL'} {path.name}: "
+            f"{len(raw['torch'])}/{len(raw['onnx'])} raw boxes, "
+            f"merged torch={merged['torch'].tolist()} onnx={merged['onnx'].tolist()}"
+        )
+
+    for name, times in timings.items():
+        print(f'{name:<6} median {np.median(times) * 1000:7.1f} ms  mean {np.mean(times) * 1000:7.1f} ms')
+    print(f'{len(images) - failures}/{len(images)} images match')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""
+Benchmark suite on synthetic table images.
+
+Every combination of the given rows, columns, font sizes, border styles and
+resolutions is rendered with benchmarks/synthetic_tables.py, then timed
+stage by stage and end to end:
+
+* detect: TableDetector.detect on the page
+* recognize: TextRecognizer.recognize on the detected table
+* get_words_in_column: TableExtraction.get_words_in_column on the OCR words
+* build_structure: TableStructure.build_structure on the column words
+* postprocess: TableExtraction.postprocess on the structured table
+* end_to_end: TableExtraction.detect, with its StageProfiler breakdown
+
+Stage times are the median of --repeats runs after one warm-up run. Within
+each group of cases differing only in their row count, the suite prints
+the scaling curve of every stage against the word count and its log-log
+slope, 1.0 being linear.
+
+Results can be saved as a JSON baseline and compared with a later run;
+cases are matched by their spec, and the comparison fails when a stage
+slowed down by more than --max-slowdown.
+
+Usage (from the repository root):
+
+    python benchmarks/extraction_suite.py --rows 10 40 160 --cols 6 --save-baseline bench.json
+    python benchmarks/extraction_suite.py --rows 10 40 160 --cols 6 --compare bench.json
+"""
+import argparse
+import itertools
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from dataclasses import asdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from models.ocr_words import OCRWords  # noqa: E402
+from models.profiling import StageProfiler  # noqa: E402
+from models.table_detector import TableDetector  # noqa: E402
+from models.text_recognizer import TextRecognizer  # noqa: E402
+from synthetic_tables import SyntheticTable, TableSpec, render_table  # noqa: E402
+from table_creator.data_structures import TableStructure  # noqa: E402
+from table_creator.table_extractor import STRUCTURE_ENGINES, TableExtraction  # noqa: E402
+
+STAGES = ('detect', 'recognize', 'get_words_in_column', 'build_structure', 'postprocess', 'end_to_end')
+
+# Stages faster than this in the baseline are too noisy to gate on
+NOISE_FLOOR_SECONDS = 0.002
+
+
+def timed(fn: Callable[[], object], repeats: int) -> Tuple[float, object]:
+    """Median wall seconds of fn over repeats runs after a warm-up run, and its last result."""
+    result = fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def column_words(columns: Dict[str, pd.DataFrame]) -> Tuple[Dict[str, OCRWords], List[str]]:
+    """Column words in left-to-right order, as TableExtraction passes them to build_structure."""
+    words = {col: OCRWords.from_dataframe(df) for col, df in columns.items() if len(df)}
+    order = sorted(words, key=lambda col: words[col].boxes[0, 0])
+    return {col: words[col] for col in order}, order
+
+
+def run_case(
+    table: SyntheticTable,
+    extractor: TableExtraction,
+    detector: TableDetector,
+    recognizer: TextRecognizer,
+    repeats: int
+) -> dict:
+    """Time every stage on one synthetic table."""
+    seconds = {}
+    image = table.image
+    seconds['detect'], cords = timed(lambda: detector.detect(image), repeats)
+    seconds['recognize'], frames = timed(lambda: recognizer.recognize(image, cords), repeats)
+    words = frames[0]
+    seconds['get_words_in_column'], (columns, _, _) = timed(lambda: extractor.get_words_in_column({}, words), repeats)
+    dictword, order = column_words(columns)
+    seconds['build_structure'], df = timed(lambda: TableStructure().build_structure(dictword), repeats)
+    df = df.loc[:, order]
+    seconds['postprocess'], _ = timed(lambda: extractor.postprocess(df), repeats)
+
+    profiler = extractor.profiler
+    profiler.reset()
+    seconds['end_to_end'], ((raw_df, _), _) = timed(lambda: extractor.detect(image), repeats)
+    runs = repeats + 1
+    stages = {
+        name: {
+            'seconds': totals.wall_seconds / runs,
+            'cpu_seconds': totals.cpu_seconds / runs,
+            'peak_rss_delta': totals.peak_rss_delta,
+            'counts': {key: value // runs for key, value in totals.counts.items()}
+        }
+        for name, totals in profiler.summary().items()
+    }
+    return {
+        'key': table.spec.key,
+        'spec': asdict(table.spec),
+        'size': [int(image.shape[1]), int(image.shape[0])],
+        'words': table.words,
+        'ocr_words': len(words),
+        'rows': table.spec.rows,
+        'expected_shape': [len(table.cells), table.spec.cols],
+        'table_shape': list(raw_df.shape),
+        'seconds': seconds,
+        'stages': stages
+    }
+
+
+def group_key(spec: dict) -> str:
+    """Cases with the same key differ only in their row count."""
+    return (
+        f"c{spec['cols']}-f{spec['font_size']:g}-{'ruled' if spec['borders'] else 'open'}"
+        f"-d{spec['dpi']}-w{spec['words_per_cell'][0]}_{spec['words_per_cell'][1]}"
+    )
+
+
+def scaling_curves(cases: List[dict]) -> Dict[str, dict]:
+    """
+    Time of every stage against the word count, per group of cases differing only in rows.
+
+    Returns:
+        Per group: the (words, rows, seconds) points of every stage and the
+        log-log slope of seconds against words, None with fewer than two points
+    """
+    groups = defaultdict(list)
+    for case in cases:
+        groups[group_key(case['spec'])].append(case)
+    curves = {}
+    for key, group in groups.items():
+        group.sort(key=lambda case: case['words'])
+        curves[key] = {}
+        for stage in STAGES:
+            points = [(case['words'], case['rows'], case['seconds'][stage]) for case in group]
+            slope = None
+            usable = [(w, s) for w, _, s in points if w > 0 and s > 0]
+            if len({w for w, _ in usable}) >= 2:
+                slope = float(np.polyfit(np.log([w for w, _ in usable]), np.log([s for _, s in usable]), 1)[0])
+            curves[key][stage] = {'points': points, 'slope': slope}
+    return curves
+
+
+def git_commit() -> Optional[str]:
+    """Commit of the working tree, None outside a git checkout."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline: dict, max_slowdown: float) -> int:
+    """Print the per-stage ratios against a baseline and return the number of regressions."""
+    previous = {case['key']: case for case in baseline['cases']}
+    regressions = 0
+    print(f"\nAgainst baseline {baseline['meta'].get('commit') or '?'} ({baseline['meta'].get('created')})")
+    print(f"{'case':<40} {'stage':<20} {'before ms':>10} {'after ms':>10} {'ratio':>7}")
+    for case in current['cases']:
+        before = previous.get(case['key'])
+        if before is None:
+            print(f"{case['key']:<40} not in the baseline")
+            continue
+        for stage in STAGES:
+            old, new = before['seconds'].get(stage), case['seconds'][stage]
+            if old is None:
+                continue
+            ratio = new / old if old > 0 else float('inf')
+            regressed = ratio > max_slowdown and old >= NOISE_FLOOR_SECONDS
+            regressions += regressed
+            print(
+                f"{case['key']:<40} {stage:<20} {old * 1000:10.2f} {new * 1000:10.2f} {ratio:7.2f}"
+                f"{'  REGRESSION' if regressed else ''}"
+            )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10, 40, 160], help='Body rows of the tables')
+    parser.add_argument('--cols', type=int, nargs='+', default=[6], help='Columns of the tables')
+    parser.add_argument('--font-size', type=float, nargs='+', default=[10.0], help='Font sizes in points')
+    parser.add_argument('--borders', choices=['ruled', 'open', 'both'], default='both', help='Ruling lines around cells')
+    parser.add_argument('--dpi', type=int, nargs='+', default=[150], help='Page resolutions')
+    parser.add_argument('--words-per-cell', type=int, nargs=2, default=[1, 2], metavar=('MIN', 'MAX'), help='Words per body cell')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the cell texts')
+    parser.add_argument('--font', help='TrueType font file, Pillow\'s bundled font by default')
+    parser.add_argument('--structure-engine', choices=STRUCTURE_ENGINES, default='auto', help='Structure engine of the end-to-end run')
+    parser.add_argument('--repeats', type=int, default=3, help='Timed runs per stage, after one warm-up run')
+    parser.add_argument('--save-baseline', type=Path, help='Write the results to this JSON file')
+    parser.add_argument('--compare', type=Path, help='Compare with a JSON baseline written by --save-baseline')
+    parser.add_argument('--max-slowdown', type=float, default=1.25, help='Largest allowed time ratio against the baseline')
+    args = parser.parse_args()
+
+    borders = {'ruled': [True], 'open': [False], 'both': [True, False]}[args.borders]
+    specs = [
+        TableSpec(rows=rows, cols=cols, font_size=font_size, borders=ruled, dpi=dpi,
+                  words_per_cell=tuple(args.words_per_cell), seed=args.seed)
+        for cols, font_size, ruled, dpi, rows in itertools.product(args.cols, args.font_size, borders, args.dpi, args.rows)
+    ]
+
+    extractor = TableExtraction(structure_engine=args.structure_engine, profiler=StageProfiler())
+    detector, recognizer = TableDetector(), TextRecognizer()
+    extractor.warmup()
+
+    cases = []
+    print(f"{'case':<40} {'words':>6} " + ' '.join(f'{stage[:12]:>12}' for stage in STAGES) + '  (ms)')
+    for spec in specs:
+        case = run_case(render_table(spec, args.font), extractor, detector, recognizer, args.repeats)
+        cases.append(case)
+        print(f"{case['key']:<40} {case['words']:>6} " + ' '.join(f"{case['seconds'][s] * 1000:12.1f}" for s in STAGES))
+        if case['table_shape'] != case['expected_shape']:
+            print(f"    table shape {case['table_shape']}, expected {case['expected_shape']}")
+
+    curves = scaling_curves(cases)
+    print('\nScaling (log-log slope of time against words; 1.0 is linear)')
+    for key, stages in curves.items():
+        slopes = ' '.join(
+            f"{stage}={info['slope']:.2f}" if info['slope'] is not None else f'{stage}=n/a'
+            for stage, info in stages.items()
+        )
+        print(f'{key:<32} {slopes}')
+
+    results = {
+        'version': 1,
+        'meta': {
+            'commit': git_commit(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+            'repeats': args.repeats,
+            'structure_engine': args.structure_engine
+        },
+        'cases': cases,
+        'curves': curves
+    }
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(results, indent=2))
+        print(f'\nSaved {args.save_baseline}')
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.max_slowdown)
+        if regressions:
+            print(f'\n{regressions} stage timings slowed down by more than {args.max_slowdown:.2f}x')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Check that importing the package stays cheap.
+
+The model backends (ultralytics and torch, PaddleOCR and paddle, ONNX
+Runtime, sahi, PyMuPDF) are imported when a model is constructed or a PDF
+opened, never when a module of the package is imported. Every entry module
+is imported in a fresh interpreter; the check fails when one of them pulls
+in a backend or takes longer than --budget-ms (best of --repeats runs).
+With --top the slowest imports by self time, from python -X importtime,
+are listed for each module.
+
+The repository has no test suite, so this script is the import test: it
+needs no model weights or backend packages, exits 0 within budget and 1
+on a violation, and CI runs it as is. An import error of a module is
+reported as a violation rather than a traceback.
+
+Usage (from the repository root):
+
+    python benchmarks/import_budget.py
+    python benchmarks/import_budget.py --budget-ms 500 --top 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+SRC = Path(__file__).resolve().parents[1] / 'src'
+
+MODULES = (
+    'table_creator.table_extractor',
+    'table_creator.data_structures',
+    'table_creator.pipeline',
+    'table_creator.service',
+    'table_creator.cli',
+)
+
+# Top-level packages only model construction may import
+BACKENDS = ('ultralytics', 'torch', 'paddleocr', 'paddle', 'onnxruntime', 'sahi', 'fitz')
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'backends': [m for m in {backends!r} if m in sys.modules]}}))
+"""
+
+
+def import_once(module: str) -> Tuple[float, List[str], List[Tuple[int, str]]]:
+    """
+    Import a module in a fresh interpreter.
+
+    Returns:
+        Import seconds, the backends it imported, and the (self microseconds,
+        module) pairs reported by -X importtime
+    """
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [str(SRC), os.environ.get('PYTHONPATH')]))}
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE.format(module=module, backends=BACKENDS)],
+        cwd=SRC, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f'Importing {module} failed:\n{proc.stderr[-2000:]}')
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    timings = []
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, _, name = line[len('import time:'):].split('|')
+        timings.append((int(own), name.strip()))
+    return result['seconds'], result['backends'], timings
+
+
+def check(modules: List[str], repeats: int) -> Dict[str, dict]:
+    """Best import time, backends and slowest imports of every module."""
+    results = {}
+    for module in modules:
+        runs = [import_once(module) for _ in range(repeats)]
+        seconds, backends, timings = min(runs, key=lambda run: run[0])
+        results[module] = {
+            'seconds': seconds,
+            'backends': sorted({b for run in runs for b in run[1]}),
+            'slowest': sorted(timings, reverse=True)
+        }
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modules', nargs='+', default=list(MODULES), help='Modules to import')
+    parser.add_argument('--budget-ms', type=float, default=1500, help='Largest allowed import time of a module')
+    parser.add_argument('--repeats', type=int, default=3, help='Fresh interpreters per module')
+    parser.add_argument('--top', type=int, default=0, help='List this many slowest imports of each module')
+    args = parser.parse_args()
+
+    try:
+        results = check(args.modules, args.repeats)
+    except RuntimeError as e:
+        print(f'FAIL {e}')
+        return 1
+    failures = []
+    print(f"{'module':<34} {'import ms':>10}  backends")
+    for module, result in results.items():
+        ms = result['seconds'] * 1000
+        print(f"{module:<34} {ms:10.1f}  {', '.join(result['backends']) or '-'}")
+        for own, name in result['slowest'][:args.top]:
+            print(f"    {own / 1000:8.1f} ms  {name}")
+        if result['backends']:
+            failures.append(f"{module} imports {', '.join(result['backends'])}")
+        if ms > args.budget_ms:
+            failures.append(f'{module} took {ms:.0f} ms, over the {args.budget_ms:.0f} ms budget')
+
+    for failure in failures:
+        print(f'FAIL {failure}')
+    if failures:
+        return 1
+    print(f'All imports within {args.budget_ms:.0f} ms and free of model backends')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""
+Benchmark the vectorized TableExtraction.postprocess against the previous implementation.
+
+The previous, cell-by-cell postprocess is kept below as
+reference_postprocess. Both run on tables structured from the synthetic
+OCR words of benchmarks/synthetic_words.py, in two modes:
+
+* merge: postprocess(df), merging the columns with an empty header cell
+* groups: postprocess(df, headers), which also joins the columns whose
+  name contains each header; the headers are the column names without
+  their trailing digits, so every header gathers several column fragments
+
+For every size and mode the script checks that both outputs are identical,
+column names, dtypes and every cell down to None against NaN, and reports
+the best of --repeats wall times and the speedup. It exits non-zero when
+an output differs.
+
+Usage (from the repository root):
+
+    python benchmarks/postprocess_vectorized.py
+    python benchmarks/postprocess_vectorized.py --words 1000 10000 100000 --merged-cells 0.2
+"""
+import argparse
+import gc
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from structure_microbench import structured_table  # noqa: E402
+from synthetic_words import WordsSpec, generate_words  # noqa: E402
+from table_creator.table_extractor import TableExtraction  # noqa: E402
+
+MODES = ('merge', 'groups')
+
+
+def reference_postprocess(parsed_df: pd.DataFrame, columns=None):
+    """TableExtraction.postprocess before vectorization, cell by cell."""
+    try:
+        parsed_df = parsed_df.dropna(how='all').reset_index(drop=True)
+        new_df = pd.DataFrame()
+
+        # Merge adjacent empty header columns
+        empty_columns = parsed_df.columns[parsed_df.iloc[:1].isna().all()].tolist()
+        for col in empty_columns[::-1]:
+            col_idx = list(parsed_df.columns).index(col)
+            if col_idx > 0:
+                parsed_df.iloc[:, col_idx - 1] += ' ' + parsed_df.iloc[:, col_idx]
+        parsed_df = parsed_df.drop(columns=empty_columns)
+
+        if not columns:
+            return parsed_df
+
+        used_indices = set()
+        for header in columns:
+            match_indices = [i for i, col in enumerate(parsed_df.columns) if header in col]
+            if match_indices:
+                used_indices.update(match_indices)
+                new_df[header] = parsed_df.iloc[:, match_indices].apply(
+                    lambda x: ' '.join(x.fillna('').str.strip()), axis=1
+                )
+
+        # Include unused columns
+        unused_columns = [col for i, col in enumerate(parsed_df.columns) if i not in used_indices]
+        new_df = pd.concat([new_df, parsed_df[unused_columns]], axis=1)
+
+        return new_df
+    except Exception:
+        return parsed_df
+
+
+def identical(left: pd.DataFrame, right: pd.DataFrame) -> bool:
+    """Whether two tables have the same columns, dtypes, index and cells, None and NaN told apart."""
+    if left.shape != right.shape or list(left.columns) != list(right.columns):
+        return False
+    if list(left.dtypes) != list(right.dtypes) or not left.index.equals(right.index):
+        return False
+    for i in range(left.shape[1]):
+        for a, b in zip(left.iloc[:, i].tolist(), right.iloc[:, i].tolist()):
+            # NaN is the only value differing from itself
+            if type(a) is not type(b) or (a == a and a != b):
+                return False
+    return True
+
+
+def best_time(fn: Callable[[], object], repeats: int) -> float:
+    """Best wall seconds of fn over repeats runs."""
+    times = []
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def group_headers(df: pd.DataFrame) -> List[str]:
+    """Column names without their trailing digits, each matching several columns."""
+    return sorted({re.sub(r'\d+$', '', name) for name in df.columns if re.sub(r'\d+$', '', name)})
+
+
+def run(sizes: List[int], repeats: int, spec_params: dict) -> List[dict]:
+    """Check and time both implementations at every size and mode."""
+    extractor = TableExtraction()
+    cases = []
+    for size in sizes:
+        words = generate_words(WordsSpec.for_words(size, **spec_params))
+        _, df = structured_table(extractor, words)
+        empty_headers = int(df.dropna(how='all').iloc[:1].isna().all().sum())
+        for mode in MODES:
+            headers: Optional[List[str]] = group_headers(df) if mode == 'groups' else None
+            same = identical(reference_postprocess(df, headers), extractor.postprocess(df, headers))
+            cases.append({
+                'words': len(words),
+                'shape': df.shape,
+                'empty_headers': empty_headers,
+                'mode': mode,
+                'headers': len(headers or []),
+                'identical': same,
+                'reference': best_time(lambda: reference_postprocess(df, headers), repeats),
+                'vectorized': best_time(lambda: extractor.postprocess(df, headers), repeats)
+            })
+    return cases
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--words', type=int, nargs='+', default=[1000, 3000, 10000, 30000], help='Approximate word counts')
+    parser.add_argument('--cols', type=int, default=8, help='Columns of the tables')
+    parser.add_argument('--merged-cells', type=float, default=0.02, help='Fraction of cells spanning two columns')
+    parser.add_argument('--ragged', type=float, default=0.25, help='Fraction of columns that are not left-aligned')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--repeats', type=int, default=3, help='Timed runs per implementation')
+    args = parser.parse_args()
+
+    spec_params = {'cols': args.cols, 'merged_cells': args.merged_cells, 'ragged': args.ragged, 'seed': args.seed}
+    cases = run(sorted(args.words), args.repeats, spec_params)
+    print(
+        f"{'words':>7} {'table':>10} {'empty hdr':>9} {'mode':<7} {'headers':>7} "
+        f"{'reference ms':>13} {'vectorized ms':>14} {'speedup':>8}  output"
+    )
+    for case in cases:
+        rows, cols = case['shape']
+        print(
+            f"{case['words']:>7} {f'{rows}x{cols}':>10} {case['empty_headers']:>9} {case['mode']:<7} {case['headers']:>7} "
+            f"{case['reference'] * 1000:13.1f} {case['vectorized'] * 1000:14.1f} "
+            f"{case['reference'] / case['vectorized']:7.1f}x  {'identical' if case['identical'] else 'DIFFERENT'}"
+        )
+    if not all(case['identical'] for case in cases):
+        print('The vectorized postprocess differs from the reference', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
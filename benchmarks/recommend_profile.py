@@ -0,0 +1,111 @@
+"""
+Measure each runtime profile preset on this machine and recommend one.
+
+Every preset runs in a fresh process, so model load time and peak memory are
+measured from a cold start. For each preset the script reports the load
+time, single-image latency (median and p95 over sequential detect calls),
+batched throughput (detect_batch) and peak resident memory.
+
+Usage (from the repository root):
+
+    python benchmarks/recommend_profile.py images/ --goal throughput
+"""
+import argparse
+import multiprocessing
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+SRC = Path(__file__).resolve().parents[1] / 'src'
+sys.path.insert(0, str(SRC))
+
+from models.runtime_profile import PRESETS  # noqa: E402
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp')
+
+# Metric each goal optimizes and whether larger is better
+GOALS = {
+    'latency': ('p95_ms', False),
+    'throughput': ('images_per_second', True),
+    'memory': ('peak_rss_mb', False),
+}
+
+
+def measure_preset(name: str, paths: List[str], repeats: int, batch_size: int) -> Dict[str, float]:
+    """Run one preset from a cold start and return its measurements."""
+    sys.path.insert(0, str(SRC))
+    from models.image_utils import load_image
+    from table_creator.table_extractor import TableExtraction
+
+    images = [load_image(path) for path in paths]
+    start = time.perf_counter()
+    extractor = TableExtraction(profile=name)
+    extractor.warmup()
+    load_seconds = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(repeats):
+        for image in images:
+            start = time.perf_counter()
+            extractor.detect(image)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        extractor.detect_batch(images, batch_size=batch_size)
+    batch_seconds = time.perf_counter() - start
+
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+    return {
+        'load_seconds': load_seconds,
+        'median_ms': float(np.median(latencies)) * 1000,
+        'p95_ms': float(np.percentile(latencies, 95)) * 1000,
+        'images_per_second': repeats * len(images) / batch_seconds,
+        'peak_rss_mb': peak_mb,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('images', type=Path, help='Directory of representative document images')
+    parser.add_argument('--goal', choices=sorted(GOALS), default='latency', help='What the recommendation optimizes')
+    parser.add_argument('--presets', nargs='+', default=sorted(PRESETS), choices=sorted(PRESETS), help='Presets to measure')
+    parser.add_argument('--limit', type=int, default=16, help='Largest number of images used')
+    parser.add_argument('--repeats', type=int, default=2, help='Passes over the images per measurement')
+    parser.add_argument('--batch-size', type=int, default=8, help='detect_batch size for the throughput measurement')
+    args = parser.parse_args()
+
+    paths = sorted(str(p) for p in args.images.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)[:args.limit]
+    if not paths:
+        print(f'No images found in {args.images}', file=sys.stderr)
+        return 2
+
+    context = multiprocessing.get_context('spawn')
+    results = {}
+    for name in args.presets:
+        with context.Pool(1) as pool:
+            results[name] = pool.apply(measure_preset, (name, paths, args.repeats, args.batch_size))
+        print(f'measured {name}', file=sys.stderr)
+
+    print(f"{'preset':<12} {'load s':>8} {'median ms':>10} {'p95 ms':>9} {'img/s':>8} {'peak MB':>9}")
+    for name, r in results.items():
+        print(
+            f"{name:<12} {r['load_seconds']:8.2f} {r['median_ms']:10.1f} {r['p95_ms']:9.1f} "
+            f"{r['images_per_second']:8.2f} {r['peak_rss_mb']:9.0f}"
+        )
+
+    metric, larger_is_better = GOALS[args.goal]
+    pick = (max if larger_is_better else min)(results, key=lambda name: results[name][metric])
+    print(f"\nRecommended for {args.goal}: {pick} ({metric} = {results[pick][metric]:.1f})")
+    print(f"Use it with TableExtraction(profile='{pick}')")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
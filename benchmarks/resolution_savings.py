@@ -0,0 +1,96 @@
+"""
+Measure the time and memory each image saves under a resolution policy.
+
+Every image is extracted twice with the same loaded models: once at full
+resolution and once with detection on a downscaled copy and OCR at the
+scale fitted to its text height. Per image the script reports both wall
+times, the peak of Python-tracked allocations (numpy arrays included) during
+each extraction, the scales chosen by the policy and whether the extracted
+tables are identical.
+
+Usage (from the repository root):
+
+    python benchmarks/resolution_savings.py scans/ --detect-max-side 1280 --ocr-text-height 32
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Tuple
+
+SRC = Path(__file__).resolve().parents[1] / 'src'
+sys.path.insert(0, str(SRC))
+
+from models.resolution import ResolutionPolicy  # noqa: E402
+from table_creator.table_extractor import ExtractionResult, TableExtraction  # noqa: E402
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp')
+
+
+def measure(extractor: TableExtraction, path: str) -> Tuple[ExtractionResult, float, int]:
+    """Extract one image, returning the result, wall seconds and peak traced bytes."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = extractor.detect_batch([path], batch_size=1)[0]
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def same_tables(a: ExtractionResult, b: ExtractionResult) -> bool:
+    if not (a.ok and b.ok):
+        return a.ok == b.ok
+    return a.tables[0].equals(b.tables[0])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('images', type=Path, help='Directory of document images')
+    parser.add_argument('--detect-max-side', type=int, default=1280, help='Longest side of the detection copy')
+    parser.add_argument('--ocr-text-height', type=float, default=32.0, help='Target character height of OCR')
+    parser.add_argument('--limit', type=int, default=20, help='Largest number of images measured')
+    args = parser.parse_args()
+
+    paths = sorted(str(p) for p in args.images.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)[:args.limit]
+    if not paths:
+        print(f'No images found in {args.images}', file=sys.stderr)
+        return 2
+
+    policy = ResolutionPolicy(detect_max_side=args.detect_max_side, ocr_text_height=args.ocr_text_height)
+    full = TableExtraction()
+    scaled = TableExtraction(resolution=policy)
+    full.warmup()
+
+    print(
+        f"{'image':<28} {'size':>11} {'ocr x':>6} {'full s':>7} {'scaled s':>9} {'saved s':>8} "
+        f"{'full MB':>8} {'scaled MB':>10} {'saved MB':>9} {'same':>5}"
+    )
+    totals = [0.0, 0.0, 0, 0]
+    for path in paths:
+        full_result, full_seconds, full_peak = measure(full, path)
+        scaled_result, scaled_seconds, scaled_peak = measure(scaled, path)
+        report = scaled_result.resolution
+        size = f'{report.original_size[0]}x{report.original_size[1]}' if report else '?'
+        ocr_factor = report.ocr_size[0] / report.original_size[0] if report else 1.0
+        print(
+            f"{Path(path).name[:28]:<28} {size:>11} {ocr_factor:6.2f} {full_seconds:7.2f} {scaled_seconds:9.2f} "
+            f"{full_seconds - scaled_seconds:8.2f} {full_peak / 2 ** 20:8.1f} {scaled_peak / 2 ** 20:10.1f} "
+            f"{(full_peak - scaled_peak) / 2 ** 20:9.1f} {'yes' if same_tables(full_result, scaled_result) else 'no':>5}"
+        )
+        totals[0] += full_seconds
+        totals[1] += scaled_seconds
+        totals[2] += full_peak
+        totals[3] += scaled_peak
+
+    n = len(paths)
+    print(
+        f"\nMean over {n} images: {totals[0] / n:.2f}s -> {totals[1] / n:.2f}s per image, "
+        f"peak {totals[2] / n / 2 ** 20:.1f} MB -> {totals[3] / n / 2 ** 20:.1f} MB"
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
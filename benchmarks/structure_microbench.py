@@ -0,0 +1,294 @@
+"""
+Model-free microbenchmarks of the structuring layer.
+
+Feeds synthetic OCR words from benchmarks/synthetic_words.py, from a
+thousand to a hundred thousand words, to the CPU-only stages that turn
+recognized words into tables:
+
+* get_words_in_column: TableExtraction.get_words_in_column on the word frame
+* build_structure: TableStructure.build_structure on the column words
+* postprocess: TableExtraction.postprocess on the structured table
+
+No model is loaded and no image is decoded, so a run takes seconds. For
+every stage and size the script reports the best of --repeats wall times,
+the time per thousand words and the peak of Python-tracked allocations
+(measured in a separate run, as tracing slows the stage down), then the
+complexity as the log-log slope of time and of peak allocations against
+the word count: 1.0 is linear, 2.0 quadratic.
+
+Every timed run is paired with a fixed pure-Python calibration workload
+and the best time of the stage over the best time of the workload is kept
+as the normalized time, so a baseline recorded on one machine can gate
+runs on another and drifts in machine speed cancel out. With --baseline
+the run fails when a stage's normalized time, averaged geometrically over
+the sizes, grows by more than --max-slowdown, its peak allocations by more
+than --max-alloc-growth, or its time slope by more than
+--max-slope-increase. Sizes at which a stage takes less than
+NOISE_FLOOR_SECONDS are left out of the time average, as scheduler noise
+alone moves them by a third; a regression there still shows in the slope.
+
+Usage (from the repository root):
+
+    python benchmarks/structure_microbench.py --save-baseline structure.json
+    python benchmarks/structure_microbench.py --baseline structure.json
+    python benchmarks/structure_microbench.py --words 1000 10000 100000
+"""
+import argparse
+import gc
+import json
+import platform
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from models.ocr_words import OCRWords  # noqa: E402
+from synthetic_words import WordsSpec, generate_words  # noqa: E402
+from table_creator.data_structures import TableStructure  # noqa: E402
+from table_creator.table_extractor import TableExtraction  # noqa: E402
+
+STAGES = ('get_words_in_column', 'build_structure', 'postprocess')
+
+# Stages faster than this in either run are too noisy to gate on by ratio;
+# the 1k-word points run for about 10 ms and are gated through the slope only
+NOISE_FLOOR_SECONDS = 0.05
+
+
+def _calibration_workload() -> list:
+    """Fixed pure-Python work of dict updates, string formatting and sorting."""
+    table = {}
+    for i in range(200_000):
+        table[i % 997] = table.get(i % 997, 0) + len(str(i))
+    return sorted(table.items(), key=lambda item: -item[1])
+
+
+def measure_time(fn: Callable[[], object], repeats: int) -> Tuple[float, float]:
+    """
+    Time fn, each run paired with a run of the calibration workload.
+
+    Noise on a shared host only ever adds time, so the best of the runs is
+    the steadiest estimate of both; dividing the best time of fn by the
+    best time of the calibration workload cancels the machine's speed.
+
+    Returns:
+        Best wall seconds of fn, and its ratio to the best wall seconds of
+        the calibration workload
+    """
+    times, calibrations = [], []
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        _calibration_workload()
+        middle = time.perf_counter()
+        fn()
+        end = time.perf_counter()
+        times.append(end - middle)
+        calibrations.append(middle - start)
+    return min(times), min(times) / min(calibrations)
+
+
+def peak_allocated(fn: Callable[[], object]) -> int:
+    """Peak bytes of Python-tracked allocations while fn runs, numpy arrays included."""
+    gc.collect()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return peak
+
+
+def structured_table(extractor: TableExtraction, words: pd.DataFrame) -> Tuple[Dict[str, OCRWords], pd.DataFrame]:
+    """
+    Structure OCR words into a table as TableExtraction does before postprocess.
+
+    Returns:
+        The column words in left-to-right order and the table with its
+        column names cleaned
+    """
+    columns, _, _ = extractor.get_words_in_column({}, words)
+    column_words = {col: OCRWords.from_dataframe(df) for col, df in columns.items() if len(df)}
+    order = sorted(column_words, key=lambda col: column_words[col].boxes[0, 0])
+    dictword = {col: column_words[col] for col in order}
+    df = TableStructure().build_structure(dictword).loc[:, order]
+    df = df.rename(columns=lambda col: re.sub(r'__\d+__', '', str(col)).strip())
+    return dictword, df
+
+
+def stage_inputs(extractor: TableExtraction, words: pd.DataFrame) -> Dict[str, Callable[[], object]]:
+    """
+    Each stage as a call on its input, prepared from the previous stage as TableExtraction does.
+
+    Returns:
+        Stage name to a function running the stage once
+    """
+    dictword, df = structured_table(extractor, words)
+    return {
+        'get_words_in_column': lambda: extractor.get_words_in_column({}, words),
+        'build_structure': lambda: TableStructure().build_structure(dictword),
+        'postprocess': lambda: extractor.postprocess(df),
+    }
+
+
+def slope(xs: List[float], ys: List[float]) -> float:
+    """Log-log slope of ys against xs, None with fewer than two usable points."""
+    points = [(x, y) for x, y in zip(xs, ys) if x > 0 and y > 0]
+    if len({x for x, _ in points}) < 2:
+        return None
+    return float(np.polyfit(np.log([x for x, _ in points]), np.log([y for _, y in points]), 1)[0])
+
+
+def run(sizes: List[int], repeats: int, spec_params: dict) -> dict:
+    """Measure every stage at every size."""
+    extractor = TableExtraction()
+    cases = []
+    for size in sizes:
+        spec = WordsSpec.for_words(size, **spec_params)
+        words = generate_words(spec)
+        calls = stage_inputs(extractor, words)
+        measures = {}
+        for stage in STAGES:
+            seconds, normalized = measure_time(calls[stage], repeats)
+            measures[stage] = {
+                'seconds': seconds,
+                'normalized': normalized,
+                'peak_bytes': peak_allocated(calls[stage])
+            }
+        cases.append({'key': spec.key, 'words': len(words), 'rows': spec.rows, 'stages': measures})
+
+    complexity = {
+        stage: {
+            'time_slope': slope([c['words'] for c in cases], [c['stages'][stage]['seconds'] for c in cases]),
+            'alloc_slope': slope([c['words'] for c in cases], [c['stages'][stage]['peak_bytes'] for c in cases])
+        }
+        for stage in STAGES
+    }
+    return {
+        'version': 1,
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'repeats': repeats,
+            'spec': spec_params
+        },
+        'cases': cases,
+        'complexity': complexity
+    }
+
+
+def report(results: dict) -> None:
+    print(f"{'stage':<20} {'words':>7} {'best ms':>9} {'ms/1k words':>12} {'peak MB':>9}")
+    for stage in STAGES:
+        for case in results['cases']:
+            m = case['stages'][stage]
+            print(
+                f"{stage:<20} {case['words']:>7} {m['seconds'] * 1000:9.1f} "
+                f"{m['seconds'] * 1e6 / max(case['words'], 1):12.3f} {m['peak_bytes'] / 2 ** 20:9.2f}"
+            )
+    print('\nComplexity (log-log slope against words; 1.0 is linear, 2.0 quadratic)')
+    for stage, c in results['complexity'].items():
+        fmt = lambda v: f'n^{v:.2f}' if v is not None else 'n/a'  # noqa: E731
+        print(f"{stage:<20} time ~ {fmt(c['time_slope']):<9} peak memory ~ {fmt(c['alloc_slope'])}")
+
+
+def gate(
+    results: dict,
+    baseline: dict,
+    max_slowdown: float,
+    max_alloc_growth: float,
+    max_slope_increase: float
+) -> List[str]:
+    """
+    Regressions of results against a baseline, one message each.
+
+    A single size of a stage swings by a third between runs on a busy host,
+    so the time of a stage is gated on the geometric mean of its ratios over
+    every size above NOISE_FLOOR_SECONDS; a real slowdown shows at all of them.
+    """
+    previous = {case['key']: case for case in baseline['cases']}
+    failures = []
+    ratios = {stage: [] for stage in STAGES}
+    for case in results['cases']:
+        before = previous.get(case['key'])
+        if before is None:
+            continue
+        for stage in STAGES:
+            old, new = before['stages'].get(stage), case['stages'][stage]
+            if old is None:
+                continue
+            if min(old['seconds'], new['seconds']) >= NOISE_FLOOR_SECONDS:
+                ratios[stage].append(new['normalized'] / old['normalized'])
+            growth = new['peak_bytes'] / old['peak_bytes'] if old['peak_bytes'] else 1.0
+            if growth > max_alloc_growth and new['peak_bytes'] - old['peak_bytes'] > 2 ** 20:
+                failures.append(f"{stage} at {case['words']} words: peak allocations x{growth:.2f}")
+    for stage, stage_ratios in ratios.items():
+        if stage_ratios:
+            ratio = float(np.exp(np.mean(np.log(stage_ratios))))
+            if ratio > max_slowdown:
+                failures.append(f'{stage}: time x{ratio:.2f} (normalized, over {len(stage_ratios)} sizes)')
+    for stage in STAGES:
+        old = baseline['complexity'].get(stage, {}).get('time_slope')
+        new = results['complexity'][stage]['time_slope']
+        if old is not None and new is not None and new - old > max_slope_increase:
+            failures.append(f'{stage}: time slope n^{old:.2f} -> n^{new:.2f}')
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--words', type=int, nargs='+', default=[1000, 3000, 10000, 30000], help='Approximate word counts, up to 100000 and beyond')
+    parser.add_argument('--cols', type=int, default=8, help='Columns of the tables')
+    parser.add_argument('--jitter', type=float, default=1.5, help='Standard deviation of word box edges in pixels')
+    parser.add_argument('--merged-cells', type=float, default=0.02, help='Fraction of cells spanning two columns')
+    parser.add_argument('--empty-cells', type=float, default=0.05, help='Fraction of empty cells')
+    parser.add_argument('--ragged', type=float, default=0.25, help='Fraction of columns that are not left-aligned')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--repeats', type=int, default=5, help='Timed runs per stage')
+    parser.add_argument('--save-baseline', type=Path, help='Write the results to this JSON file')
+    parser.add_argument('--baseline', type=Path, help='Fail on regressions against this JSON baseline')
+    parser.add_argument('--max-slowdown', type=float, default=1.3, help='Largest allowed normalized time ratio')
+    parser.add_argument('--max-alloc-growth', type=float, default=1.2, help='Largest allowed peak allocation ratio')
+    parser.add_argument('--max-slope-increase', type=float, default=0.25, help='Largest allowed rise of a time slope')
+    args = parser.parse_args()
+
+    spec_params = {
+        'cols': args.cols, 'jitter': args.jitter, 'merged_cells': args.merged_cells,
+        'empty_cells': args.empty_cells, 'ragged': args.ragged, 'seed': args.seed
+    }
+    start = time.perf_counter()
+    results = run(sorted(args.words), args.repeats, spec_params)
+    report(results)
+    print(f'\nMeasured in {time.perf_counter() - start:.1f}s')
+
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(results, indent=2))
+        print(f'Saved {args.save_baseline}')
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline['meta'].get('spec') != spec_params:
+            print('The baseline was recorded with other table parameters', file=sys.stderr)
+            return 2
+        failures = gate(results, baseline, args.max_slowdown, args.max_alloc_growth, args.max_slope_increase)
+        for failure in failures:
+            print(f'REGRESSION {failure}')
+        if failures:
+            return 1
+        print(f'No regression against {args.baseline}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
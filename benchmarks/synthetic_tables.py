@@ -0,0 +1,153 @@
+"""
+Synthetic table images for benchmarks.
+
+Renders a table of random words on a white page, with the number of rows
+and columns, font size, ruling lines and resolution under control, and
+returns the ground truth next to the image:
+
+    table = render_table(TableSpec(rows=40, cols=6, font_size=10, borders=True, dpi=150))
+    table.image       # RGB page
+    table.table_box   # [x1, y1, x2, y2] of the table in page pixels
+    table.cells       # header row first, one list of cell texts per row
+
+Sizes are given in points (1/72 inch) and scaled by the dpi, so the same
+spec at 300 dpi draws the same table on a page twice as wide.
+"""
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# Vocabulary of the cell texts: words, amounts, dates and codes
+_WORDS = (
+    'total', 'amount', 'balance', 'invoice', 'date', 'item', 'quantity', 'price', 'tax', 'net',
+    'account', 'payment', 'credit', 'debit', 'ref', 'description', 'unit', 'rate', 'due', 'paid'
+)
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    """
+    Parameters of one synthetic table.
+
+    Attributes:
+        rows: Body rows, not counting the header
+        cols: Columns
+        font_size: Font size in points
+        borders: Draw ruling lines around every cell
+        dpi: Resolution of the rendered page
+        words_per_cell: Smallest and largest number of words in a body cell
+        seed: Random seed of the cell texts
+    """
+    rows: int = 20
+    cols: int = 5
+    font_size: float = 10.0
+    borders: bool = True
+    dpi: int = 150
+    words_per_cell: Tuple[int, int] = (1, 2)
+    seed: int = 0
+
+    @property
+    def key(self) -> str:
+        """Stable identifier of the spec, used to match benchmark cases across runs."""
+        return (
+            f'r{self.rows}-c{self.cols}-f{self.font_size:g}-{"ruled" if self.borders else "open"}'
+            f'-d{self.dpi}-w{self.words_per_cell[0]}_{self.words_per_cell[1]}-s{self.seed}'
+        )
+
+
+@dataclass
+class SyntheticTable:
+    """
+    A rendered table and its ground truth.
+
+    Attributes:
+        spec: Parameters the table was rendered with
+        image: RGB page
+        table_box: [x1, y1, x2, y2] of the table's outer edges in page pixels
+        cells: Cell texts, header row first
+    """
+    spec: TableSpec
+    image: np.ndarray
+    table_box: List[int]
+    cells: List[List[str]]
+
+    @property
+    def words(self) -> int:
+        """Number of space-separated words in the table."""
+        return sum(len(text.split()) for row in self.cells for text in row)
+
+
+def _cell_text(rng: np.random.Generator, words: Tuple[int, int]) -> str:
+    """Random cell content: words, an amount, a date or a code."""
+    kind = rng.integers(0, 4)
+    if kind == 0:
+        return f'{rng.integers(0, 100000) / 100:,.2f}'
+    if kind == 1:
+        return f'{rng.integers(1, 29):02d}/{rng.integers(1, 13):02d}/20{rng.integers(10, 30)}'
+    if kind == 2:
+        return f'{"ABCDEFGHJK"[rng.integers(0, 10)]}{rng.integers(100, 99999)}'
+    count = rng.integers(words[0], words[1] + 1)
+    return ' '.join(_WORDS[i] for i in rng.integers(0, len(_WORDS), count))
+
+
+def render_table(spec: TableSpec, font_path: Optional[str] = None) -> SyntheticTable:
+    """
+    Render a synthetic table on a white page.
+
+    Column widths fit the widest text of each column; the page is at least
+    US letter sized and grows to fit the table.
+
+    Args:
+        spec: Table parameters
+        font_path: TrueType font to draw with, Pillow's bundled font by default
+
+    Returns:
+        The page and its ground truth
+    """
+    rng = np.random.default_rng(spec.seed)
+    px = spec.dpi / 72
+    font_px = max(int(round(spec.font_size * px)), 6)
+    font = ImageFont.truetype(font_path, font_px) if font_path else ImageFont.load_default(size=font_px)
+
+    header = [f'{_WORDS[(c * 7) % len(_WORDS)].title()} {c + 1}' for c in range(spec.cols)]
+    body = [[_cell_text(rng, spec.words_per_cell) for _ in range(spec.cols)] for _ in range(spec.rows)]
+    cells = [header] + body
+
+    pad_x, pad_y = int(round(6 * px)), int(round(4 * px))
+    line_height = font_px + 2 * pad_y
+    widths = [
+        max(int(font.getlength(row[c])) for row in cells) + 2 * pad_x
+        for c in range(spec.cols)
+    ]
+    margin = int(round(54 * px))
+    table_w, table_h = sum(widths), line_height * len(cells)
+    page_w = max(int(8.5 * spec.dpi), table_w + 2 * margin)
+    page_h = max(int(11 * spec.dpi), table_h + 2 * margin)
+
+    page = Image.new('RGB', (page_w, page_h), 'white')
+    draw = ImageDraw.Draw(page)
+    x0, y0 = margin, margin
+    stroke = max(int(round(px)), 1)
+    xs = np.concatenate([[x0], x0 + np.cumsum(widths)])
+    for r, row in enumerate(cells):
+        top = y0 + r * line_height
+        for c, text in enumerate(row):
+            draw.text((xs[c] + pad_x, top + pad_y), text, fill='black', font=font)
+    if spec.borders:
+        for x in xs:
+            draw.line([(x, y0), (x, y0 + table_h)], fill='black', width=stroke)
+        for r in range(len(cells) + 1):
+            y = y0 + r * line_height
+            draw.line([(x0, y), (x0 + table_w, y)], fill='black', width=stroke)
+    else:
+        # Open tables keep a rule under the header, as most statements do
+        draw.line([(x0, y0 + line_height), (x0 + table_w, y0 + line_height)], fill='black', width=stroke)
+
+    return SyntheticTable(
+        spec=spec,
+        image=np.asarray(page),
+        table_box=[int(x0), int(y0), int(x0 + table_w), int(y0 + table_h)],
+        cells=cells
+    )
@@ -0,0 +1,144 @@
+"""
+Synthetic OCR output for structuring benchmarks.
+
+Generates the word frames TextRecognizer.recognize returns for a table,
+a 'text' column and a 'boundingBox' column of [x1, y1, x2, y2] lists in
+reading order, without rendering an image or running a model:
+
+    words = generate_words(WordsSpec(rows=2000, cols=8, jitter=2.0, merged_cells=0.02))
+    words = generate_words(WordsSpec.for_words(100_000))
+
+Besides clean grids the generator produces the irregularities the
+structuring code has to handle: box jitter, several words per cell, cells
+spanning two columns, empty cells and ragged columns whose cells are not
+left-aligned.
+"""
+from dataclasses import dataclass, replace
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+_WORDS = (
+    'total', 'amount', 'balance', 'invoice', 'date', 'item', 'quantity', 'price', 'tax', 'net',
+    'account', 'payment', 'credit', 'debit', 'ref', 'description', 'unit', 'rate', 'due', 'paid'
+)
+
+# Geometry in pixels of a 10 pt font at 150 dpi
+_CHAR_WIDTH = 11
+_SPACE = 6
+_LINE_HEIGHT = 21
+_ROW_PITCH = 34
+_COLUMN_GAP = 24
+
+
+@dataclass(frozen=True)
+class WordsSpec:
+    """
+    Parameters of one synthetic table of OCR words.
+
+    Attributes:
+        rows: Body rows, not counting the header
+        cols: Columns
+        words_per_cell: Largest number of words in a body cell, at least 1
+        jitter: Standard deviation in pixels of the word box edges
+        merged_cells: Fraction of body cells spanning their right neighbour
+        empty_cells: Fraction of body cells without text
+        ragged: Fraction of columns whose cells are right-aligned or centred
+            at random instead of left-aligned
+        seed: Random seed
+    """
+    rows: int = 100
+    cols: int = 8
+    words_per_cell: int = 2
+    jitter: float = 1.5
+    merged_cells: float = 0.02
+    empty_cells: float = 0.05
+    ragged: float = 0.25
+    seed: int = 0
+
+    @classmethod
+    def for_words(cls, words: int, **params) -> 'WordsSpec':
+        """Spec whose table has about the given number of words."""
+        spec = cls(**params)
+        # A third of the cells hold dictionary words, the others one amount or code
+        per_cell = 2 / 3 + (1 + max(spec.words_per_cell, 1)) / 6
+        per_row = spec.cols * (1 - spec.empty_cells) * per_cell
+        return replace(spec, rows=max(int(round(words / per_row)), 1))
+
+    @property
+    def key(self) -> str:
+        """Stable identifier of the spec, used to match benchmark cases across runs."""
+        return (
+            f'r{self.rows}-c{self.cols}-w{self.words_per_cell}-j{self.jitter:g}'
+            f'-m{self.merged_cells:g}-e{self.empty_cells:g}-g{self.ragged:g}-s{self.seed}'
+        )
+
+
+def _cell_words(rng: np.random.Generator, count: int) -> List[str]:
+    """Words of one cell: dictionary words, or a single amount or code."""
+    kind = rng.integers(0, 3)
+    if kind == 0:
+        return [f'{rng.integers(0, 10 ** 7) / 100:,.2f}']
+    if kind == 1:
+        return [f'{"ABCDEFGHJK"[rng.integers(0, 10)]}{rng.integers(100, 99999)}']
+    return [_WORDS[i] for i in rng.integers(0, len(_WORDS), count)]
+
+
+def generate_words(spec: WordsSpec) -> pd.DataFrame:
+    """
+    Generate the OCR words of a synthetic table.
+
+    Args:
+        spec: Table parameters
+
+    Returns:
+        DataFrame with 'text' and 'boundingBox' columns, sorted by top edge
+        then left edge, as OCRWords.from_quads orders recognized words
+    """
+    rng = np.random.default_rng(spec.seed)
+    max_words = max(spec.words_per_cell, 1)
+    # Widest cell of each column fixes the column width
+    widths = rng.integers(6, 8 * max_words + 6, spec.cols) * _CHAR_WIDTH
+    starts = 40 + np.concatenate([[0], np.cumsum(widths + _COLUMN_GAP)[:-1]])
+    alignment = np.where(rng.random(spec.cols) < spec.ragged, rng.integers(1, 3, spec.cols), 0)
+
+    texts, boxes = [], []
+
+    def place(words: List[str], left: float, width: float, align: int, top: float) -> None:
+        lengths = [len(word) * _CHAR_WIDTH for word in words]
+        span = sum(lengths) + _SPACE * (len(words) - 1)
+        x = left + (0 if align == 0 else width - span if align == 1 else (width - span) / 2)
+        for word, length in zip(words, lengths):
+            texts.append(word)
+            boxes.append([x, top, x + length, top + _LINE_HEIGHT])
+            x += length + _SPACE
+
+    for c in range(spec.cols):
+        place([f'{_WORDS[(c * 7) % len(_WORDS)].title()}{c + 1}'], starts[c], widths[c], 0, 30)
+
+    for r in range(spec.rows):
+        top = 30 + (r + 1) * _ROW_PITCH
+        c = 0
+        while c < spec.cols:
+            roll = rng.random()
+            if roll < spec.empty_cells:
+                c += 1
+                continue
+            count = int(rng.integers(1, max_words + 1))
+            if roll < spec.empty_cells + spec.merged_cells and c + 1 < spec.cols:
+                # The cell spans its right neighbour and is centred across both
+                left, width = starts[c], starts[c + 1] + widths[c + 1] - starts[c]
+                place(_cell_words(rng, count + 1), left, width, 2, top)
+                c += 2
+                continue
+            place(_cell_words(rng, count), starts[c], widths[c], alignment[c], top)
+            c += 1
+
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    if spec.jitter > 0:
+        boxes += rng.normal(0, spec.jitter, boxes.shape)
+    boxes = np.maximum(boxes, 0)
+    order = np.lexsort((boxes[:, 0], boxes[:, 1]))
+    boxes = boxes[order].astype(np.int32)
+    return pd.DataFrame({'text': [texts[i] for i in order], 'boundingBox': boxes.tolist()})
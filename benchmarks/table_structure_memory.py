@@ -0,0 +1,127 @@
+"""
+Memory benchmark for the table structure representation.
+
+Builds a synthetic table and reports the bytes held per cell by:
+
+* before: rows as plain dataclasses, one dict of cells per row and one
+  TableCell with its own bbox list per cell
+* slotted rows: the same rows materialized as the slotted TableRow/TableCell
+* column-wise: TableStructure's internal storage, where a cell is a word index
+  into the column's shared text list and box array
+
+Usage (from the repository root):
+
+    python benchmarks/table_structure_memory.py --rows 20000 --cols 8
+"""
+import argparse
+import gc
+import sys
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+from models.ocr_words import OCRWords  # noqa: E402
+from table_creator.data_structures import TableStructure  # noqa: E402
+
+
+@dataclass
+class LegacyTableCell:
+    """TableCell as it was before slots were added."""
+    value: str
+    bbox: List[int]
+    column_name: str
+
+
+@dataclass
+class LegacyTableRow:
+    """TableRow as it was before slots were added."""
+    cells: Dict[str, LegacyTableCell]
+    min_x: float
+    max_x: float
+    min_y: float
+    max_y: float
+
+
+def make_columns(rows: int, cols: int, seed: int = 0) -> Dict[str, OCRWords]:
+    """
+    Generate the column-wise words of a table with aligned rows.
+
+    Args:
+        rows: Number of table rows
+        cols: Number of table columns
+        seed: Random seed for the word widths and texts
+
+    Returns:
+        Dictionary of column name to the column's words, left to right
+    """
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for c in range(cols):
+        x0 = 20 + c * 150
+        widths = rng.integers(30, 120, rows)
+        y0 = 20 + np.arange(rows) * 25
+        boxes = np.stack([np.full(rows, x0), y0, x0 + widths, y0 + 14], axis=1)
+        texts = [f'r{r}c{c}v{v}' for r, v in enumerate(rng.integers(0, 10 ** 6, rows))]
+        columns[f'column {c}'] = OCRWords(texts, boxes)
+    return columns
+
+
+def measure(build: Callable[[], object]) -> int:
+    """Return the bytes still allocated by build() while its result is alive."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000, help='Number of table rows')
+    parser.add_argument('--cols', type=int, default=8, help='Number of table columns')
+    args = parser.parse_args()
+
+    columns = make_columns(args.rows, args.cols)
+    structure = TableStructure()
+    structure.build_structure(columns)
+    n_cells = sum(len(row.cells) for row in structure.rows)
+
+    def legacy_rows():
+        return [
+            LegacyTableRow(
+                cells={
+                    col: LegacyTableCell(cell.value, list(cell.bbox), cell.column_name)
+                    for col, cell in row.cells.items()
+                },
+                min_x=row.min_x, max_x=row.max_x, min_y=row.min_y, max_y=row.max_y
+            )
+            for row in structure.rows
+        ]
+
+    def column_wise():
+        table = TableStructure()
+        table.build_structure(columns)
+        return table
+
+    results = [
+        ('before (dataclass rows)', measure(legacy_rows)),
+        ('slotted rows', measure(lambda: structure.rows)),
+        ('column-wise storage', measure(column_wise)),
+    ]
+
+    print(f'{args.rows} rows x {args.cols} columns = {n_cells} cells')
+    for name, size in results:
+        print(f'{name:<26} {size / n_cells:8.1f} bytes/cell  {size / 2 ** 20:8.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
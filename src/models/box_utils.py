@@ -0,0 +1,72 @@
+from typing import Sequence
+import numpy as np
+
+
+def calculate_overlap(box1: Sequence[float], box2: Sequence[float]) -> float:
+    """
+    Calculate the percentage overlap between two boxes.
+
+    The overlap is the intersection area relative to the smaller of the two
+    boxes, so a box fully inside another has an overlap of 100.
+
+    Args:
+        box1: First bounding box coordinates [x1, y1, x2, y2]
+        box2: Second bounding box coordinates [x1, y1, x2, y2]
+
+    Returns:
+        Percentage of overlap between the boxes
+    """
+    x_left = max(box1[0], box2[0])
+    y_top = max(box1[1], box2[1])
+    x_right = min(box1[2], box2[2])
+    y_bottom = min(box1[3], box2[3])
+
+    if x_right < x_left or y_bottom < y_top:
+        return 0.0
+
+    intersection_area = (x_right - x_left) * (y_bottom - y_top)
+    box1_area = (box1[2] - box1[0]) * (box1[3] - box1[1])
+    box2_area = (box2[2] - box2[0]) * (box2[3] - box2[1])
+
+    min_area = min(box1_area, box2_area)
+    if min_area == 0:
+        return 0.0
+
+    return (intersection_area / min_area) * 100
+
+
+def overlap_matrix(boxes1: np.ndarray, boxes2: np.ndarray) -> np.ndarray:
+    """
+    Calculate the percentage overlap between every pair of boxes.
+
+    Vectorized form of calculate_overlap, computed in the dtype of the inputs
+    so that every entry equals the scalar result for the same pair.
+
+    Args:
+        boxes1: Array of shape (N, 4) with [x1, y1, x2, y2] rows
+        boxes2: Array of shape (M, 4) with [x1, y1, x2, y2] rows
+
+    Returns:
+        Array of shape (N, M) with the overlap of boxes1[i] and boxes2[j]
+    """
+    boxes1 = np.asarray(boxes1)
+    boxes2 = np.asarray(boxes2)
+    a = boxes1[:, None, :]
+    b = boxes2[None, :, :]
+
+    x_left = np.maximum(a[..., 0], b[..., 0])
+    y_top = np.maximum(a[..., 1], b[..., 1])
+    x_right = np.minimum(a[..., 2], b[..., 2])
+    y_bottom = np.minimum(a[..., 3], b[..., 3])
+
+    intersection_area = (x_right - x_left) * (y_bottom - y_top)
+    box1_area = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    box2_area = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    min_area = np.minimum(box1_area, box2_area)
+
+    valid = (x_right >= x_left) & (y_bottom >= y_top) & (min_area != 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = intersection_area / min_area
+    # Scale in the dtype a scalar of this type promotes to, as calculate_overlap does
+    ratio = ratio.astype((ratio.dtype.type(1) * 100).dtype, copy=False)
+    return np.where(valid, ratio * 100, 0)
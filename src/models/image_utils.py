@@ -0,0 +1,112 @@
+import io
+from pathlib import Path
+from typing import Optional, Tuple, Union
+import cv2
+import numpy as np
+from PIL import Image
+
+ImageInput = Union[str, Path, bytes, bytearray, memoryview, Image.Image, np.ndarray]
+
+
+class ImageDecodeError(ValueError):
+    """An image input could not be read or decoded."""
+
+
+def load_image(image: ImageInput) -> np.ndarray:
+    """
+    Decode an image input into an RGB uint8 array.
+
+    Paths and encoded bytes are decoded once, PIL images are converted without
+    re-encoding and RGB arrays are returned unchanged, so every pipeline stage
+    can share the same buffer. The returned array must be treated as read-only.
+
+    Args:
+        image: Path, encoded bytes, PIL image or (H, W, 3) RGB array
+
+    Returns:
+        Array of shape (H, W, 3) in RGB order
+    """
+    if isinstance(image, np.ndarray):
+        if image.ndim == 2:
+            return np.repeat(image[..., None], 3, axis=2)
+        if image.shape[2] == 4:
+            return image[..., :3]
+        return image
+
+    if isinstance(image, Image.Image):
+        return _pil_to_array(image)
+
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        image = io.BytesIO(image)
+    with Image.open(image) as img:
+        return _pil_to_array(img)
+
+
+def _pil_to_array(img: Image.Image) -> np.ndarray:
+    """Convert a PIL image to an RGB array."""
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    return np.asarray(img)
+
+
+def probe_image(image: ImageInput) -> Tuple[Tuple[int, int], Optional[str]]:
+    """
+    Read the size of an image without decoding its pixels.
+
+    Args:
+        image: Path, encoded bytes, PIL image or RGB array
+
+    Returns:
+        (width, height) and the encoded format ('JPEG', 'PNG', ...), None for
+        images that are already decoded
+    """
+    if isinstance(image, np.ndarray):
+        return (image.shape[1], image.shape[0]), None
+    if isinstance(image, Image.Image):
+        return image.size, None
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        image = io.BytesIO(image)
+    with Image.open(image) as img:
+        return img.size, img.format
+
+
+def decode_scaled(image: ImageInput, scale: float, resample: bool = True) -> np.ndarray:
+    """
+    Decode an image at a fraction of its resolution.
+
+    Encoded JPEGs are decoded with PIL draft mode, which scales the DCT blocks
+    by 1/2, 1/4 or 1/8 while decoding, so the full-resolution image is never
+    materialized. Other inputs are decoded and then downscaled; pass a decoded
+    array to resize several times from one decode.
+
+    Args:
+        image: Path, encoded bytes, PIL image or RGB array
+        scale: Target size relative to the original
+        resample: Resize to exactly scale; when False a JPEG is returned at
+            the smallest draft scale not below scale, skipping the resize
+
+    Returns:
+        RGB array of shape (H, W, 3)
+    """
+    if isinstance(image, (np.ndarray, Image.Image)) or scale >= 1.0:
+        array = load_image(image)
+        if scale == 1.0:
+            return array
+        h, w = array.shape[:2]
+        size = (max(round(w * scale), 1), max(round(h * scale), 1))
+        interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+        return cv2.resize(np.ascontiguousarray(array), size, interpolation=interpolation)
+
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        image = io.BytesIO(image)
+    with Image.open(image) as img:
+        w, h = img.size
+        size = (max(round(w * scale), 1), max(round(h * scale), 1))
+        if img.format == 'JPEG':
+            # Picks the smallest DCT scale that still covers the target size
+            img.draft('RGB', size)
+        if resample and img.size != size:
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+            img = img.resize(size, Image.BILINEAR, reducing_gap=2.0)
+        return _pil_to_array(img)
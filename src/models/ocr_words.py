@@ -0,0 +1,95 @@
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+
+class OCRWords:
+    """
+    Columnar container for the words of one OCR'd region.
+
+    Words are kept as a struct of arrays instead of one Python object per
+    word, from recognition through column assignment and row structuring.
+    DataFrames are only built at the public API boundary.
+
+    Attributes:
+        texts (List[str]): Recognized text of each word
+        boxes (np.ndarray): int32 array of shape (N, 4) with [x1, y1, x2, y2] rows
+        scores (np.ndarray): float32 array of recognition confidences
+    """
+
+    __slots__ = ('texts', 'boxes', 'scores')
+
+    def __init__(
+        self,
+        texts: Sequence[str],
+        boxes: Sequence[Sequence[float]],
+        scores: Optional[Sequence[float]] = None
+    ) -> None:
+        """
+        Initialize the container.
+
+        Args:
+            texts: Text of each word
+            boxes: Bounding box of each word, truncated to integers
+            scores: Recognition confidence of each word, 1.0 when unknown
+        """
+        self.texts = list(texts)
+        self.boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4).astype(np.int32)
+        if scores is None:
+            self.scores = np.ones(len(self.texts), dtype=np.float32)
+        else:
+            self.scores = np.asarray(scores, dtype=np.float32)
+
+    @classmethod
+    def from_quads(
+        cls,
+        quads: Sequence[np.ndarray],
+        texts: Sequence[str],
+        scores: Sequence[float]
+    ) -> 'OCRWords':
+        """
+        Build words from PaddleOCR text line quadrilaterals, sorted in reading order.
+
+        Args:
+            quads: Four (x, y) corner points per word
+            texts: Recognized text per word
+            scores: Recognition confidence per word
+
+        Returns:
+            Words sorted by top edge, then left edge
+        """
+        quads = np.asarray(quads, dtype=np.float64).reshape(-1, 4, 2)
+        boxes = np.concatenate([quads.min(axis=1), quads.max(axis=1)], axis=1)
+        # Sort on the unrounded coordinates, as the rest of the pipeline did
+        order = np.lexsort((boxes[:, 0], boxes[:, 1]))
+        return cls(
+            [texts[i] for i in order],
+            boxes[order],
+            np.asarray(scores, dtype=np.float32)[order] if len(order) else []
+        )
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[Tuple[str, Sequence[float]]]) -> 'OCRWords':
+        """Build words from (text, bbox) pairs."""
+        pairs = list(pairs)
+        return cls([text for text, _ in pairs], [bbox for _, bbox in pairs])
+
+    def scaled(self, factor: float) -> 'OCRWords':
+        """Copy with every box scaled by factor, to map words between resolutions."""
+        return OCRWords(self.texts, np.round(self.boxes * factor), self.scores)
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> 'OCRWords':
+        """Build words from a DataFrame with 'text' and 'boundingBox' columns."""
+        return cls(list(df['text']), list(df['boundingBox']))
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Convert to the public DataFrame form with 'text' and 'boundingBox' columns."""
+        return pd.DataFrame({'text': self.texts, 'boundingBox': self.boxes.tolist()})
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __iter__(self) -> Iterator[Tuple[str, List[int]]]:
+        """Iterate over (text, bbox) pairs with the box as a list of Python ints."""
+        return zip(self.texts, self.boxes.tolist())
@@ -0,0 +1,260 @@
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+import cv2
+import numpy as np
+from models.warm_start import is_fresh
+
+logger = logging.getLogger(__name__)
+
+
+def export_onnx(model_path: Union[str, Path], imgsz: int = 640) -> Path:
+    """
+    Export YOLO weights to ONNX once, caching the file next to the weights.
+
+    The export is redone when the weights are newer than the cached file. It
+    runs on a private copy of the weights and the result is moved into place
+    atomically, so concurrent processes never read a partial file.
+
+    Args:
+        model_path: Path to the YOLO .pt weights
+        imgsz: Export image size
+
+    Returns:
+        Path of the .onnx file
+    """
+    model_path = Path(model_path)
+    onnx_path = model_path.with_suffix('.onnx')
+    if onnx_path.exists() and onnx_path.stat().st_mtime >= model_path.stat().st_mtime:
+        return onnx_path
+
+    from ultralytics import YOLO
+
+    with tempfile.TemporaryDirectory(prefix='.onnx-export-', dir=model_path.parent) as tmp:
+        weights = Path(tmp) / model_path.name
+        shutil.copy2(model_path, weights)
+        # Dynamic axes let the letterbox keep its minimal rectangle padding
+        exported = YOLO(str(weights)).export(format='onnx', imgsz=imgsz, dynamic=True)
+        os.replace(exported, onnx_path)
+    return onnx_path
+
+
+def letterbox(
+    image: np.ndarray,
+    imgsz: int = 640,
+    auto: bool = True,
+    stride: int = 32
+) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+    """
+    Resize and pad an image as the ultralytics LetterBox transform does.
+
+    Args:
+        image: HWC image
+        imgsz: Target size of the longer side
+        auto: Pad only up to a multiple of stride instead of a square
+        stride: Model stride
+
+    Returns:
+        The padded image, the resize ratio and the (left, top) padding
+    """
+    h, w = image.shape[:2]
+    r = min(imgsz / h, imgsz / w)
+    new_w, new_h = int(round(w * r)), int(round(h * r))
+    dw, dh = imgsz - new_w, imgsz - new_h
+    if auto:
+        dw, dh = np.mod(dw, stride), np.mod(dh, stride)
+    dw, dh = dw / 2, dh / 2
+
+    if (w, h) != (new_w, new_h):
+        image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+    image = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+    return image, r, (left, top)
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """
+    Greedy non-maximum suppression.
+
+    Args:
+        boxes: Array of shape (N, 4) with [x1, y1, x2, y2] rows
+        scores: Array of shape (N,) with box scores
+        iou_threshold: Boxes overlapping a kept box by more than this IoU are dropped
+
+    Returns:
+        Indices of the kept boxes, by decreasing score
+    """
+    order = np.argsort(-scores, kind='stable')
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep = []
+    while len(order):
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.clip(np.minimum(boxes[i, 2], boxes[rest, 2]) - np.maximum(boxes[i, 0], boxes[rest, 0]), 0, None)
+        h = np.clip(np.minimum(boxes[i, 3], boxes[rest, 3]) - np.maximum(boxes[i, 1], boxes[rest, 1]), 0, None)
+        inter = w * h
+        iou = inter / (areas[i] + areas[rest] - inter)
+        order = rest[iou <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+class OnnxBoxes:
+    """Detected boxes, exposing xyxy like ultralytics Boxes."""
+
+    def __init__(self, xyxy: np.ndarray, conf: np.ndarray, cls: np.ndarray) -> None:
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = cls
+
+    def __len__(self) -> int:
+        return len(self.xyxy)
+
+
+class OnnxResult:
+    """Detections of one image, exposing boxes like ultralytics Results."""
+
+    def __init__(self, boxes: OnnxBoxes, orig_shape: Tuple[int, int]) -> None:
+        self.boxes = boxes
+        self.orig_shape = orig_shape
+
+    def __repr__(self) -> str:
+        return f'OnnxResult(orig_shape={self.orig_shape}, xyxy={self.boxes.xyxy.tolist()})'
+
+
+class OnnxYOLO:
+    """
+    YOLO detection model run with ONNX Runtime.
+
+    Implements the subset of the ultralytics YOLO predict API used by
+    TableDetector, reproducing its letterbox preprocessing, confidence
+    filtering, per-class NMS and rescaling in numpy.
+
+    Attributes:
+        onnx_path (Path): Path of the ONNX model
+        imgsz (int): Inference image size
+    """
+
+    # Offset separating the boxes of different classes in NMS, as in ultralytics
+    _MAX_WH = 7680
+    _MAX_NMS = 30000
+
+    def __init__(
+        self,
+        onnx_path: Union[str, Path],
+        imgsz: int = 640,
+        max_det: int = 300,
+        threads: Optional[int] = None,
+        optimized_path: Optional[Union[str, Path]] = None
+    ) -> None:
+        """
+        Create the inference session.
+
+        Args:
+            onnx_path: Path of the ONNX model
+            imgsz: Default inference image size
+            max_det: Maximum number of detections per image
+            threads: Intra-op threads of the session, ONNX Runtime's default when None
+            optimized_path: Where the graph optimized by ONNX Runtime is kept;
+                when fresh it is loaded without optimizing again, otherwise it
+                is written while the session is created
+        """
+        import onnxruntime as ort
+
+        self.onnx_path = Path(onnx_path)
+        self.imgsz = imgsz
+        self.max_det = max_det
+        options = ort.SessionOptions()
+        if threads is not None:
+            options.intra_op_num_threads = threads
+        model_path, pending = self.onnx_path, None
+        if optimized_path is not None:
+            optimized_path = Path(optimized_path)
+            if is_fresh(optimized_path, self.onnx_path):
+                model_path = optimized_path
+                options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+            else:
+                pending = optimized_path.with_name(f'.{optimized_path.name}.{os.getpid()}')
+                options.optimized_model_filepath = str(pending)
+        self.session = ort.InferenceSession(str(model_path), options, providers=['CPUExecutionProvider'])
+        self._input_name = self.session.get_inputs()[0].name
+        if pending is not None:
+            try:
+                os.replace(pending, optimized_path)
+            except OSError as e:
+                logger.warning('Could not save the optimized detector to %s: %s', optimized_path, e)
+
+    def predict(
+        self,
+        source: Union[np.ndarray, Sequence[np.ndarray]],
+        conf: float = 0.25,
+        iou: float = 0.7,
+        verbose: bool = False,
+        imgsz: Optional[int] = None
+    ) -> List[OnnxResult]:
+        """
+        Detect objects in BGR images.
+
+        Args:
+            source: A BGR image or a list of them
+            conf: Confidence threshold
+            iou: IoU threshold for NMS
+            verbose: Ignored, kept for API compatibility
+            imgsz: Inference image size, the model default when None
+
+        Returns:
+            One result per image
+        """
+        images = [source] if isinstance(source, np.ndarray) else list(source)
+        if not images:
+            return []
+        # Like ultralytics, minimal padding only applies when all shapes agree
+        auto = len({image.shape for image in images}) == 1
+        imgsz = imgsz or self.imgsz
+        batch = np.stack([letterbox(image, imgsz, auto)[0] for image in images])
+        batch = np.ascontiguousarray(batch[..., ::-1].transpose(0, 3, 1, 2), dtype=np.float32) / 255
+        outputs = self.session.run(None, {self._input_name: batch})[0]
+
+        return [
+            self._postprocess(pred, batch.shape[2:], image.shape[:2], conf, iou)
+            for pred, image in zip(outputs, images)
+        ]
+
+    def _postprocess(
+        self,
+        pred: np.ndarray,
+        input_shape: Tuple[int, int],
+        orig_shape: Tuple[int, int],
+        conf: float,
+        iou: float
+    ) -> OnnxResult:
+        """Filter, suppress and rescale the raw (4 + classes, anchors) output of one image."""
+        pred = pred.T
+        scores = pred[:, 4:]
+        cls = scores.argmax(axis=1)
+        best = scores[np.arange(len(scores)), cls]
+        mask = best > conf
+        pred, cls, best = pred[mask], cls[mask], best[mask]
+        if len(pred) > self._MAX_NMS:
+            top = np.argsort(-best, kind='stable')[:self._MAX_NMS]
+            pred, cls, best = pred[top], cls[top], best[top]
+
+        xy, wh = pred[:, :2], pred[:, 2:4]
+        boxes = np.concatenate([xy - wh / 2, xy + wh / 2], axis=1)
+        keep = nms(boxes + cls[:, None] * self._MAX_WH, best, iou)[:self.max_det]
+        boxes, best, cls = boxes[keep], best[keep], cls[keep]
+
+        # Undo the letterbox as ultralytics scale_boxes does
+        gain = min(input_shape[0] / orig_shape[0], input_shape[1] / orig_shape[1])
+        pad_x = round((input_shape[1] - orig_shape[1] * gain) / 2 - 0.1)
+        pad_y = round((input_shape[0] - orig_shape[0] * gain) / 2 - 0.1)
+        boxes[:, [0, 2]] -= pad_x
+        boxes[:, [1, 3]] -= pad_y
+        boxes /= gain
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, orig_shape[1])
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, orig_shape[0])
+        return OnnxResult(OnnxBoxes(boxes.astype(np.float32), best, cls.astype(np.float32)), orig_shape)
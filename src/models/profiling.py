@@ -0,0 +1,195 @@
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+_MAXRSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+
+def peak_rss() -> Optional[int]:
+    """High-water mark of the process resident set size in bytes, None where unsupported."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_UNIT
+
+
+@dataclass
+class StageRecord:
+    """
+    Measurements of one run of an extraction stage.
+
+    CPU time and peak RSS are process-wide: with stages running concurrently,
+    in the pipeline or on several OCR workers, they include the other stages'
+    work. The peak RSS delta is how much the process high-water mark rose
+    during the stage, 0 when the stage stayed below an earlier peak.
+
+    Attributes:
+        stage: Stage name, one of StageProfiler.STAGES
+        wall_seconds: Elapsed time
+        cpu_seconds: Process CPU time, summed over threads
+        peak_rss_delta: Rise of the process peak RSS in bytes, None where unsupported
+        counts: Items the stage handled, e.g. boxes, words, lines or cells
+    """
+    stage: str
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_rss_delta: Optional[int] = None
+    counts: Dict[str, int] = field(default_factory=dict)
+
+    def count(self, **counts: int) -> None:
+        """Add to the item counts of the stage."""
+        for name, value in counts.items():
+            self.counts[name] = self.counts.get(name, 0) + int(value)
+
+
+@dataclass
+class StageTotals:
+    """
+    Sum of the records of one stage.
+
+    Attributes:
+        stage: Stage name
+        calls: Number of records
+        wall_seconds: Total elapsed time
+        cpu_seconds: Total process CPU time
+        peak_rss_delta: Largest single rise of the process peak RSS in bytes
+        counts: Total item counts
+    """
+    stage: str
+    calls: int = 0
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_rss_delta: Optional[int] = None
+    counts: Dict[str, int] = field(default_factory=dict)
+
+
+class _NullStage:
+    """Stage context of a disabled profiler, measuring nothing."""
+
+    def __enter__(self) -> '_NullStage':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def count(self, **counts: int) -> None:
+        return None
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullProfiler:
+    """Profiler that records nothing, the default of every model and extractor."""
+
+    enabled = False
+
+    def stage(self, name: str) -> _NullStage:
+        """No-op stage context."""
+        return _NULL_STAGE
+
+
+class StageProfiler(NullProfiler):
+    """
+    Records wall time, CPU time, peak RSS delta and item counts per stage.
+
+        profiler = StageProfiler()
+        extractor = TableExtraction(profiler=profiler)
+        extractor.detect('invoice.png')
+        for totals in profiler.summary().values():
+            print(totals.stage, totals.wall_seconds, totals.counts)
+
+    Records are kept for summary() and, when a callback is given, passed to
+    it as each stage ends, on the thread that ran the stage. Safe to share
+    across threads.
+
+    Attributes:
+        callback (Optional[Callable[[StageRecord], None]]): Called with every record
+        keep_records (bool): Whether records are kept for summary()
+    """
+
+    STAGES = (
+        'decode', 'detection', 'grid_detection', 'ocr_det', 'ocr_rec',
+        'column_assignment', 'row_structuring', 'postprocess'
+    )
+    enabled = True
+
+    def __init__(
+        self,
+        callback: Optional[Callable[[StageRecord], None]] = None,
+        keep_records: bool = True
+    ) -> None:
+        """
+        Initialize the profiler.
+
+        Args:
+            callback: Called with every StageRecord as its stage ends
+            keep_records: Keep the records for summary(); disable for
+                long-running services that only use the callback
+        """
+        self.callback = callback
+        self.keep_records = keep_records
+        self._records: List[StageRecord] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageRecord]:
+        """
+        Measure one run of a stage.
+
+        Args:
+            name: Stage name
+
+        Yields:
+            The stage's record, on which the stage adds its item counts
+        """
+        record = StageRecord(stage=name)
+        rss_before = peak_rss()
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.wall_seconds = time.perf_counter() - start
+            record.cpu_seconds = time.process_time() - cpu_start
+            if rss_before is not None:
+                record.peak_rss_delta = peak_rss() - rss_before
+            if self.keep_records:
+                with self._lock:
+                    self._records.append(record)
+            if self.callback is not None:
+                self.callback(record)
+
+    @property
+    def records(self) -> List[StageRecord]:
+        """Copy of the records kept so far, in completion order."""
+        with self._lock:
+            return list(self._records)
+
+    def summary(self) -> Dict[str, StageTotals]:
+        """Totals per stage, in STAGES order followed by any other stage names."""
+        totals: Dict[str, StageTotals] = {}
+        for record in self.records:
+            total = totals.setdefault(record.stage, StageTotals(stage=record.stage))
+            total.calls += 1
+            total.wall_seconds += record.wall_seconds
+            total.cpu_seconds += record.cpu_seconds
+            if record.peak_rss_delta is not None:
+                total.peak_rss_delta = max(total.peak_rss_delta or 0, record.peak_rss_delta)
+            for name, value in record.counts.items():
+                total.counts[name] = total.counts.get(name, 0) + value
+        order = {stage: i for i, stage in enumerate(self.STAGES)}
+        return dict(sorted(totals.items(), key=lambda item: order.get(item[0], len(order))))
+
+    def reset(self) -> None:
+        """Drop the records kept so far."""
+        with self._lock:
+            self._records.clear()
@@ -0,0 +1,321 @@
+"""
+INT8 post-training quantization of the detection and recognition models.
+
+The YOLO table detector is quantized statically with ONNX Runtime, and the
+PaddleOCR det/rec models with PaddleSlim, both calibrated on a reference set
+of document images. The quantized artifacts sit next to the fp32 ones, where
+TableDetector and TextRecognizer load them with precision='int8':
+
+* models/table-detection-and-extraction.int8.onnx
+* models/paddleocr_models/det_int8/ and models/paddleocr_models/rec_int8/
+
+compare_precisions is the accuracy gate: it runs both precisions on the
+reference set and reports how far the int8 detections and text drift.
+"""
+import json
+import math
+import shutil
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+import cv2
+import numpy as np
+
+PRECISIONS = ('fp32', 'int8')
+
+# Input sizes the OCR models are calibrated with, as PaddleOCR preprocesses them
+_DET_LIMIT_SIDE = 960
+_DET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+_DET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+_REC_SHAPE = (3, 48, 320)
+
+
+def quantized_onnx_path(model_path: Union[str, Path]) -> Path:
+    """Path of the INT8 ONNX model quantized from the given YOLO weights."""
+    return Path(model_path).with_suffix('.int8.onnx')
+
+
+def ocr_model_dir(models_dir: Union[str, Path], part: str, precision: str = 'fp32') -> Path:
+    """
+    Directory of a PaddleOCR inference model.
+
+    Args:
+        models_dir: Directory containing the OCR models
+        part: 'det' or 'rec'
+        precision: 'fp32' or 'int8'
+
+    Returns:
+        The model directory
+    """
+    return Path(models_dir) / (part if precision == 'fp32' else f'{part}_{precision}')
+
+
+def _det_input(image: np.ndarray) -> np.ndarray:
+    """Resize and normalize an image as the PaddleOCR text detector does."""
+    h, w = image.shape[:2]
+    ratio = min(1.0, _DET_LIMIT_SIDE / max(h, w))
+    resize_h = max(int(round(h * ratio / 32) * 32), 32)
+    resize_w = max(int(round(w * ratio / 32) * 32), 32)
+    image = cv2.resize(image, (resize_w, resize_h)).astype(np.float32) / 255
+    return ((image - _DET_MEAN) / _DET_STD).transpose(2, 0, 1)
+
+
+def _rec_input(crop: np.ndarray) -> np.ndarray:
+    """Resize, normalize and right-pad a text line crop as the PaddleOCR recognizer does."""
+    channels, height, width = _REC_SHAPE
+    h, w = crop.shape[:2]
+    resized_w = min(width, int(math.ceil(height * w / max(h, 1))))
+    resized = cv2.resize(crop, (max(resized_w, 1), height)).astype(np.float32) / 255
+    padded = np.zeros(_REC_SHAPE, dtype=np.float32)
+    padded[:, :, :resized.shape[1]] = (resized.transpose(2, 0, 1) - 0.5) / 0.5
+    return padded
+
+
+def quantize_detector(
+    model_path: Union[str, Path],
+    calibration_images: Sequence[np.ndarray],
+    imgsz: int = 640
+) -> Path:
+    """
+    Quantize the YOLO table detector to INT8 with ONNX Runtime static quantization.
+
+    Args:
+        model_path: Path to the YOLO .pt weights
+        calibration_images: RGB reference images used to calibrate activations
+        imgsz: Inference image size
+
+    Returns:
+        Path of the INT8 ONNX model
+    """
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+    from models.onnx_detector import export_onnx, letterbox
+
+    fp32_path = export_onnx(model_path, imgsz)
+    out_path = quantized_onnx_path(model_path)
+
+    class Reader(CalibrationDataReader):
+        def __init__(self) -> None:
+            self._batches = iter(calibration_images)
+
+        def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+            image = next(self._batches, None)
+            if image is None:
+                return None
+            padded = letterbox(image[..., ::-1], imgsz, auto=False)[0]
+            batch = np.ascontiguousarray(padded[None, ..., ::-1].transpose(0, 3, 1, 2), dtype=np.float32) / 255
+            return {'images': batch}
+
+    quantize_static(
+        str(fp32_path), str(out_path), Reader(),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8
+    )
+    return out_path
+
+
+def quantize_ocr_model(
+    models_dir: Union[str, Path],
+    part: str,
+    samples: Sequence[np.ndarray],
+    algo: str = 'KL'
+) -> Path:
+    """
+    Quantize a PaddleOCR det or rec model to INT8 with PaddleSlim post-training quantization.
+
+    Args:
+        models_dir: Directory containing the OCR models
+        part: 'det' or 'rec'
+        samples: Preprocessed CHW float32 calibration inputs
+        algo: PaddleSlim calibration algorithm
+
+    Returns:
+        Directory of the INT8 model
+    """
+    import paddle
+    from paddleslim.quant import quant_post_static
+
+    out_dir = ocr_model_dir(models_dir, part, 'int8')
+    paddle.enable_static()
+    try:
+        quant_post_static(
+            executor=paddle.static.Executor(paddle.CPUPlace()),
+            model_dir=str(ocr_model_dir(models_dir, part)),
+            quantize_model_path=str(out_dir),
+            sample_generator=lambda: ([sample] for sample in samples),
+            model_filename='inference.pdmodel',
+            params_filename='inference.pdiparams',
+            save_model_filename='inference.pdmodel',
+            save_params_filename='inference.pdiparams',
+            batch_size=1,
+            algo=algo,
+            quantizable_op_type=['conv2d', 'depthwise_conv2d', 'mul', 'matmul', 'matmul_v2']
+        )
+    finally:
+        paddle.disable_static()
+    return out_dir
+
+
+def _iou(a: Sequence[float], b: Sequence[float]) -> float:
+    w = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    h = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = w * h
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 1.0
+
+
+def _box_agreement(reference: np.ndarray, candidate: np.ndarray) -> float:
+    """Mean best-match IoU of the reference boxes, 0 for a reference box left unmatched."""
+    if len(reference) == 0:
+        return 1.0 if len(candidate) == 0 else 0.0
+    return float(np.mean([max((_iou(r, c) for c in candidate), default=0.0) for r in reference]))
+
+
+def compare_precisions(
+    images: Sequence[np.ndarray],
+    model_path: Optional[Union[str, Path]] = None,
+    models_dir: Optional[Union[str, Path]] = None,
+    detector: bool = True,
+    ocr: bool = True
+) -> dict:
+    """
+    Compare the int8 models with the fp32 ones on reference images.
+
+    Detection is scored by the IoU of the int8 table boxes with the fp32 ones.
+    OCR is scored by the similarity of the recognized text of each table, with
+    both precisions reading the same fp32 table boxes so detection drift does
+    not count twice.
+
+    Args:
+        images: RGB reference images
+        model_path: YOLO weights, the bundled model by default
+        models_dir: OCR models directory, the bundled models by default
+        detector: Compare the table detector
+        ocr: Compare the OCR models
+
+    Returns:
+        Report with per-image scores and their minimum and mean
+    """
+    from models.registry import ModelRegistry
+    from models.table_detector import TableDetector
+    from models.text_recognizer import TextRecognizer
+
+    registry = ModelRegistry()
+    fp32_det = TableDetector(model_path=model_path, registry=registry)
+    int8_det = TableDetector(model_path=model_path, registry=registry, precision='int8') if detector else None
+    fp32_ocr = TextRecognizer(models_dir, registry=registry) if ocr else None
+    int8_ocr = TextRecognizer(models_dir, registry=registry, precision='int8') if ocr else None
+
+    det_scores, text_scores = [], []
+    for image in images:
+        cords = np.asarray(fp32_det.detect(image, multi_table=True)).reshape(-1, 4)
+        if detector:
+            int8_cords = np.asarray(int8_det.detect(image, multi_table=True)).reshape(-1, 4)
+            det_scores.append(_box_agreement(cords, int8_cords))
+        if ocr:
+            fp32_words = fp32_ocr.recognize_words(image, cords)
+            int8_words = int8_ocr.recognize_words(image, cords)
+            for a, b in zip(fp32_words, int8_words):
+                text_scores.append(SequenceMatcher(None, ' '.join(a.texts), ' '.join(b.texts)).ratio())
+
+    summarize = lambda scores: {
+        'min': float(min(scores)) if scores else None,
+        'mean': float(np.mean(scores)) if scores else None,
+        'scores': [round(float(score), 4) for score in scores]
+    }
+    return {
+        'images': len(images),
+        'detector_iou': summarize(det_scores) if detector else None,
+        'ocr_text_similarity': summarize(text_scores) if ocr else None
+    }
+
+
+def _ocr_calibration_samples(images: Sequence[np.ndarray], models_dir: Optional[Union[str, Path]]) -> Dict[str, List]:
+    """Preprocessed det inputs of the images and rec inputs of their fp32 text line crops."""
+    from models.text_recognizer import TextRecognizer
+
+    recognizer = TextRecognizer(models_dir)
+    rec_samples = []
+    for image in images:
+        _, crops = recognizer._detect_lines(image)
+        rec_samples.extend(_rec_input(crop) for crop in crops)
+    return {'det': [_det_input(image) for image in images], 'rec': rec_samples}
+
+
+def _load_reference_images(directory: Path, limit: Optional[int] = None) -> Iterator[np.ndarray]:
+    from models.image_utils import load_image
+
+    paths = sorted(
+        path for path in directory.iterdir()
+        if path.suffix.lower() in ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp')
+    )
+    for path in paths[:limit]:
+        yield load_image(path)
+
+
+def run_quantization(
+    reference_dir: Union[str, Path],
+    model_path: Optional[Union[str, Path]] = None,
+    models_dir: Optional[Union[str, Path]] = None,
+    calibration_images: int = 32,
+    detector: bool = True,
+    ocr: bool = True,
+    min_iou: float = 0.9,
+    min_text_similarity: float = 0.97,
+    keep_failed: bool = False
+) -> dict:
+    """
+    Produce the INT8 artifacts and gate them on accuracy against fp32.
+
+    Artifacts that fail the gate are removed unless keep_failed is set, so
+    precision='int8' only ever loads models that passed. The report is saved
+    as quantization_report.json next to the OCR models.
+
+    Args:
+        reference_dir: Directory of reference document images
+        model_path: YOLO weights, the bundled model by default
+        models_dir: OCR models directory, the bundled models by default
+        calibration_images: Number of reference images used for calibration
+        detector: Quantize the table detector
+        ocr: Quantize the OCR det/rec models
+        min_iou: Smallest allowed per-image detection IoU against fp32
+        min_text_similarity: Smallest allowed per-table text similarity against fp32
+        keep_failed: Keep artifacts that fail the gate
+
+    Returns:
+        The accuracy report, with a 'passed' flag per model family
+    """
+    from models.table_detector import TableDetector
+    from models.text_recognizer import TextRecognizer
+
+    model_path = Path(model_path) if model_path else TableDetector().model_path
+    models_dir = Path(models_dir) if models_dir else TextRecognizer().models_dir
+    reference = list(_load_reference_images(Path(reference_dir)))
+    if not reference:
+        raise ValueError(f'No reference images found in {reference_dir}')
+    calibration = reference[:calibration_images]
+
+    if detector:
+        quantize_detector(model_path, calibration)
+    if ocr:
+        samples = _ocr_calibration_samples(calibration, models_dir)
+        for part in ('det', 'rec'):
+            quantize_ocr_model(models_dir, part, samples[part])
+
+    report = compare_precisions(reference, model_path, models_dir, detector, ocr)
+    report['thresholds'] = {'min_iou': min_iou, 'min_text_similarity': min_text_similarity}
+    if detector:
+        report['detector_passed'] = report['detector_iou']['min'] >= min_iou
+        if not report['detector_passed'] and not keep_failed:
+            quantized_onnx_path(model_path).unlink(missing_ok=True)
+    if ocr:
+        similarity = report['ocr_text_similarity']['min']
+        report['ocr_passed'] = similarity is None or similarity >= min_text_similarity
+        if not report['ocr_passed'] and not keep_failed:
+            for part in ('det', 'rec'):
+                shutil.rmtree(ocr_model_dir(models_dir, part, 'int8'), ignore_errors=True)
+
+    with open(models_dir / 'quantization_report.json', 'w') as f:
+        json.dump(report, f, indent=2)
+    return report
@@ -0,0 +1,115 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional
+import psutil
+
+
+@dataclass
+class ModelHandle:
+    """
+    A loaded model shared by every component that asks for the same key.
+
+    Attributes:
+        key: Registry key identifying the model
+        model: The loaded model object
+        lock: Lock to hold while running inference, the backends are not re-entrant
+        load_seconds: Wall time spent loading the model
+        rss_bytes: Resident memory growth observed while loading the model
+    """
+    key: Hashable
+    model: Any
+    lock: threading.RLock = field(default_factory=threading.RLock)
+    load_seconds: float = 0.0
+    rss_bytes: int = 0
+
+
+class ModelRegistry:
+    """
+    Process-wide registry that loads each model once, on first use.
+
+    Components ask for a model by key together with a loader; the loader only
+    runs the first time the key is requested, and every later caller, from any
+    thread or session, receives the same handle.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._handles: Dict[Hashable, ModelHandle] = {}
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        warmup: Optional[Callable[[Any], None]] = None
+    ) -> ModelHandle:
+        """
+        Return the handle for key, loading the model if necessary.
+
+        Args:
+            key: Hashable identifier of the model and its load options
+            loader: Callable creating the model, called at most once per key
+            warmup: Optional callable run once on the freshly loaded model
+
+        Returns:
+            Shared handle wrapping the loaded model
+        """
+        handle = self._handles.get(key)
+        if handle is not None:
+            return handle
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            handle = self._handles.get(key)
+            if handle is not None:
+                return handle
+
+            process = psutil.Process()
+            rss_before = process.memory_info().rss
+            start = time.perf_counter()
+            model = loader()
+            handle = ModelHandle(key=key, model=model)
+            if warmup is not None:
+                with handle.lock:
+                    warmup(model)
+            handle.load_seconds = time.perf_counter() - start
+            handle.rss_bytes = max(process.memory_info().rss - rss_before, 0)
+
+            with self._lock:
+                self._handles[key] = handle
+            return handle
+
+    def is_loaded(self, key: Hashable) -> bool:
+        """Check whether the model for key has already been loaded."""
+        return key in self._handles
+
+    def memory_report(self) -> List[Dict[str, Any]]:
+        """
+        Describe the resident models.
+
+        Returns:
+            One entry per loaded model with its key, memory growth and load time
+        """
+        with self._lock:
+            handles = list(self._handles.values())
+        return [
+            {
+                'key': handle.key,
+                'rss_mb': round(handle.rss_bytes / 2**20, 1),
+                'load_seconds': round(handle.load_seconds, 3)
+            }
+            for handle in handles
+        ]
+
+    def clear(self) -> None:
+        """Forget all loaded models so they can be garbage collected."""
+        with self._lock:
+            self._handles.clear()
+            self._key_locks.clear()
+
+
+default_registry = ModelRegistry()
@@ -0,0 +1,183 @@
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+import cv2
+import numpy as np
+from models.image_utils import ImageInput, decode_scaled, load_image, probe_image
+
+
+@dataclass(frozen=True)
+class ResolutionPolicy:
+    """
+    Resolutions the models see, relative to the uploaded image.
+
+    Attributes:
+        detect_max_side: Longest side of the copy the table detector runs on,
+            None to detect at full resolution
+        ocr_text_height: Character height in pixels OCR crops are rescaled to,
+            estimated from the page; None to OCR at full resolution
+        min_ocr_scale: Smallest OCR scale, so misestimated pages stay legible
+        max_ocr_scale: Largest OCR scale; above 1 small text is upscaled
+    """
+    detect_max_side: Optional[int] = 1280
+    ocr_text_height: Optional[float] = 32.0
+    min_ocr_scale: float = 0.25
+    max_ocr_scale: float = 1.0
+
+
+@dataclass
+class ResolutionReport:
+    """
+    What decoding one image at reduced resolution cost and saved.
+
+    Attributes:
+        original_size: (width, height) of the uploaded image
+        detect_size: (width, height) the detector ran on
+        ocr_size: (width, height) OCR crops were cut from
+        text_height: Estimated character height at full resolution, None if unknown
+        decode_seconds: Time spent decoding, estimating the text height and resizing
+        full_bytes: Size of the full-resolution page array the unscaled path works on
+        held_bytes: Size of the page arrays kept for detection and OCR
+        peak_bytes: Largest size of page arrays alive at once while decoding
+    """
+    original_size: Tuple[int, int]
+    detect_size: Tuple[int, int]
+    ocr_size: Tuple[int, int]
+    text_height: Optional[float]
+    decode_seconds: float
+    full_bytes: int
+    held_bytes: int
+    peak_bytes: int
+
+    @property
+    def saved_bytes(self) -> int:
+        """Page memory held through detection and OCR less than at full resolution."""
+        return self.full_bytes - self.held_bytes
+
+
+@dataclass
+class ScaledPage:
+    """
+    One image decoded for detection and for OCR.
+
+    Attributes:
+        detect_image: RGB array the detector runs on
+        detect_scale: Size of detect_image relative to the original
+        ocr_image: RGB array table crops are OCR'd from
+        ocr_scale: Size of ocr_image relative to the original
+        report: Savings of the reduced resolutions, None when unscaled
+    """
+    detect_image: np.ndarray
+    detect_scale: float
+    ocr_image: np.ndarray
+    ocr_scale: float
+    report: Optional[ResolutionReport] = None
+
+    @classmethod
+    def full(cls, image: ImageInput) -> 'ScaledPage':
+        """Decode an image once, at full resolution for both models."""
+        image = load_image(image)
+        return cls(image, 1.0, image, 1.0)
+
+    def detected_to_full(self, boxes: Optional[List[np.ndarray]]) -> Optional[List[np.ndarray]]:
+        """Map table boxes found on detect_image to original coordinates."""
+        return _rescale_boxes(boxes, 1 / self.detect_scale)
+
+    def full_to_ocr(self, boxes: Optional[List[np.ndarray]]) -> Optional[List[np.ndarray]]:
+        """Map table boxes in original coordinates to ocr_image."""
+        return _rescale_boxes(boxes, self.ocr_scale)
+
+
+def _rescale_boxes(boxes: Optional[List[np.ndarray]], factor: float) -> Optional[List[np.ndarray]]:
+    if boxes is None or factor == 1.0:
+        return boxes
+    return [np.round(np.asarray(box, dtype=np.float64) * factor).astype(int) for box in boxes]
+
+
+def estimate_text_height(image: np.ndarray, min_components: int = 20) -> Optional[float]:
+    """
+    Estimate the typical character height of a page.
+
+    Dark connected components of plausible glyph size are collected from the
+    binarized page and the median of their heights is returned.
+
+    Args:
+        image: RGB or grayscale page
+        min_components: Fewest glyph-like components needed for an estimate
+
+    Returns:
+        Character height in pixels of the given image, None for pages with too little text
+    """
+    gray = cv2.cvtColor(np.ascontiguousarray(image), cv2.COLOR_RGB2GRAY) if image.ndim == 3 else image
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    widths, heights, areas = stats[1:, cv2.CC_STAT_WIDTH], stats[1:, cv2.CC_STAT_HEIGHT], stats[1:, cv2.CC_STAT_AREA]
+    # Glyphs: not specks, not ruling lines, not figures
+    glyphs = (heights >= 3) & (areas >= 4) & (heights <= gray.shape[0] / 20) & (widths <= 4 * heights)
+    if np.count_nonzero(glyphs) < min_components:
+        return None
+    return float(np.median(heights[glyphs]))
+
+
+def prepare_page(image: ImageInput, policy: Optional[ResolutionPolicy]) -> ScaledPage:
+    """
+    Decode an image at the resolutions the policy asks for.
+
+    Encoded JPEGs are decoded twice in draft mode, once per scale, without
+    ever materializing the full resolution. Other images are decoded once
+    and resized from memory. The OCR image of a JPEG keeps the draft scale
+    just above the target, trading a slightly larger image for no resize.
+
+    Args:
+        image: Path, encoded bytes, PIL image or RGB array
+        policy: Resolution policy, None for full resolution
+
+    Returns:
+        The page for detection and OCR, with a report when a policy is given
+    """
+    if policy is None:
+        return ScaledPage.full(image)
+
+    start = time.perf_counter()
+    (width, height), fmt = probe_image(image)
+    full_bytes = width * height * 3
+    draft = fmt == 'JPEG'
+    source = image if draft else load_image(image)
+    # An array passed in is the caller's; a decoded one is ours until it is resized
+    transient = 0 if draft or isinstance(image, np.ndarray) else full_bytes
+
+    detect_scale = 1.0
+    if policy.detect_max_side is not None and max(width, height) > policy.detect_max_side:
+        detect_scale = policy.detect_max_side / max(width, height)
+    detect_image = decode_scaled(source, detect_scale)
+    detect_scale = detect_image.shape[1] / width
+
+    text_height = None
+    ocr_scale = 1.0
+    if policy.ocr_text_height is not None:
+        measured = estimate_text_height(detect_image)
+        if measured is not None:
+            text_height = measured / detect_scale
+            ocr_scale = float(np.clip(policy.ocr_text_height / text_height, policy.min_ocr_scale, policy.max_ocr_scale))
+
+    if ocr_scale == detect_scale:
+        ocr_image = detect_image
+    else:
+        if draft and ocr_scale > 1.0:
+            source = load_image(image)
+            transient = full_bytes
+        ocr_image = decode_scaled(source, ocr_scale, resample=not draft)
+    ocr_scale = ocr_image.shape[1] / width
+
+    held_bytes = detect_image.nbytes + (ocr_image.nbytes if ocr_image is not detect_image else 0)
+    report = ResolutionReport(
+        original_size=(width, height),
+        detect_size=(detect_image.shape[1], detect_image.shape[0]),
+        ocr_size=(ocr_image.shape[1], ocr_image.shape[0]),
+        text_height=text_height,
+        decode_seconds=time.perf_counter() - start,
+        full_bytes=full_bytes,
+        held_bytes=held_bytes,
+        peak_bytes=held_bytes + (transient if ocr_image is not source else 0)
+    )
+    return ScaledPage(detect_image, detect_scale, ocr_image, ocr_scale, report)
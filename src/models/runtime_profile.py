@@ -0,0 +1,123 @@
+import os
+from dataclasses import asdict, dataclass, replace
+from typing import Callable, Dict, Optional, Sequence, Union
+
+
+@dataclass(frozen=True)
+class RuntimeProfile:
+    """
+    CPU inference settings of the detection and OCR models.
+
+    Settings left as None keep the library defaults, so the default profile
+    runs the models exactly as they are built without one.
+
+    Attributes:
+        name: Profile name
+        cpu_threads: Threads of each PaddleOCR predictor
+        enable_mkldnn: Run PaddleOCR with oneDNN kernels
+        rec_batch_num: Text line crops per recognition batch
+        det_limit_side_len: Longest side text detection inputs are resized to
+        detector_threads: Threads of the table detector (torch or ONNX Runtime)
+        detector_imgsz: Table detector input size
+    """
+    name: str = 'default'
+    cpu_threads: Optional[int] = None
+    enable_mkldnn: Optional[bool] = None
+    rec_batch_num: Optional[int] = None
+    det_limit_side_len: Optional[int] = None
+    detector_threads: Optional[int] = None
+    detector_imgsz: Optional[int] = None
+
+    # Fields that only change speed, not the extracted values
+    THREAD_FIELDS = ('cpu_threads', 'detector_threads')
+    # Fields fixed when each model is loaded
+    OCR_MODEL_FIELDS = ('cpu_threads', 'enable_mkldnn', 'rec_batch_num', 'det_limit_side_len')
+    DETECTOR_MODEL_FIELDS = ('detector_threads',)
+
+    @classmethod
+    def preset(cls, name: str) -> 'RuntimeProfile':
+        """
+        Build a preset sized for this machine.
+
+        Args:
+            name: One of PRESETS
+
+        Returns:
+            The runtime profile
+        """
+        if name not in PRESETS:
+            raise ValueError(f"Unknown runtime profile {name!r}, expected one of {sorted(PRESETS)}")
+        return PRESETS[name](os.cpu_count() or 1)
+
+    @classmethod
+    def resolve(cls, profile: Optional[Union[str, 'RuntimeProfile']]) -> 'RuntimeProfile':
+        """Turn a preset name, a profile or None into a profile."""
+        if profile is None:
+            return cls()
+        if isinstance(profile, str):
+            return cls.preset(profile)
+        return profile
+
+    def with_overrides(self, **changes) -> 'RuntimeProfile':
+        """Copy of the profile with some settings changed."""
+        return replace(self, **changes)
+
+    def paddleocr_kwargs(self) -> Dict[str, object]:
+        """PaddleOCR constructor arguments for the settings that are set."""
+        kwargs = {
+            'cpu_threads': self.cpu_threads,
+            'enable_mkldnn': self.enable_mkldnn,
+            'rec_batch_num': self.rec_batch_num,
+            'det_limit_side_len': self.det_limit_side_len
+        }
+        return {key: value for key, value in kwargs.items() if value is not None}
+
+    def model_key(self, fields: Sequence[str]) -> tuple:
+        """
+        Settings a loaded model depends on, for registry keys.
+
+        Args:
+            fields: Names of the settings applied when the model is loaded
+
+        Returns:
+            (name, value) pairs of the fields that are set, empty for the default profile
+        """
+        return tuple((key, getattr(self, key)) for key in fields if getattr(self, key) is not None)
+
+    def result_params(self) -> Dict[str, object]:
+        """Settings that can change extraction results, for result cache keys."""
+        return {
+            key: value for key, value in asdict(self).items()
+            if key != 'name' and key not in self.THREAD_FIELDS and value is not None
+        }
+
+
+PRESETS: Dict[str, Callable[[int], RuntimeProfile]] = {
+    'default': lambda cpus: RuntimeProfile(),
+    # One request at a time, using every core
+    'latency': lambda cpus: RuntimeProfile(
+        name='latency',
+        cpu_threads=cpus,
+        enable_mkldnn=True,
+        rec_batch_num=6,
+        detector_threads=cpus
+    ),
+    # Many requests at once: larger recognition batches and fewer threads per
+    # model, leaving cores to OCR replicas, pipeline stages or CLI workers
+    'throughput': lambda cpus: RuntimeProfile(
+        name='throughput',
+        cpu_threads=max(1, cpus // 4),
+        enable_mkldnn=True,
+        rec_batch_num=16,
+        detector_threads=max(1, cpus // 4)
+    ),
+    # Small inputs and batches, and no oneDNN primitive caches
+    'low-memory': lambda cpus: RuntimeProfile(
+        name='low-memory',
+        cpu_threads=min(cpus, 2),
+        enable_mkldnn=False,
+        rec_batch_num=1,
+        det_limit_side_len=736,
+        detector_threads=min(cpus, 2)
+    ),
+}
@@ -1,8 +1,21 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Union
+from typing import TYPE_CHECKING, List, Optional, Sequence, Union
 import numpy as np
-from ultralytics import YOLO
-# from ultralyticsplus import YOLO
+from models.registry import ModelHandle, ModelRegistry, default_registry
+from models.image_utils import ImageInput, load_image
+from models.box_utils import calculate_overlap, overlap_matrix
+from models.onnx_detector import OnnxYOLO, export_onnx
+from models.quantization import PRECISIONS, quantized_onnx_path
+from models.runtime_profile import RuntimeProfile
+from models.tiling import TileSource, cut_by_tile, open_source, owned_by, slice_tiles, union_touching
+from models.warm_start import load_fused_yolo, optimized_onnx_path
+
+if TYPE_CHECKING:
+    from ultralytics import YOLO
+
+logger = logging.getLogger(__name__)
 
 
 class TableDetector:
@@ -13,111 +26,299 @@ class TableDetector:
         model_path (Path): Path to the YOLO model weights
         confidence (float): Confidence threshold for detection
         iou_threshold (float): IoU threshold for NMS
+        backend (str): Inference backend, 'torch' or 'onnx'
+        precision (str): Model precision, 'fp32' or 'int8'
+        profile (RuntimeProfile): CPU inference settings
+        warm_start (bool): Whether fused or optimized model state is kept on disk
     """
+
+    BACKENDS = ('torch', 'onnx')
     
     def __init__(
         self,
         confidence: float = 0.50,
-        iou_threshold: float = 0.45
+        iou_threshold: float = 0.45,
+        model_path: Optional[Union[str, Path]] = None,
+        registry: Optional[ModelRegistry] = None,
+        backend: str = 'torch',
+        precision: str = 'fp32',
+        profile: Optional[Union[str, RuntimeProfile]] = None,
+        warm_start: bool = False
     ) -> None:
         """
         Initialize the TableDetector with model and parameters.
         
+        The model itself is loaded lazily through the registry on first use.
+        
         Args:
-            model_path: Path to the YOLO model weights
             confidence: Confidence threshold for detection
             iou_threshold: IoU threshold for NMS
+            model_path: Path to the YOLO model weights
+            registry: Model registry to share the loaded model through
+            backend: 'torch' runs the weights with ultralytics; 'onnx' exports
+                them to ONNX once, caching the file next to the weights, and
+                runs them with ONNX Runtime
+            precision: 'int8' runs the quantized ONNX model produced by
+                models.quantization next to the weights, on the 'onnx' backend
+            profile: Runtime profile or preset name; detector_threads and
+                detector_imgsz apply to the detector
+            warm_start: Keep the fused 'torch' model or the graph ONNX Runtime
+                optimized next to the weights and load it in later processes,
+                see models.warm_start
         """
-        self.model_path = 'src/models/table-detection-and-extraction.pt'
-        self.model = YOLO(str(self.model_path))
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {self.BACKENDS}")
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision {precision!r}, expected one of {PRECISIONS}")
+        self.model_path = Path(model_path) if model_path else Path(__file__).parent / 'table-detection-and-extraction.pt'
         self.min_conf = confidence
         self.iou = iou_threshold
+        self._registry = registry or default_registry
+        # The quantized detector only exists as an ONNX model
+        self.backend = 'onnx' if precision == 'int8' else backend
+        self.precision = precision
+        self.profile = RuntimeProfile.resolve(profile)
+        self.warm_start = warm_start
+
+    @property
+    def handle(self) -> ModelHandle:
+        """Shared handle of the YOLO model, loading it on first access."""
+        kind = 'yolo' if self.backend == 'torch' else 'yolo-onnx'
+        key = (kind, str(self.model_path)) if self.precision == 'fp32' else (kind, str(self.model_path), self.precision)
+        if self.warm_start:
+            # A cold-loaded model never writes the warm start state, so it is not shared with one
+            key += ('warm-start',)
+        key += self.profile.model_key(RuntimeProfile.DETECTOR_MODEL_FIELDS)
+        return self._registry.get(key, self._load_model)
+
+    @property
+    def model(self) -> Union['YOLO', OnnxYOLO]:
+        """The shared YOLO model."""
+        return self.handle.model
 
-    def detect(self, image_path: Union[str, Path]) -> Optional[np.ndarray]:
+    def _load_model(self) -> Union['YOLO', OnnxYOLO]:
+        threads = self.profile.detector_threads
+        if self.precision == 'int8':
+            onnx_path = quantized_onnx_path(self.model_path)
+            if not onnx_path.exists():
+                raise FileNotFoundError(
+                    f"No quantized detector at {onnx_path}, create it with python -m table_creator quantize"
+                )
+            return self._load_onnx(onnx_path, threads)
+        if self.backend == 'onnx':
+            return self._load_onnx(export_onnx(self.model_path), threads)
+        if threads is not None:
+            import torch
+
+            # torch has one intra-op pool per process
+            torch.set_num_threads(threads)
+        if self.warm_start:
+            return load_fused_yolo(self.model_path)
+        from ultralytics import YOLO
+
+        return YOLO(str(self.model_path))
+
+    def _load_onnx(self, onnx_path: Path, threads: Optional[int]) -> OnnxYOLO:
+        optimized_path = optimized_onnx_path(onnx_path) if self.warm_start else None
+        return OnnxYOLO(onnx_path, threads=threads, optimized_path=optimized_path)
+
+    def _predict_kwargs(self) -> dict:
+        """Keyword arguments of every predict call."""
+        kwargs = {'verbose': False, 'iou': self.iou, 'conf': self.min_conf}
+        if self.profile.detector_imgsz is not None:
+            kwargs['imgsz'] = self.profile.detector_imgsz
+        return kwargs
+
+    def warmup(self) -> None:
+        """Load the model and run one inference so the first request is not a cold start."""
+        handle = self.handle
+        with handle.lock:
+            handle.model.predict(np.zeros((64, 64, 3), dtype=np.uint8), verbose=False)
+
+    def detect(self, image: ImageInput, multi_table: bool = False) -> Optional[np.ndarray]:
         """
         Detect tables in the given image.
         
         Args:
-            image_path: Path to the input image
+            image: Image path, encoded bytes, PIL image or RGB array
+            multi_table: Return every detected table instead of only the largest
             
         Returns:
             Array of bounding box coordinates or None if no tables detected
         """
-        results = self.model.predict(str(image_path), verbose=False, iou = self.iou, conf = self.min_conf)
+        image = load_image(image)
+        handle = self.handle
+        with handle.lock:
+            # YOLO expects BGR arrays, the channel flip is a view
+            results = handle.model.predict(image[..., ::-1], **self._predict_kwargs())
         if results:
-            print('boxes :\n',results[0])
-            boxes = results[0].boxes.xyxy.numpy()
-            cord =  self.merge_boxes(boxes)
-            print('cords : ',cord)
-            return [sorted(cord, key = lambda x : (x[2]-x[0])* (x[3]-x[1]), reverse=True)[0]] if len(cord) > 0 else []
+            return self._select_tables(results[0], multi_table)
         return None
 
-    def merge_boxes(self, boxes: np.ndarray, overlap_threshold: float = 35) -> np.ndarray:
+    def detect_batch(
+        self,
+        images: Sequence[ImageInput],
+        batch_size: int = 8,
+        multi_table: bool = False
+    ) -> List[Union[Optional[np.ndarray], Exception]]:
         """
-        Merge overlapping bounding boxes.
+        Detect tables in several images, running YOLO on real batches.
         
         Args:
-            boxes: Array of bounding box coordinates
-            overlap_threshold: Threshold for merging overlapping boxes
+            images: Image paths, encoded bytes, PIL images or RGB arrays
+            batch_size: Number of images per YOLO forward pass
+            multi_table: Return every detected table instead of only the largest
             
         Returns:
-            Array of merged bounding box coordinates
+            Per-image results in input order, as returned by detect; an image
+            that fails is returned as the raised exception
         """
-        # Sort boxes by area in descending order
-        areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
-        sorted_indices = np.argsort(-areas)
-        boxes = boxes[sorted_indices]
-        
-        merged_boxes = []
-        
-        for box in boxes:
-            if not merged_boxes:
-                merged_boxes.append(box)
+        outputs: List[Union[Optional[np.ndarray], Exception]] = [None] * len(images)
+        for start in range(0, len(images), batch_size):
+            batch = []
+            for idx in range(start, min(start + batch_size, len(images))):
+                try:
+                    batch.append((idx, load_image(images[idx])))
+                except Exception as e:
+                    outputs[idx] = e
+            if not batch:
                 continue
-                
-            overlap_found = False
-            for i, merged_box in enumerate(merged_boxes):
-                iou = self._calculate_overlap(box, merged_box)
-                if iou > overlap_threshold:
-                    # Keep the larger box
-                    box_area = (box[2] - box[0]) * (box[3] - box[1])
-                    merged_area = (merged_box[2] - merged_box[0]) * (merged_box[3] - merged_box[1])
-                    if box_area > merged_area:
-                        merged_boxes[i] = box
-                    overlap_found = True
-                    break
-                    
-            if not overlap_found:
-                merged_boxes.append(box)
+
+            handle = self.handle
+            try:
+                with handle.lock:
+                    results = handle.model.predict(
+                        [image[..., ::-1] for _, image in batch], **self._predict_kwargs()
+                    )
+            except Exception:
+                # Isolate the failing image by falling back to one call per image
+                for idx, image in batch:
+                    try:
+                        outputs[idx] = self.detect(image, multi_table)
+                    except Exception as e:
+                        outputs[idx] = e
+                continue
+
+            for (idx, _), result in zip(batch, results):
+                try:
+                    outputs[idx] = self._select_tables(result, multi_table)
+                except Exception as e:
+                    outputs[idx] = e
+        return outputs
+
+    def detect_tiled(
+        self,
+        image: Union[ImageInput, TileSource],
+        multi_table: bool = False,
+        tile_size: int = 1024,
+        overlap: float = 0.2,
+        batch_size: int = 8
+    ) -> List[np.ndarray]:
+        """
+        Detect tables in a very large image, tile by tile.
+        
+        The page is cut into overlapping tiles that are read from the image
+        only when their batch is due, the next batch being read while YOLO
+        runs on the current one. A box that does not touch an inner edge of
+        its tile is kept by the tile owning its centre; boxes cut by a seam
+        are joined with their pieces from the neighbouring tiles. One
+        downscaled pass over the whole page finds tables larger than a tile.
+        All boxes are then merged as in detect.
         
-        return np.array(merged_boxes).astype(int)
+        Args:
+            image: Image path, encoded bytes, PIL image, RGB array or TileSource
+            multi_table: Return every detected table instead of only the largest
+            tile_size: Side of the square tiles, in image pixels
+            overlap: Fraction of a tile shared with each neighbour
+            batch_size: Number of tiles per YOLO forward pass
+            
+        Returns:
+            Bounding boxes in image pixels, as returned by detect
+        """
+        with open_source(image) as source:
+            kwargs = self._predict_kwargs()
+            handle = self.handle
+
+            thumbnail, scale = source.thumbnail(tile_size)
+            with handle.lock:
+                results = handle.model.predict(thumbnail[..., ::-1], **kwargs)
+            found = [self._boxes(results[0]) / scale] if results else []
+
+            tiles, cores = slice_tiles(*source.size, tile_size, overlap)
+            batches = [range(start, min(start + batch_size, len(tiles))) for start in range(0, len(tiles), batch_size)]
+            cut_pieces = []
+
+            def read(batch: range) -> List[np.ndarray]:
+                return [source.read(tiles[i]) for i in batch]
+
+            with ThreadPoolExecutor(max_workers=1) as reader:
+                pending = reader.submit(read, batches[0])
+                for n, batch in enumerate(batches):
+                    crops = pending.result()
+                    if n + 1 < len(batches):
+                        pending = reader.submit(read, batches[n + 1])
+                    with handle.lock:
+                        results = handle.model.predict([crop[..., ::-1] for crop in crops], **kwargs)
+                    for i, result in zip(batch, results):
+                        boxes = self._boxes(result) + [tiles[i][0], tiles[i][1]] * 2
+                        cut = cut_by_tile(boxes, tiles[i], source.size)
+                        found.append(boxes[~cut & owned_by(boxes, cores[i])])
+                        cut_pieces.append(boxes[cut])
+                    del crops
+
+            if cut_pieces:
+                found.append(union_touching(np.concatenate(cut_pieces)))
+            return self._pick_tables(self.merge_boxes(np.concatenate(found)), multi_table)
+
+    @staticmethod
+    def _boxes(result) -> np.ndarray:
+        """Raw YOLO boxes of one result as a float (N, 4) array."""
+        return np.asarray(result.boxes.xyxy, dtype=np.float64).reshape(-1, 4)
+
+    def _select_tables(self, result, multi_table: bool = False) -> List[np.ndarray]:
+        """Merge the raw YOLO boxes of one image and keep the largest table, or all in reading order."""
+        boxes = np.asarray(result.boxes.xyxy)
+        logger.debug('Raw table boxes: %s', boxes.tolist())
+        cord =  self.merge_boxes(boxes)
+        logger.debug('Merged table boxes: %s', cord.tolist())
+        return self._pick_tables(cord, multi_table)
 
     @staticmethod
-    def _calculate_overlap(box1: np.ndarray, box2: np.ndarray) -> float:
+    def _pick_tables(cord: np.ndarray, multi_table: bool) -> List[np.ndarray]:
+        """Keep the largest merged box, or all of them in reading order."""
+        if multi_table:
+            return sorted(cord, key = lambda x : (x[1], x[0]))
+        return [sorted(cord, key = lambda x : (x[2]-x[0])* (x[3]-x[1]), reverse=True)[0]] if len(cord) > 0 else []
+
+    def merge_boxes(self, boxes: np.ndarray, overlap_threshold: float = 35) -> np.ndarray:
         """
-        Calculate the percentage overlap between two boxes.
+        Merge overlapping bounding boxes.
+        
+        Boxes are visited from largest to smallest and a box is kept unless it
+        overlaps a larger box that was already kept. The pairwise overlaps are
+        computed in one vectorized call.
         
         Args:
-            box1: First bounding box coordinates
-            box2: Second bounding box coordinates
+            boxes: Array of bounding box coordinates
+            overlap_threshold: Threshold for merging overlapping boxes
             
         Returns:
-            Percentage of overlap between the boxes
+            Array of merged bounding box coordinates
         """
-        x_left = max(box1[0], box2[0])
-        y_top = max(box1[1], box2[1])
-        x_right = min(box1[2], box2[2])
-        y_bottom = min(box1[3], box2[3])
+        # Sort boxes by area in descending order
+        areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+        sorted_indices = np.argsort(-areas)
+        boxes = boxes[sorted_indices]
+        if len(boxes) == 0:
+            return np.array([]).astype(int)
 
-        if x_right < x_left or y_bottom < y_top:
-            return 0.0
+        overlaps = overlap_matrix(boxes, boxes) > overlap_threshold
+        keep = np.ones(len(boxes), dtype=bool)
+        for i in range(len(boxes)):
+            if keep[i]:
+                # A smaller box overlapping a kept one is merged into it
+                keep[i + 1:] &= ~overlaps[i, i + 1:]
 
-        intersection_area = (x_right - x_left) * (y_bottom - y_top)
-        box1_area = (box1[2] - box1[0]) * (box1[3] - box1[1])
-        box2_area = (box2[2] - box2[0]) * (box2[3] - box2[1])
+        return boxes[keep].astype(int)
 
-        min_area = min(box1_area, box2_area)
-        if min_area == 0:
-            return 0.0
-            
-        return (intersection_area / min_area) * 100
\ No newline at end of file
+    _calculate_overlap = staticmethod(calculate_overlap)
@@ -1,9 +1,22 @@
+import copy
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Optional, Dict, Union
+from typing import TYPE_CHECKING, Callable, Iterator, List, Optional, Sequence, Union
 import numpy as np
 import pandas as pd
-from paddleocr import PaddleOCR
-from PIL import Image
+from models.box_utils import overlap_matrix
+from models.image_utils import ImageInput, load_image
+from models.registry import ModelHandle, ModelRegistry, default_registry
+from models.ocr_words import OCRWords
+from models.profiling import NullProfiler
+from models.quantization import PRECISIONS, ocr_model_dir
+from models.runtime_profile import RuntimeProfile
+from models.tiling import TileSource, cut_by_tile, open_source, owned_by, slice_tiles, union_touching
+
+if TYPE_CHECKING:
+    from paddleocr import PaddleOCR
 
 class TextRecognizer:
     """
@@ -11,25 +24,120 @@ class TextRecognizer:
     
     Attributes:
         models_dir (Path): Directory containing OCR model files
+        workers (int): Number of model replicas used to OCR table crops concurrently
+        precision (str): Model precision, 'fp32' or 'int8'
+        profile (RuntimeProfile): CPU inference settings
+        profiler (NullProfiler): Receives the ocr_det and ocr_rec stage timings
     """
+
+    # Most seam-joined lines recognize_words_tiled reads and recognizes at once
+    SEAM_BATCH = 32
     
-    def __init__(self, models_dir: Optional[Union[str, Path]] = None) -> None:
+    def __init__(
+        self,
+        models_dir: Optional[Union[str, Path]] = None,
+        registry: Optional[ModelRegistry] = None,
+        workers: int = 1,
+        precision: str = 'fp32',
+        profile: Optional[Union[str, RuntimeProfile]] = None,
+        profiler: Optional[NullProfiler] = None
+    ) -> None:
         """
         Initialize the TextRecognizer with model directory.
         
+        The OCR model itself is loaded lazily through the registry on first use.
+        PaddleOCR predictors are not re-entrant, so concurrent OCR uses one
+        model replica per worker.
+        
         Args:
             models_dir: Directory containing OCR model files
+            registry: Model registry to share the loaded model through
+            workers: Number of table crops to OCR concurrently
+            precision: 'int8' loads the quantized det/rec models produced by
+                models.quantization, from det_int8/ and rec_int8/ in models_dir
+            profile: Runtime profile or preset name; its PaddleOCR settings
+                apply to every replica
+            profiler: StageProfiler timing every text detection and
+                recognition call, none by default
         """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision {precision!r}, expected one of {PRECISIONS}")
+        self.precision = precision
+        self.profile = RuntimeProfile.resolve(profile)
+        self.profiler = profiler or NullProfiler()
         self.models_dir = Path(models_dir) if models_dir else Path(__file__).parent / 'paddleocr_models'
         self._setup_model_dirs()
-        
-        self.model = PaddleOCR(
+        self._registry = registry or default_registry
+        self.workers = max(int(workers), 1)
+        self._free_replicas: "queue.Queue[int]" = queue.Queue()
+        for replica in range(self.workers):
+            self._free_replicas.put(replica)
+
+    def _replica_key(self, replica: int) -> tuple:
+        key = ('paddleocr', str(self.models_dir))
+        if self.precision != 'fp32':
+            key += (self.precision,)
+        key += self.profile.model_key(RuntimeProfile.OCR_MODEL_FIELDS)
+        return key if replica == 0 else key + (replica,)
+
+    @property
+    def handle(self) -> ModelHandle:
+        """Shared handle of the PaddleOCR model, loading it on first access."""
+        return self._registry.get(self._replica_key(0), self._load_model)
+
+    @property
+    def model(self) -> 'PaddleOCR':
+        """The shared PaddleOCR model."""
+        return self.handle.model
+
+    def _load_model(self) -> 'PaddleOCR':
+        from paddleocr import PaddleOCR
+
+        det_dir = ocr_model_dir(self.models_dir, 'det', self.precision)
+        rec_dir = ocr_model_dir(self.models_dir, 'rec', self.precision)
+        if self.precision == 'fp32':
+            return PaddleOCR(
+                use_angle_cls=False,
+                lang='en',
+                det_model_dir=str(det_dir),
+                rec_model_dir=str(rec_dir),
+                **self.profile.paddleocr_kwargs()
+            )
+
+        for model_dir in (det_dir, rec_dir):
+            if not (model_dir / 'inference.pdmodel').exists():
+                raise FileNotFoundError(
+                    f"No quantized OCR model in {model_dir}, create it with python -m table_creator quantize"
+                )
+        # Quantized models run their INT8 kernels through oneDNN
+        kwargs = {**self.profile.paddleocr_kwargs(), 'enable_mkldnn': True}
+        return PaddleOCR(
             use_angle_cls=False,
             lang='en',
-            det_model_dir=str(self.models_dir / 'det'),
-            rec_model_dir=str(self.models_dir / 'rec')
+            det_model_dir=str(det_dir),
+            rec_model_dir=str(rec_dir),
+            precision=self.precision,
+            **kwargs
         )
 
+    def warmup(self) -> None:
+        """Load every model replica and run one inference so the first request is not a cold start."""
+        for replica in range(self.workers):
+            handle = self._registry.get(self._replica_key(replica), self._load_model)
+            with handle.lock:
+                handle.model.ocr(np.full((64, 256, 3), 255, dtype=np.uint8))
+
+    @contextmanager
+    def _acquire(self) -> Iterator['PaddleOCR']:
+        """Borrow a free model replica for the duration of one inference."""
+        replica = self._free_replicas.get()
+        try:
+            handle = self._registry.get(self._replica_key(replica), self._load_model)
+            with handle.lock:
+                yield handle.model
+        finally:
+            self._free_replicas.put(replica)
+
     def _setup_model_dirs(self) -> None:
         """Create necessary directories for model files."""
         (self.models_dir / 'det').mkdir(parents=True, exist_ok=True)
@@ -37,79 +145,338 @@ class TextRecognizer:
 
     def recognize(
         self, 
-        image_path: Union[str, Path], 
+        image: ImageInput, 
         table_boxes: Optional[np.ndarray] = None,
         padding: tuple = (0, 0)
     ) -> List[pd.DataFrame]:
         """
         Perform OCR on the image within specified table regions.
         
+        Every table box is cropped and OCR'd on its own, concurrently when the
+        recognizer has several workers, so text outside the tables is never
+        processed. Word coordinates are relative to their table crop.
+        
         Args:
-            image_path: Path to the input image
-            table_boxes: Array of table bounding box coordinates
+            image: Image path, encoded bytes, PIL image or RGB array
+            table_boxes: Array of table bounding box coordinates, None for the whole page
             padding: Padding to add around table regions (x, y)
             
         Returns:
-            List of DataFrames containing extracted text and positions
+            List of DataFrames containing extracted text and positions, one per table
+        """
+        return [words.to_dataframe() for words in self.recognize_words(image, table_boxes, padding)]
+
+    def recognize_batch(
+        self,
+        images: Sequence[ImageInput],
+        table_boxes: Optional[Sequence[Optional[np.ndarray]]] = None,
+        padding: tuple = (0, 0)
+    ) -> List[Union[List[pd.DataFrame], Exception]]:
         """
-        with Image.open(image_path) as img:
-            img_array = np.array(img.convert('RGB'))
+        Perform OCR on several images, grouping text recognition across them.
+        
+        Args:
+            images: Image paths, encoded bytes, PIL images or RGB arrays
+            table_boxes: Table bounding boxes per image, as for recognize
+            padding: Padding to add around table regions (x, y)
             
-        if table_boxes is not None and len(table_boxes) == 1:
-            pad_x, pad_y = padding
-            box = table_boxes[0]
-            img_array = img_array[
-                max(box[1]-pad_y, 0):box[3]+pad_y,
-                max(box[0]-pad_x, 0):box[2]+pad_x
-            ]
+        Returns:
+            Per-image results in input order, as returned by recognize; an
+            image that fails is returned as the raised exception
+        """
+        return [
+            result if isinstance(result, Exception) else [words.to_dataframe() for words in result]
+            for result in self.recognize_words_batch(images, table_boxes, padding)
+        ]
+
+    def recognize_words(
+        self,
+        image: ImageInput,
+        table_boxes: Optional[np.ndarray] = None,
+        padding: tuple = (0, 0)
+    ) -> List[OCRWords]:
+        """
+        Perform OCR like recognize, returning columnar OCRWords instead of DataFrames.
+        
+        Args:
+            image: Image path, encoded bytes, PIL image or RGB array
+            table_boxes: Array of table bounding box coordinates, None for the whole page
+            padding: Padding to add around table regions (x, y)
+            
+        Returns:
+            Words of each table in reading order
+        """
+        result = self.recognize_words_batch([image], [table_boxes], padding)[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def recognize_words_batch(
+        self,
+        images: Sequence[ImageInput],
+        table_boxes: Optional[Sequence[Optional[np.ndarray]]] = None,
+        padding: tuple = (0, 0)
+    ) -> List[Union[List[OCRWords], Exception]]:
+        """
+        Perform OCR on several images, grouping text recognition across them.
+        
+        Text lines are detected per table crop, then the line crops of every
+        image are recognized together so PaddleOCR fills its recognition batches.
+        
+        Args:
+            images: Image paths, encoded bytes, PIL images or RGB arrays
+            table_boxes: Table bounding boxes per image, as for recognize
+            padding: Padding to add around table regions (x, y)
             
-        ocr_result = self.model.ocr(img_array)
+        Returns:
+            Per-image words of each table in input order; an image that fails
+            is returned as the raised exception
+        """
+        if table_boxes is None:
+            table_boxes = [None] * len(images)
+
+        outputs: List[Union[List[OCRWords], Exception]] = [None] * len(images)
+        regions = []
+        for idx, (image, boxes) in enumerate(zip(images, table_boxes)):
+            try:
+                crops = self.crop_regions(load_image(image), boxes, padding)
+                regions.extend((idx, crop) for crop in crops)
+                outputs[idx] = []
+            except Exception as e:
+                outputs[idx] = e
+
+        lines = self._map(self._detect_lines, [crop for _, crop in regions])
+        line_crops = [
+            crop for det in lines if not isinstance(det, Exception) for crop in det[1]
+        ]
+        rec_chunks = self._map(self._recognize_crops, self._split(line_crops))
+        if any(isinstance(chunk, Exception) for chunk in rec_chunks):
+            # Isolate the failing image by recognizing each table on its own
+            rec_res = None
+        else:
+            rec_res = [result for chunk in rec_chunks for result in chunk]
+
+        drop_score = self.handle.model.drop_score
+        offset = 0
+        for (idx, _), det in zip(regions, lines):
+            if isinstance(det, Exception):
+                outputs[idx] = det
+                continue
+            line_boxes, crops = det
+            start, offset = offset, offset + len(crops)
+            if isinstance(outputs[idx], Exception):
+                continue
+            try:
+                rec = self._recognize_crops(crops) if rec_res is None else rec_res[start:offset]
+                keep = [i for i, result in enumerate(rec) if result[1] >= drop_score]
+                outputs[idx].append(OCRWords.from_quads(
+                    [line_boxes[i] for i in keep],
+                    [rec[i][0] for i in keep],
+                    [rec[i][1] for i in keep]
+                ))
+            except Exception as e:
+                outputs[idx] = e
+        return outputs
+
+    def recognize_words_tiled(
+        self,
+        image: Union[ImageInput, TileSource],
+        table_boxes: Optional[np.ndarray] = None,
+        padding: tuple = (0, 0),
+        tile_size: int = 1280,
+        overlap: float = 0.2
+    ) -> List[OCRWords]:
+        """
+        Perform OCR like recognize_words on a very large image, tile by tile.
         
-        if table_boxes is not None and len(table_boxes) > 1:
-            return self._process_multiple_tables(ocr_result[0], table_boxes)
-        return self._process_single_table(ocr_result[0])
+        Each table region is cut into overlapping tiles, read from the image
+        only when a worker gets to them. A worker detects the text lines of
+        its tile and recognizes them before taking the next tile, keeping
+        only their quads, texts and scores, so at most one tile and its line
+        crops per worker are held at a time. A line that does not touch an
+        inner edge of its tile is kept by the tile owning its centre. Pieces
+        of lines cut by a seam are dropped when another tile saw the line
+        whole, otherwise joined, read again from the image and recognized in
+        batches of at most SEAM_BATCH lines.
+        
+        Args:
+            image: Image path, encoded bytes, PIL image, RGB array or TileSource
+            table_boxes: Array of table bounding box coordinates, None for the whole page
+            padding: Padding to add around table regions (x, y)
+            tile_size: Side of the square tiles, in image pixels
+            overlap: Fraction of a tile shared with each neighbour
+            
+        Returns:
+            Words of each table in reading order, relative to the padded table box
+        """
+        with open_source(image) as source:
+            width, height = source.size
+            if table_boxes is None or len(table_boxes) == 0:
+                regions = [[0, 0, width, height]]
+            else:
+                pad_x, pad_y = padding
+                regions = [
+                    [max(box[0]-pad_x, 0), max(box[1]-pad_y, 0), min(box[2]+pad_x, width), min(box[3]+pad_y, height)]
+                    for box in table_boxes
+                ]
 
-    def _process_multiple_tables(
-        self, 
-        ocr_data: List, 
-        table_boxes: np.ndarray
-    ) -> List[pd.DataFrame]:
-        """Process OCR results for multiple tables."""
-        result: Dict[int, List] = {}
+            tasks = []
+            for r, region in enumerate(regions):
+                size = (region[2] - region[0], region[3] - region[1])
+                tiles, cores = slice_tiles(*size, tile_size, overlap)
+                tasks.extend((r, region, size, tile, core) for tile, core in zip(tiles, cores))
+            detected = self._map(lambda task: self._read_tile(source, *task[1:]), tasks)
+            for det in detected:
+                if isinstance(det, Exception):
+                    raise det
+
+            quads = [[] for _ in regions]
+            rec = [[] for _ in regions]
+            for (r, *_), (tile_quads, tile_rec, _) in zip(tasks, detected):
+                quads[r].extend(tile_quads)
+                rec[r].extend(tile_rec)
+            seams = []
+            for r, region in enumerate(regions):
+                cut = [pieces for (t, *_), (_, _, pieces) in zip(tasks, detected) if t == r and len(pieces)]
+                if not cut:
+                    continue
+                pieces = np.concatenate(cut)
+                if quads[r]:
+                    # Drop pieces of lines another tile saw whole
+                    whole = np.asarray(quads[r], dtype=np.float64)
+                    whole = np.concatenate([whole.min(axis=1), whole.max(axis=1)], axis=1)
+                    pieces = pieces[(overlap_matrix(pieces, whole) <= 50).all(axis=1)]
+                seams.extend((r, box) for box in union_touching(pieces, min_shared_height=0.5).astype(int))
+
+            def recognize_seams(batch: list) -> List[tuple]:
+                return self._recognize_crops([
+                    source.read([regions[r][0] + x1, regions[r][1] + y1, regions[r][0] + x2, regions[r][1] + y2])
+                    for r, (x1, y1, x2, y2) in batch
+                ])
+
+            batches = [seams[i:i + self.SEAM_BATCH] for i in range(0, len(seams), self.SEAM_BATCH)]
+            for batch, batch_rec in zip(batches, self._map(recognize_seams, batches)):
+                if isinstance(batch_rec, Exception):
+                    raise batch_rec
+                for (r, (x1, y1, x2, y2)), result in zip(batch, batch_rec):
+                    quads[r].append(np.array([[x1, y1], [x2, y1], [x2, y2], [x1, y2]], dtype=np.float32))
+                    rec[r].append(result)
+
+            drop_score = self.handle.model.drop_score
+            outputs = []
+            for region_quads, region_rec in zip(quads, rec):
+                keep = [i for i, (_, score) in enumerate(region_rec) if score >= drop_score]
+                outputs.append(OCRWords.from_quads(
+                    [region_quads[i] for i in keep],
+                    [region_rec[i][0] for i in keep],
+                    [region_rec[i][1] for i in keep]
+                ))
+            return outputs
+
+    def _read_tile(
+        self,
+        source: TileSource,
+        region: Sequence[int],
+        size: tuple,
+        tile: Sequence[int],
+        core: Sequence[float]
+    ) -> tuple:
+        """
+        Detect and recognize the text lines of one tile of a region.
+        
+        Returns:
+            Quads and (text, score) pairs of the whole lines the tile owns,
+            and the boxes of lines cut by an inner tile edge, all in region
+            coordinates
+        """
+        image = source.read([region[0] + tile[0], region[1] + tile[1], region[0] + tile[2], region[1] + tile[3]])
+        line_boxes, line_crops = self._detect_lines(image)
+        del image
+        if not line_boxes:
+            return [], [], np.zeros((0, 4))
+        quads = np.asarray(line_boxes, dtype=np.float64) + [tile[0], tile[1]]
+        boxes = np.concatenate([quads.min(axis=1), quads.max(axis=1)], axis=1)
+        cut = cut_by_tile(boxes, tile, size)
+        keep = np.nonzero(~cut & owned_by(boxes, core))[0]
+        rec = self._recognize_crops([line_crops[i] for i in keep])
+        return [quads[i].astype(np.float32) for i in keep], rec, boxes[cut]
+
+    def recognize_cells(self, crops: Sequence[np.ndarray]) -> List[Optional[str]]:
+        """
+        Recognize single-line text crops without running text detection.
         
-        for item in ocr_data:
-            bbox = np.array(item[0]).astype(int)
-            word = item[1][0]
-            bbox = [bbox[:,0].min(), bbox[:,1].min(), bbox[:,0].max(), bbox[:,1].max()]
+        Used for the cells of tables whose grid is known, cropped line by line
+        from the ink bands of each cell. Crops of every table are recognized together,
+        split across the workers.
+        
+        Args:
+            crops: RGB crops, one text line each
             
-            for idx, table_box in enumerate(table_boxes):
-                if (bbox[0] >= table_box[0] and bbox[1] >= table_box[1] and 
-                    bbox[0] <= table_box[2] and bbox[1] <= table_box[3]):
-                    if idx not in result:
-                        result[idx] = []
-                    result[idx].append((word, bbox))
-                    
+        Returns:
+            Text of each crop, None where the recognition score is below the
+            model's drop_score
+        """
+        chunks = self._map(self._recognize_crops, self._split(list(crops)))
+        for chunk in chunks:
+            if isinstance(chunk, Exception):
+                raise chunk
+        drop_score = self.handle.model.drop_score
+        return [text if score >= drop_score else None for chunk in chunks for text, score in chunk]
+
+    @staticmethod
+    def crop_regions(
+        img_array: np.ndarray,
+        table_boxes: Optional[np.ndarray],
+        padding: tuple
+    ) -> List[np.ndarray]:
+        """Crop the image to each table box, or keep the whole page when there are none."""
+        if table_boxes is None or len(table_boxes) == 0:
+            return [img_array]
+        pad_x, pad_y = padding
         return [
-            pd.DataFrame(
-                sorted(table_data, key=lambda x: (x[1][1], x[1][0])),
-                columns=['text', 'boundingBox']
-            )
-            for table_data in result.values()
+            img_array[
+                max(box[1]-pad_y, 0):box[3]+pad_y,
+                max(box[0]-pad_x, 0):box[2]+pad_x
+            ]
+            for box in table_boxes
         ]
 
-    def _process_single_table(self, ocr_data: List) -> List[pd.DataFrame]:
-        """Process OCR results for a single table."""
-        processed_data = [
-            (item[1][0], [
-                np.array(item[0])[:,0].min(),
-                np.array(item[0])[:,1].min(),
-                np.array(item[0])[:,0].max(),
-                np.array(item[0])[:,1].max()
-            ])
-            for item in ocr_data
-        ]
-        
-        return [pd.DataFrame(
-            sorted(processed_data, key=lambda x: (x[1][1], x[1][0])),
-            columns=['text', 'boundingBox']
-        )]
\ No newline at end of file
+    def _map(self, fn: Callable, items: list) -> list:
+        """Apply fn to every item on up to `workers` threads, returning exceptions in place."""
+        def run(item):
+            try:
+                return fn(item)
+            except Exception as e:
+                return e
+
+        if self.workers == 1 or len(items) <= 1:
+            return [run(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(items))) as pool:
+            return list(pool.map(run, items))
+
+    def _split(self, items: list) -> List[list]:
+        """Split items into one contiguous chunk per worker."""
+        if not items:
+            return []
+        size = -(-len(items) // self.workers)
+        return [items[i:i + size] for i in range(0, len(items), size)]
+
+    def _detect_lines(self, region: np.ndarray) -> tuple:
+        """Detect text lines in a region, returning their boxes and rectified crops."""
+        from paddleocr.tools.infer.predict_system import sorted_boxes
+        from paddleocr.tools.infer.utility import get_rotate_crop_image
+
+        with self._acquire() as model, self.profiler.stage('ocr_det') as stage:
+            dt_boxes, _ = model.text_detector(region)
+            line_boxes = sorted_boxes(dt_boxes) if dt_boxes is not None and len(dt_boxes) else []
+            stage.count(regions=1, lines=len(line_boxes))
+        return line_boxes, [get_rotate_crop_image(region, copy.deepcopy(box)) for box in line_boxes]
+
+    def _recognize_crops(self, crops: List[np.ndarray]) -> List[tuple]:
+        """Run text recognition on text line crops, returning (text, score) pairs."""
+        if not crops:
+            return []
+        with self._acquire() as model, self.profiler.stage('ocr_rec') as stage:
+            rec_res, _ = model.text_recognizer(crops)
+            stage.count(crops=len(crops))
+        return rec_res
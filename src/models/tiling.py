@@ -0,0 +1,314 @@
+import contextlib
+import io
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+import cv2
+import numpy as np
+from PIL import Image
+from models.image_utils import ImageInput
+
+
+@dataclass(frozen=True)
+class TilingPolicy:
+    """
+    Overlapping tiles very large pages are processed in.
+
+    Attributes:
+        detect_tile_size: Side of the square tiles the table detector runs on
+        ocr_tile_size: Side of the square tiles text lines are detected in
+        overlap: Fraction of a tile shared with each neighbour; objects up to
+            overlap * tile size wide are seen whole by the tile that owns them
+    """
+    detect_tile_size: int = 1024
+    ocr_tile_size: int = 1280
+    overlap: float = 0.2
+
+
+class TileSource:
+    """
+    Reads regions of an image on demand.
+
+    Arrays, including np.memmap, are read through views, and so are
+    uncompressed images (BMP, PPM, uncompressed TIFF): their pixels are
+    memory-mapped from the file, or viewed in the encoded bytes, so only the
+    regions read are ever in memory. Compressed formats such as PNG, JPEG
+    and compressed TIFF cannot be decoded region by region; they are decoded
+    whole into PIL's buffer on the first read, so peak memory is that of the
+    page, but each region is only converted to RGB when read.
+
+    Close the source, or use it as a context manager, to release the image file.
+
+    Attributes:
+        size (Tuple[int, int]): (width, height) of the image
+    """
+
+    def __init__(self, image: ImageInput) -> None:
+        """
+        Open an image.
+
+        Args:
+            image: Path, encoded bytes, PIL image or RGB/grayscale array
+        """
+        self._array: Optional[np.ndarray] = None
+        self._pil: Optional[Image.Image] = None
+        self._owns_pil = False
+        if isinstance(image, np.ndarray):
+            self._array = image
+            self.size = (image.shape[1], image.shape[0])
+        elif isinstance(image, Image.Image):
+            self._pil = image
+            self.size = image.size
+        else:
+            encoded = io.BytesIO(image) if isinstance(image, (bytes, bytearray, memoryview)) else image
+            pil = Image.open(encoded)
+            self.size = pil.size
+            self._array = _raw_pixels(pil, image)
+            if self._array is None:
+                self._pil, self._owns_pil = pil, True
+            else:
+                pil.close()
+        self._lock = threading.Lock()
+        self._loaded = self._pil is None
+
+    def __enter__(self) -> 'TileSource':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the image file, or the decoded page; the source cannot be read afterwards."""
+        if self._owns_pil:
+            self._pil.close()
+        self._pil = None
+        self._array = None
+
+    def read(self, box: Sequence[int]) -> np.ndarray:
+        """
+        Read one region.
+
+        Args:
+            box: [x1, y1, x2, y2] in image pixels, clipped to the image
+
+        Returns:
+            RGB array of the region
+        """
+        width, height = self.size
+        x1, y1 = max(int(box[0]), 0), max(int(box[1]), 0)
+        x2, y2 = min(int(box[2]), width), min(int(box[3]), height)
+        if self._array is not None:
+            region = self._array[y1:y2, x1:x2]
+            if region.ndim == 2:
+                return np.repeat(region[..., None], 3, axis=2)
+            region = region[..., :3]
+            # Bottom-up and BGR files are mapped as reversed views, which OpenCV cannot take
+            return np.ascontiguousarray(region) if min(region.strides) < 0 else region
+        self._load()
+        region = self._pil.crop((x1, y1, x2, y2))
+        return np.asarray(region if region.mode == 'RGB' else region.convert('RGB'))
+
+    def thumbnail(self, max_side: int) -> Tuple[np.ndarray, float]:
+        """
+        Read the whole image downscaled so its longest side is at most max_side.
+
+        Returns:
+            The RGB array and its size relative to the image
+        """
+        width, height = self.size
+        scale = min(1.0, max_side / max(width, height))
+        size = (max(round(width * scale), 1), max(round(height * scale), 1))
+        if self._array is not None:
+            # Strided rows first, so a memmap is never read in full
+            step = max(int(1 / scale) // 2, 1)
+            sampled = np.ascontiguousarray(self._array[::step, ::step])
+            if sampled.ndim == 2:
+                sampled = np.repeat(sampled[..., None], 3, axis=2)
+            array = cv2.resize(sampled[..., :3], size, interpolation=cv2.INTER_AREA)
+        else:
+            self._load()
+            # Resize before converting, so no full-page RGB copy is made
+            img = self._pil if self._pil.mode in ('RGB', 'L') else self._pil.convert('RGB')
+            array = np.asarray(img.resize(size, Image.BILINEAR, reducing_gap=2.0).convert('RGB'))
+        return array, array.shape[1] / width
+
+    def _load(self) -> None:
+        # PIL decodes lazily and its load() is not thread-safe
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._pil.load()
+                    self._loaded = True
+
+
+def _raw_pixels(pil: Image.Image, image: ImageInput) -> Optional[np.ndarray]:
+    """
+    View the pixels of an uncompressed image where they are stored, without decoding it.
+
+    Args:
+        pil: The image opened by PIL, not yet loaded
+        image: The path or encoded bytes it was opened from
+
+    Returns:
+        A (H, W, 3) or (H, W) array mapping the file or viewing the bytes, or
+        None when the image is compressed or its layout is not supported
+    """
+    if not isinstance(image, (str, Path, bytes, bytearray, memoryview)):
+        return None
+    if len(pil.tile) != 1 or pil.mode not in ('RGB', 'L'):
+        return None
+    codec, extents, offset, args = pil.tile[0]
+    if codec != 'raw' or tuple(extents) != (0, 0, *pil.size):
+        return None
+    rawmode, stride, orientation = (args, 0, 1) if isinstance(args, str) else (tuple(args) + (0, 1))[:3]
+    channels = {'RGB': 3, 'BGR': 3, 'L': 1}.get(rawmode)
+    width, height = pil.size
+    if channels is None or channels != len(pil.mode) or (stride and stride < width * channels):
+        return None
+    stride = stride or width * channels
+    try:
+        if isinstance(image, (str, Path)):
+            data = np.memmap(image, dtype=np.uint8, mode='r', offset=offset, shape=(stride * height,))
+        else:
+            data = np.frombuffer(image, dtype=np.uint8, count=stride * height, offset=offset)
+    except (OSError, ValueError):
+        # Truncated files are left to PIL, which reports them when decoding
+        return None
+    pixels = data.reshape(height, stride)[:, :width * channels].reshape(height, width, channels)
+    if orientation < 0:
+        # Stored bottom-up
+        pixels = pixels[::-1]
+    if rawmode == 'BGR':
+        pixels = pixels[..., ::-1]
+    return pixels[..., 0] if channels == 1 else pixels
+
+
+@contextlib.contextmanager
+def open_source(image: Union[ImageInput, TileSource]) -> Iterator[TileSource]:
+    """TileSource of an image, closed on exit unless the caller passed in a TileSource."""
+    if isinstance(image, TileSource):
+        yield image
+        return
+    with TileSource(image) as source:
+        yield source
+
+
+
+def slice_tiles(
+    width: int,
+    height: int,
+    tile_size: int,
+    overlap: float
+) -> Tuple[List[List[int]], List[List[float]]]:
+    """
+    Cut an image into overlapping tiles and assign every pixel to one tile core.
+
+    Tile boxes come from sahi's slicer. The core of a tile is the part of it
+    closer to its centre than to any neighbour: cores meet halfway across
+    each overlap and extend to the image border, so they partition the image.
+
+    Args:
+        width: Image width
+        height: Image height
+        tile_size: Side of the square tiles
+        overlap: Fraction of a tile shared with each neighbour
+
+    Returns:
+        Tile boxes and core boxes, as [x1, y1, x2, y2] lists
+    """
+    from sahi.slicing import get_slice_bboxes
+
+    tile_w, tile_h = min(tile_size, width), min(tile_size, height)
+    tiles = get_slice_bboxes(
+        height, width,
+        slice_height=tile_h, slice_width=tile_w,
+        overlap_height_ratio=overlap, overlap_width_ratio=overlap
+    )
+    x_cuts = _core_cuts(sorted({(t[0], t[2]) for t in tiles}), width)
+    y_cuts = _core_cuts(sorted({(t[1], t[3]) for t in tiles}), height)
+    cores = [[*x_cuts[(t[0], t[2])], *y_cuts[(t[1], t[3])]] for t in tiles]
+    cores = [[x1, y1, x2, y2] for x1, x2, y1, y2 in cores]
+    return tiles, cores
+
+
+def _core_cuts(spans: List[Tuple[int, int]], length: int) -> dict:
+    """Core interval of each tile span along one axis."""
+    bounds = [0.0] + [(nxt[0] + cur[1]) / 2 for cur, nxt in zip(spans, spans[1:])] + [float(length)]
+    return {span: (bounds[i], bounds[i + 1]) for i, span in enumerate(spans)}
+
+
+def owned_by(boxes: np.ndarray, core: Sequence[float]) -> np.ndarray:
+    """Mask of the boxes whose centre lies in a tile core."""
+    cx = (boxes[:, 0] + boxes[:, 2]) / 2
+    cy = (boxes[:, 1] + boxes[:, 3]) / 2
+    return (cx >= core[0]) & (cx < core[2]) & (cy >= core[1]) & (cy < core[3])
+
+
+def cut_by_tile(
+    boxes: np.ndarray,
+    tile: Sequence[int],
+    size: Tuple[int, int],
+    margin: int = 2
+) -> np.ndarray:
+    """
+    Mask of the boxes that touch an inner edge of their tile.
+
+    Such boxes may continue in the neighbouring tile; edges on the image
+    border do not cut anything.
+    """
+    width, height = size
+    cut = np.zeros(len(boxes), dtype=bool)
+    if tile[0] > 0:
+        cut |= boxes[:, 0] <= tile[0] + margin
+    if tile[1] > 0:
+        cut |= boxes[:, 1] <= tile[1] + margin
+    if tile[2] < width:
+        cut |= boxes[:, 2] >= tile[2] - margin
+    if tile[3] < height:
+        cut |= boxes[:, 3] >= tile[3] - margin
+    return cut
+
+
+def union_touching(boxes: np.ndarray, min_shared_height: float = 0.0) -> np.ndarray:
+    """
+    Replace every group of intersecting boxes by their union.
+
+    Used for pieces of one object cut by tile seams, which overlap inside the
+    tiles' shared strips.
+
+    Args:
+        boxes: Array of shape (N, 4) with [x1, y1, x2, y2] rows
+        min_shared_height: Fraction of the shorter box's height two boxes must
+            share vertically to be joined, so that pieces of adjacent text
+            lines stay apart
+
+    Returns:
+        Array of shape (M, 4) with one box per group
+    """
+    if len(boxes) == 0:
+        return boxes.reshape(0, 4)
+    parent = list(range(len(boxes)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    ix1 = np.maximum(boxes[:, None, 0], boxes[None, :, 0])
+    iy1 = np.maximum(boxes[:, None, 1], boxes[None, :, 1])
+    ix2 = np.minimum(boxes[:, None, 2], boxes[None, :, 2])
+    iy2 = np.minimum(boxes[:, None, 3], boxes[None, :, 3])
+    heights = boxes[:, 3] - boxes[:, 1]
+    shared = (iy2 - iy1) > min_shared_height * np.minimum(heights[:, None], heights[None, :])
+    for i, j in zip(*np.nonzero((ix2 > ix1) & (iy2 > iy1) & shared)):
+        parent[find(i)] = find(j)
+
+    groups = {}
+    for i in range(len(boxes)):
+        groups.setdefault(find(i), []).append(i)
+    return np.array([
+        [boxes[g, 0].min(), boxes[g, 1].min(), boxes[g, 2].max(), boxes[g, 3].max()]
+        for g in map(np.array, groups.values())
+    ], dtype=boxes.dtype)
@@ -0,0 +1,81 @@
+"""
+Model state kept on disk so new processes reach their first inference quickly.
+
+A cold start repeats work whose result only depends on the model file and
+the runtime: ultralytics fuses every Conv+BatchNorm pair of the YOLO
+weights, and ONNX Runtime rewrites the graph with its fusions and constant
+folding when it creates a session. With warm start the result is saved once
+next to the source model and loaded as is by every later process:
+
+* <weights>.fused-torch<version>.pt, the fused YOLO checkpoint
+* <model>.ort<version>-<machine>.onnx, the graph as ONNX Runtime optimized it
+
+Like the ONNX export, a cached file is rebuilt when its source is newer and
+is moved into place atomically, so concurrent workers never read a partial
+file. The runtime version and machine are part of the names because fused
+and optimized state is only valid for the runtime and CPU that produced it.
+"""
+import logging
+import os
+import platform
+import tempfile
+from pathlib import Path
+from typing import Union
+
+logger = logging.getLogger(__name__)
+
+
+def is_fresh(cache_path: Path, source_path: Path) -> bool:
+    """Whether a cached file exists and is not older than the file it was built from."""
+    return cache_path.exists() and cache_path.stat().st_mtime >= source_path.stat().st_mtime
+
+
+def optimized_onnx_path(onnx_path: Union[str, Path]) -> Path:
+    """Path of the ONNX Runtime optimized graph of an ONNX model, for the installed runtime."""
+    import onnxruntime as ort
+
+    onnx_path = Path(onnx_path)
+    return onnx_path.with_name(f'{onnx_path.stem}.ort{ort.__version__}-{platform.machine()}.onnx')
+
+
+def fused_weights_path(model_path: Union[str, Path]) -> Path:
+    """Path of the fused checkpoint of YOLO weights, for the installed torch."""
+    import torch
+
+    model_path = Path(model_path)
+    return model_path.with_name(f'{model_path.stem}.fused-torch{torch.__version__}.pt')
+
+
+def load_fused_yolo(model_path: Union[str, Path]):
+    """
+    Load YOLO weights with their layers fused, from the fused checkpoint when it is fresh.
+
+    Otherwise the weights are loaded and fused, and the fused checkpoint is
+    written for the next process. A models directory that is not writable
+    only costs the warm start, the fused model is returned either way.
+
+    Args:
+        model_path: Path to the YOLO .pt weights
+
+    Returns:
+        The ultralytics YOLO model
+    """
+    import torch
+    from ultralytics import YOLO
+
+    model_path = Path(model_path)
+    fused_path = fused_weights_path(model_path)
+    if is_fresh(fused_path, model_path):
+        return YOLO(str(fused_path))
+
+    model = YOLO(str(model_path))
+    model.fuse()
+    try:
+        with tempfile.TemporaryDirectory(prefix='.fused-', dir=model_path.parent) as tmp:
+            saved = Path(tmp) / fused_path.name
+            # ultralytics restores the task and image size from the training arguments
+            torch.save({'model': model.model, 'train_args': model.ckpt.get('train_args', {})}, saved)
+            os.replace(saved, fused_path)
+    except OSError as e:
+        logger.warning('Could not save the fused detector to %s: %s', fused_path, e)
+    return model
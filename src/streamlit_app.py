@@ -1,36 +1,39 @@
 from table_creator.table_extractor import TableExtraction
+from models.registry import default_registry
+from models.image_utils import load_image
 import streamlit as st
 import base64
 from PIL import Image
-import os
 import cv2
 import numpy as np
-import tempfile
 import traceback
 
-# Load models only once
-if 'tab_ext' not in st.session_state:
-    st.session_state.tab_ext = TableExtraction()
+@st.cache_resource(show_spinner=False)
+def warm_up_models():
+    """Load the shared models once per process and run a warm-up inference."""
+    TableExtraction().warmup()
     print('Models loaded.')
+    return default_registry
+
 
+# Models are shared by every session through the registry
+registry = warm_up_models()
+if 'tab_ext' not in st.session_state:
+    st.session_state.tab_ext = TableExtraction(registry=registry)
 
-def process_image(imgpath):
-    return st.session_state.tab_ext.detect(imgpath)
+
+def process_image(image):
+    return st.session_state.tab_ext.detect(image)
 
 def draw_bounding_box(image, bbox):
     """Draw a bounding box on the image"""
     
-    
+    # The decoded buffer is shared with the extractor, draw on a private copy
     img_array = np.array(image)
-    if len(img_array.shape) == 3:
-        img_array = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
     
     x_min, y_min, x_max, y_max = bbox
     cv2.rectangle(img_array, (x_min, y_min), (x_max, y_max), (0, 255, 0), 2)
     
-    if len(img_array.shape) == 3:
-        img_array = cv2.cvtColor(img_array, cv2.COLOR_BGR2RGB)
-    
     return Image.fromarray(img_array)
 
 
@@ -291,6 +294,11 @@ with st.sidebar:
             </div>
         """, unsafe_allow_html=True)
     
+    # Resident model memory
+    with st.expander("🧠 Loaded Models"):
+        for entry in registry.memory_report():
+            st.markdown(f"`{entry['key'][0]}`: {entry['rss_mb']} MB, loaded in {entry['load_seconds']} s")
+
     # Support Info
     st.markdown('<h3 class="guide-subheader">🔗 Connect with Me</h3>', unsafe_allow_html=True)
     st.markdown("""
@@ -343,13 +351,10 @@ st.markdown('</div>', unsafe_allow_html=True)
 # Process the uploaded file
 if uploaded_file is not None:
     with st.spinner('🔄 Processing your image...'):
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as tmp_file:
-            tmp_file.write(uploaded_file.getvalue())
-            temp_path = tmp_file.name
-
         try:
-            image = Image.open(uploaded_file)
-            (raw_df, cleaned_df), bbox = process_image(temp_path)
+            # Decode the upload once and share the pixels with every stage
+            image = load_image(uploaded_file.getvalue())
+            (raw_df, cleaned_df), bbox = process_image(image)
             
             st.session_state.raw_data = raw_df
             st.session_state.processed_data = cleaned_df
@@ -467,9 +472,3 @@ if uploaded_file is not None:
 
         except Exception as e:
             st.error(f"❌ Error processing image: {str(traceback.format_exc())}")
-        
-        finally:
-            try:
-                os.unlink(temp_path)
-            except Exception as e:
-                st.warning(f"⚠️ Error removing temporary file: {str(e)}")
@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from copy import deepcopy
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+import numpy as np
+from PIL import Image
+
+
+class ResultCache:
+    """
+    Content-addressed cache for table extraction results.
+
+    Entries are keyed by the SHA-256 of the image bytes combined with the
+    parameters that influence the result, so a resubmitted scan is served
+    without running detection, OCR or structuring again.
+
+    Attributes:
+        max_entries (int): Capacity of the in-memory LRU tier
+        disk_dir (Optional[Path]): Directory of the on-disk tier, if enabled
+        max_disk_bytes (int): Size limit of the on-disk tier
+        hits (int): Number of lookups served from either tier
+        misses (int): Number of lookups not found in any tier
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 128,
+        disk_dir: Optional[Union[str, Path]] = None,
+        max_disk_bytes: int = 512 * 1024 * 1024
+    ) -> None:
+        """
+        Initialize the cache tiers.
+
+        Args:
+            max_entries: Number of results kept in memory
+            disk_dir: Directory for the on-disk tier, None to disable it
+            max_disk_bytes: Maximum total size of the on-disk tier in bytes
+        """
+        self.max_entries = max_entries
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(
+        image: Union[str, Path, bytes, Image.Image, np.ndarray],
+        params: Dict[str, Any]
+    ) -> str:
+        """
+        Build the cache key for an image and its effective parameters.
+
+        Paths and encoded bytes hash the file content, decoded images hash
+        their pixels together with their shape.
+
+        Args:
+            image: Path, encoded bytes, PIL image or pixel array
+            params: JSON-serializable parameters affecting the result
+
+        Returns:
+            Hex digest identifying the result
+        """
+        digest = hashlib.sha256()
+        if isinstance(image, (str, Path)):
+            with open(image, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+        elif isinstance(image, Image.Image):
+            digest.update(f'{image.mode}{image.size}'.encode())
+            digest.update(image.tobytes())
+        elif isinstance(image, np.ndarray):
+            digest.update(f'{image.dtype}{image.shape}'.encode())
+            digest.update(memoryview(np.ascontiguousarray(image)).cast('B'))
+        else:
+            digest.update(image)
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a result, promoting disk hits into memory.
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            A copy of the cached result or None on a miss
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return deepcopy(self._memory[key])
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, value)
+        return deepcopy(value)
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        Store a result in memory and, if enabled, on disk.
+
+        Args:
+            key: Cache key from make_key
+            value: Result to store
+        """
+        value = deepcopy(value)
+        with self._lock:
+            self._remember(key, value)
+        self._write_disk(key, value)
+
+    def clear(self) -> None:
+        """Drop all entries from both tiers and reset the counters."""
+        with self._lock:
+            self._memory.clear()
+            self.hits = self.misses = self.disk_hits = 0
+        if self.disk_dir is not None:
+            for path in self.disk_dir.glob('*.pkl'):
+                path.unlink(missing_ok=True)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current tier sizes."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'disk_hits': self.disk_hits,
+                'memory_entries': len(self._memory),
+                'disk_bytes': self._disk_usage()[0]
+            }
+
+    def _remember(self, key: str, value: Any) -> None:
+        """Insert into the memory tier and evict the least recently used entries."""
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f'{key}.pkl'
+
+    def _read_disk(self, key: str) -> Optional[Any]:
+        """Load an entry from the disk tier and refresh its access time."""
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            os.utime(path)
+            return value
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _write_disk(self, key: str, value: Any) -> None:
+        """Atomically write an entry to the disk tier and enforce the size limit."""
+        if self.disk_dir is None:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._disk_path(key))
+        except OSError:
+            Path(tmp_path).unlink(missing_ok=True)
+            return
+        self._evict_disk()
+
+    def _disk_usage(self) -> tuple:
+        """Return total size of the disk tier and its entries sorted oldest first."""
+        if self.disk_dir is None:
+            return 0, []
+        entries = []
+        for path in self.disk_dir.glob('*.pkl'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        return sum(size for _, size, _ in entries), entries
+
+    def _evict_disk(self) -> None:
+        """Remove least recently used files until the tier fits max_disk_bytes."""
+        total, entries = self._disk_usage()
+        for _, size, path in entries:
+            if total <= self.max_disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
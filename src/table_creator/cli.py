@@ -0,0 +1,608 @@
+"""
+Headless command line interface.
+
+    python -m table_creator extract <dir> --workers N -o tables.jsonl
+    python -m table_creator pdf statements.pdf --dpi 150 -o tables.jsonl
+    python -m table_creator serve --port 8080
+
+Images are extracted by a pool of worker processes, each loading the YOLO
+and PaddleOCR models once, and results are written as images finish. The
+pdf command renders and extracts the pages of one PDF in parallel through
+table_creator.pdf_input. The serve command runs the micro-batching HTTP
+service of table_creator.service.
+"""
+import argparse
+import contextlib
+import csv
+import json
+import logging
+import math
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, TextIO, Tuple
+from models.resolution import ResolutionPolicy
+from models.tiling import TilingPolicy
+from models.runtime_profile import PRESETS
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp')
+
+_THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+# Extractor of the current worker process, created once by _init_worker
+_extractor = None
+
+logger = logging.getLogger(__name__)
+
+
+def find_images(directory: Path, recursive: bool = False) -> List[Path]:
+    """
+    List the images in a directory in a stable order.
+
+    Args:
+        directory: Directory to search
+        recursive: Also search subdirectories
+
+    Returns:
+        Sorted image paths
+    """
+    pattern = '**/*' if recursive else '*'
+    return sorted(
+        path for path in directory.glob(pattern)
+        if path.is_file() and path.suffix.lower() in IMAGE_EXTENSIONS
+    )
+
+
+def _configure_logging(level: int) -> None:
+    """Send log records of this process to stderr, which never carries results."""
+    logging.basicConfig(stream=sys.stderr, format='%(asctime)s %(processName)s %(name)s %(levelname)s: %(message)s')
+    # Only this project's loggers, not those of the frameworks, follow --verbose
+    for name in ('models', 'table_creator'):
+        logging.getLogger(name).setLevel(level)
+
+
+@contextlib.contextmanager
+def _worker_threads(threads: int) -> Iterator[None]:
+    """
+    Set the thread counts of spawned workers, restoring the parent's environment after.
+
+    numpy and OpenCV size their thread pools when a worker imports them,
+    which happens while its initializer is unpickled, so the variables
+    must already be in the environment the worker is spawned with.
+    """
+    saved = {var: os.environ.get(var) for var in _THREAD_ENV_VARS}
+    for var in _THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    try:
+        yield
+    finally:
+        for var, value in saved.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+
+def _init_worker(
+    cache_dir: Optional[str],
+    profile: Optional[str] = None,
+    resolution: Optional[ResolutionPolicy] = None,
+    tiling: Optional[TilingPolicy] = None,
+    log_level: int = logging.WARNING,
+    warm_start: bool = False
+) -> None:
+    """Load and warm up the models once per worker process."""
+    global _extractor
+    # Keep model output off stdout, which may carry the results
+    sys.stdout = sys.stderr
+    _configure_logging(log_level)
+
+    from table_creator.table_extractor import TableExtraction
+    from table_creator.cache import ResultCache
+
+    cache = ResultCache(disk_dir=cache_dir) if cache_dir else None
+    _extractor = TableExtraction(
+        cache=cache, profile=profile, resolution=resolution, tiling=tiling, warm_start=warm_start
+    )
+    _extractor.warmup()
+
+
+def _failed_chunk(chunk: List[Tuple[int, str]], error: BaseException) -> List[Tuple[int, dict]]:
+    """(index, record) pairs reporting every image of a chunk whose worker failed."""
+    message = f'{type(error).__name__}: {error}'
+    return [(index, {'path': path, 'error': message, 'tables': []}) for index, path in chunk]
+
+
+def _extract_chunk(chunk: List[Tuple[int, str]], multi_table: bool, raw: bool) -> List[Tuple[int, dict]]:
+    """Extract a chunk of images in a worker and return (index, record) pairs."""
+    from table_creator.records import result_record
+
+    results = _extractor.detect_batch([path for _, path in chunk], batch_size=len(chunk), multi_table=multi_table)
+    return [
+        (index, {'path': path, **result_record(result, multi_table, raw)})
+        for (index, path), result in zip(chunk, results)
+    ]
+
+
+class ResultWriter:
+    """Base class for writers that append image records to an output."""
+
+    def write(self, record: dict) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    @staticmethod
+    def cells(record: dict) -> Iterator[dict]:
+        """Flatten a record to one row per cell, or one row for an image without cells."""
+        empty = True
+        for table in record['tables']:
+            for row_idx, row in enumerate(table['rows']):
+                for column, value in zip(table['columns'], row):
+                    empty = False
+                    yield {
+                        'path': record['path'], 'table': table['table'], 'row': row_idx,
+                        'column': column, 'value': value, 'error': None
+                    }
+        if empty:
+            yield {
+                'path': record['path'], 'table': None, 'row': None,
+                'column': None, 'value': None, 'error': record['error']
+            }
+
+
+class JsonlWriter(ResultWriter):
+    """Write one JSON object per image."""
+
+    def __init__(self, stream: TextIO) -> None:
+        self._stream = stream
+
+    def write(self, record: dict) -> None:
+        self._stream.write(json.dumps(record) + '\n')
+        self._stream.flush()
+
+    def close(self) -> None:
+        if self._stream is not sys.stdout:
+            self._stream.close()
+
+
+class CsvWriter(ResultWriter):
+    """Write one CSV row per table cell."""
+
+    FIELDS = ['path', 'table', 'row', 'column', 'value', 'error']
+
+    def __init__(self, stream: TextIO) -> None:
+        self._stream = stream
+        self._writer = csv.DictWriter(stream, fieldnames=self.FIELDS)
+        self._writer.writeheader()
+
+    def write(self, record: dict) -> None:
+        self._writer.writerows(self.cells(record))
+        self._stream.flush()
+
+    def close(self) -> None:
+        if self._stream is not sys.stdout:
+            self._stream.close()
+
+
+class ParquetWriter(ResultWriter):
+    """Write one Parquet row per table cell, flushing a row group every row_group_size cells."""
+
+    def __init__(self, path: Path, row_group_size: int = 10000) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema([
+            ('path', pa.string()), ('table', pa.int32()), ('row', pa.int32()),
+            ('column', pa.string()), ('value', pa.string()), ('error', pa.string())
+        ])
+        self._writer = pq.ParquetWriter(str(path), self._schema)
+        self._row_group_size = row_group_size
+        self._buffer: List[dict] = []
+
+    def write(self, record: dict) -> None:
+        self._buffer.extend(self.cells(record))
+        if len(self._buffer) >= self._row_group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._buffer:
+            self._writer.write_table(self._pa.Table.from_pylist(self._buffer, schema=self._schema))
+            self._buffer = []
+
+    def close(self) -> None:
+        self._flush()
+        self._writer.close()
+
+
+def open_writer(output: Optional[str], fmt: Optional[str]) -> ResultWriter:
+    """
+    Open a writer for the output path, inferring the format from its suffix.
+
+    Args:
+        output: Output file, stdout when None or '-'
+        fmt: One of 'jsonl', 'csv' or 'parquet'; inferred when None
+
+    Returns:
+        The result writer
+    """
+    if fmt is None:
+        suffix = Path(output).suffix.lower() if output and output != '-' else ''
+        fmt = {'.csv': 'csv', '.parquet': 'parquet', '.pq': 'parquet'}.get(suffix, 'jsonl')
+    if fmt == 'parquet':
+        if not output or output == '-':
+            raise ValueError('Parquet output needs an output file')
+        return ParquetWriter(Path(output))
+
+    stream = sys.stdout if not output or output == '-' else open(output, 'w', newline='', encoding='utf-8')
+    return CsvWriter(stream) if fmt == 'csv' else JsonlWriter(stream)
+
+
+def run_extract(
+    images: Sequence[Path],
+    writer: ResultWriter,
+    workers: int = 1,
+    batch_size: int = 4,
+    ordered: bool = True,
+    multi_table: bool = False,
+    raw: bool = False,
+    cache_dir: Optional[str] = None,
+    profile: Optional[str] = None,
+    resolution: Optional[ResolutionPolicy] = None,
+    tiling: Optional[TilingPolicy] = None,
+    log_level: int = logging.WARNING,
+    warm_start: bool = False
+) -> Dict[str, int]:
+    """
+    Extract tables from images in a process pool, writing records as they finish.
+
+    At most two chunks per worker are in flight and, in order, a chunk is
+    only submitted once every image more than that many chunks before it has
+    been written, so the records waiting for a slow image are bounded too
+    and memory stays bounded for any number of images.
+
+    A chunk whose extraction raises gets an error record per image and the
+    run goes on. When a worker dies, the pool is restarted and the chunks
+    that were in flight are rerun one at a time, so only the chunk that
+    kills a worker again is reported failed. If the workers of a new pool
+    cannot start, every remaining image is reported failed.
+
+    Args:
+        images: Image paths
+        writer: Destination of the per-image records
+        workers: Number of worker processes
+        batch_size: Number of images sent to a worker at a time
+        ordered: Write records in input order instead of completion order
+        multi_table: Extract every table of each image instead of the largest
+        raw: Write the raw tables instead of the post-processed ones
+        cache_dir: Directory of a result cache shared by the workers
+        profile: Runtime profile preset of the workers' models
+        resolution: Resolution policy of the workers, None for full resolution
+        tiling: Tiling policy of the workers, None to process whole pages
+        log_level: Logging level of the workers
+        warm_start: Load the detector from the fused state kept on disk,
+            written by the first worker that finds none
+
+    Returns:
+        Counts of processed and failed images
+    """
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    chunks = [
+        [(i, str(path)) for i, path in enumerate(images[start:start + batch_size], start)]
+        for start in range(0, len(images), batch_size)
+    ]
+    stats = {'images': 0, 'failed': 0}
+    pending_records: Dict[int, dict] = {}
+    next_index = 0
+
+    def emit(index: int, record: dict) -> None:
+        nonlocal next_index
+        stats['images'] += 1
+        stats['failed'] += record['error'] is not None
+        if not ordered:
+            writer.write(record)
+            return
+        pending_records[index] = record
+        while next_index in pending_records:
+            writer.write(pending_records.pop(next_index))
+            next_index += 1
+
+    # Images that may be extracted or waiting to be written in order at once
+    window = 2 * workers * batch_size
+    todo = deque(chunks)
+    # Chunks in flight when a worker died, rerun one at a time to find the one that killed it
+    suspects: deque = deque()
+
+    def fail_all(error: BaseException) -> None:
+        for chunk in [*suspects, *todo]:
+            for index, record in _failed_chunk(chunk, error):
+                emit(index, record)
+        suspects.clear()
+        todo.clear()
+
+    def settle(future, chunk: List[Tuple[int, str]], isolated: bool) -> Optional[BrokenProcessPool]:
+        """Write the records of a finished chunk; one lost with its worker is retried unless it ran alone."""
+        broken = None
+        try:
+            results = future.result()
+        except BrokenProcessPool as e:
+            broken = e
+            if not isolated:
+                # Any chunk in flight may have been the one running in the dead worker
+                suspects.append(chunk)
+                return broken
+            logger.error('Worker died on %d images from %s: %s', len(chunk), chunk[0][1], e)
+            results = _failed_chunk(chunk, e)
+        except Exception as e:
+            logger.error('Worker failed on %d images from %s: %s', len(chunk), chunk[0][1], e)
+            results = _failed_chunk(chunk, e)
+        for index, record in results:
+            emit(index, record)
+        return broken
+
+    def run_pool(pool: ProcessPoolExecutor) -> Optional[BrokenProcessPool]:
+        """Run chunks until none are left or a worker dies, returning the error it died with."""
+        in_flight: Dict = {}
+        broken = None
+        while broken is None:
+            isolated = bool(suspects)
+            while len(in_flight) < (1 if isolated else 2 * workers) and (suspects or todo):
+                source = suspects if suspects else todo
+                if ordered and source[0][0][0] >= next_index + window:
+                    break
+                chunk = source.popleft()
+                try:
+                    in_flight[pool.submit(_extract_chunk, chunk, multi_table, raw)] = chunk
+                except BrokenProcessPool as e:
+                    source.appendleft(chunk)
+                    broken = e
+                    break
+            if broken is not None or not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                broken = settle(future, in_flight.pop(future), isolated) or broken
+        # The chunks still in flight finish or fail with the pool
+        for future in wait(in_flight).done:
+            settle(future, in_flight.pop(future), False)
+        retry = sorted(suspects)
+        suspects.clear()
+        suspects.extend(retry)
+        return broken
+
+    # Spawned workers start without the parent's framework state; their thread counts come from the environment
+    with _worker_threads(threads):
+        while todo or suspects:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(cache_dir, profile, resolution, tiling, log_level, warm_start)
+            ) as pool:
+                try:
+                    # Workers that cannot even start would die on every chunk
+                    pool.submit(os.getpid).result()
+                except BrokenProcessPool as e:
+                    logger.error('Worker processes failed to start: %s', e)
+                    fail_all(e)
+                    break
+                broken = run_pool(pool)
+            if broken is not None:
+                logger.warning('A worker died, restarting the pool to retry %d chunks', len(suspects))
+    return stats
+
+
+def run_pdf(
+    path: Path,
+    writer: ResultWriter,
+    dpi: float = 150,
+    window: int = 8,
+    render_workers: int = 2,
+    ocr_workers: int = 1,
+    multi_table: bool = False,
+    raw: bool = False,
+    profile: Optional[str] = None
+) -> Dict[str, int]:
+    """
+    Extract tables from every page of a PDF, writing one record per page.
+
+    Records carry the page number, and the path as <pdf>#page=<n>; each table
+    also gets its bbox as fractions of the page size.
+
+    Args:
+        path: PDF file
+        writer: Destination of the per-page records
+        dpi: Render resolution
+        window: Most pages rendered or being extracted at once
+        render_workers: Render processes, capped at window
+        ocr_workers: OCR model replicas and OCR pipeline threads
+        multi_table: Extract every table of each page instead of the largest
+        raw: Write the raw tables instead of the post-processed ones
+        profile: Runtime profile preset of the models
+
+    Returns:
+        Counts of processed and failed pages
+    """
+    from table_creator.pdf_input import extract_pdf
+    from table_creator.records import result_record
+    from table_creator.table_extractor import TableExtraction
+
+    stats = {'images': 0, 'failed': 0}
+    # Keep model output off stdout, which may carry the results
+    with contextlib.redirect_stdout(sys.stderr):
+        extractor = TableExtraction(ocr_workers=ocr_workers, profile=profile)
+        pages = extract_pdf(
+            path, extractor, dpi=dpi, multi_table=multi_table, window=window,
+            render_workers=render_workers, threads={'ocr': ocr_workers}
+        )
+        for page in pages:
+            record = {'path': f'{path}#page={page.page}', 'page': page.page, **result_record(page.result, multi_table, raw)}
+            for table in record['tables']:
+                table['bbox_normalized'] = page.boxes[table['table']] if table['table'] < len(page.boxes) else None
+            writer.write(record)
+            stats['images'] += 1
+            stats['failed'] += record['error'] is not None
+    return stats
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser of the command line interface."""
+    parser = argparse.ArgumentParser(prog='python -m table_creator', description='Extract tables from images.')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Log debug messages, such as raw detections, to stderr')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    extract = commands.add_parser('extract', help='Extract the tables of every image in a directory')
+    extract.add_argument('directory', type=Path, help='Directory of images')
+    extract.add_argument('-o', '--output', help='Output file (.jsonl, .csv or .parquet); JSONL on stdout by default')
+    extract.add_argument('--format', choices=['jsonl', 'csv', 'parquet'], help='Output format, inferred from the output suffix by default')
+    extract.add_argument('--workers', type=int, default=1, help='Number of worker processes')
+    extract.add_argument('--batch-size', type=int, default=4, help='Images sent to a worker at a time')
+    extract.add_argument('--unordered', action='store_true', help='Write results as they finish instead of in input order')
+    extract.add_argument('--recursive', action='store_true', help='Also search subdirectories')
+    extract.add_argument('--multi-table', action='store_true', help='Extract every table of each image')
+    extract.add_argument('--raw', action='store_true', help='Write raw tables instead of post-processed ones')
+    extract.add_argument('--cache-dir', help='Directory of a result cache shared by the workers')
+    extract.add_argument('--profile', choices=sorted(PRESETS), help='Runtime profile preset of the models')
+    extract.add_argument('--detect-max-side', type=int, help='Detect tables on a copy downscaled to this longest side')
+    extract.add_argument('--ocr-text-height', type=float, help='Rescale OCR to this estimated character height in pixels')
+    extract.add_argument('--tiled', action='store_true', help='Process very large images in overlapping tiles read on demand')
+    extract.add_argument('--tile-overlap', type=float, default=0.2, help='Fraction of a tile shared with each neighbour')
+    extract.add_argument('--warm-start', action='store_true', help='Keep the fused detector on disk so workers start faster')
+
+    pdf = commands.add_parser('pdf', help='Extract the tables of every page of a PDF')
+    pdf.add_argument('path', type=Path, help='PDF file')
+    pdf.add_argument('-o', '--output', help='Output file (.jsonl, .csv or .parquet); JSONL on stdout by default')
+    pdf.add_argument('--format', choices=['jsonl', 'csv', 'parquet'], help='Output format, inferred from the output suffix by default')
+    pdf.add_argument('--dpi', type=float, default=150, help='Page render resolution')
+    pdf.add_argument('--window', type=int, default=8, help='Most pages rendered or being extracted at once')
+    pdf.add_argument('--render-workers', type=int, default=2, help='Page render processes, at most --window of them')
+    pdf.add_argument('--ocr-workers', type=int, default=1, help='Number of OCR model replicas')
+    pdf.add_argument('--multi-table', action='store_true', help='Extract every table of each page')
+    pdf.add_argument('--raw', action='store_true', help='Write raw tables instead of post-processed ones')
+    pdf.add_argument('--profile', choices=sorted(PRESETS), help='Runtime profile preset of the models')
+
+    serve = commands.add_parser('serve', help='Run a local HTTP extraction service with micro-batching')
+    serve.add_argument('--host', default='127.0.0.1', help='Interface to listen on')
+    serve.add_argument('--port', type=int, default=8080, help='Port to listen on')
+    serve.add_argument('--max-batch-size', type=int, default=8, help='Largest number of requests per batch')
+    serve.add_argument('--max-wait-ms', type=float, default=10, help='Time a request waits for others to join its batch')
+    serve.add_argument('--ocr-workers', type=int, default=1, help='Number of OCR model replicas')
+    serve.add_argument('--profile', choices=sorted(PRESETS), help='Runtime profile preset of the models')
+
+    quantize = commands.add_parser('quantize', help='Produce INT8 models and check them against fp32')
+    quantize.add_argument('reference_dir', type=Path, help='Directory of reference document images')
+    quantize.add_argument('--calibration-images', type=int, default=32, help='Reference images used for calibration')
+    quantize.add_argument('--min-iou', type=float, default=0.9, help='Smallest allowed per-image table IoU against fp32')
+    quantize.add_argument('--min-text-similarity', type=float, default=0.97, help='Smallest allowed per-table text similarity against fp32')
+    quantize.add_argument('--skip-detector', action='store_true', help='Leave the table detector in fp32')
+    quantize.add_argument('--skip-ocr', action='store_true', help='Leave the OCR models in fp32')
+    quantize.add_argument('--keep-failed', action='store_true', help='Keep artifacts that fail the accuracy check')
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the command line interface and return the exit code."""
+    args = build_parser().parse_args(argv)
+    log_level = logging.DEBUG if args.verbose else logging.WARNING
+    _configure_logging(log_level)
+    if args.command == 'serve':
+        from table_creator.service import serve
+
+        # The service logs where it listens
+        logging.getLogger('table_creator.service').setLevel(min(log_level, logging.INFO))
+        serve(args.host, args.port, args.max_batch_size, args.max_wait_ms / 1000, args.ocr_workers, args.profile)
+        return 0
+    if args.command == 'quantize':
+        from models.quantization import run_quantization
+
+        report = run_quantization(
+            args.reference_dir,
+            calibration_images=args.calibration_images,
+            detector=not args.skip_detector,
+            ocr=not args.skip_ocr,
+            min_iou=args.min_iou,
+            min_text_similarity=args.min_text_similarity,
+            keep_failed=args.keep_failed
+        )
+        print(json.dumps(report, indent=2))
+        return 0 if report.get('detector_passed', True) and report.get('ocr_passed', True) else 1
+
+    if args.command == 'pdf':
+        if not args.path.is_file():
+            print(f'Not a file: {args.path}', file=sys.stderr)
+            return 2
+        if args.window < 1 or args.render_workers < 0:
+            print('--window must be at least 1 and --render-workers at least 0', file=sys.stderr)
+            return 2
+        writer = open_writer(args.output, args.format)
+        start = time.perf_counter()
+        try:
+            stats = run_pdf(
+                args.path, writer,
+                dpi=args.dpi,
+                window=args.window,
+                render_workers=args.render_workers,
+                ocr_workers=args.ocr_workers,
+                multi_table=args.multi_table,
+                raw=args.raw,
+                profile=args.profile
+            )
+        finally:
+            writer.close()
+        print(
+            f"Processed {stats['images']} pages ({stats['failed']} failed) in {time.perf_counter() - start:.1f}s",
+            file=sys.stderr
+        )
+        return 1 if stats['failed'] else 0
+
+    if not args.directory.is_dir():
+        print(f'Not a directory: {args.directory}', file=sys.stderr)
+        return 2
+    if args.workers < 1 or args.batch_size < 1:
+        print('--workers and --batch-size must be at least 1', file=sys.stderr)
+        return 2
+
+    resolution = None
+    if args.detect_max_side is not None or args.ocr_text_height is not None:
+        resolution = ResolutionPolicy(detect_max_side=args.detect_max_side, ocr_text_height=args.ocr_text_height)
+    if args.tiled and resolution is not None:
+        print('--tiled cannot be combined with --detect-max-side or --ocr-text-height', file=sys.stderr)
+        return 2
+    tiling = TilingPolicy(overlap=args.tile_overlap) if args.tiled else None
+
+    images = find_images(args.directory, args.recursive)
+    # No more workers than chunks
+    workers = min(args.workers, max(1, math.ceil(len(images) / args.batch_size)))
+    writer = open_writer(args.output, args.format)
+    start = time.perf_counter()
+    try:
+        stats = run_extract(
+            images, writer,
+            workers=workers,
+            batch_size=args.batch_size,
+            ordered=not args.unordered,
+            multi_table=args.multi_table,
+            raw=args.raw,
+            cache_dir=args.cache_dir,
+            profile=args.profile,
+            resolution=resolution,
+            tiling=tiling,
+            log_level=log_level,
+            warm_start=args.warm_start
+        )
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - start
+    print(
+        f"Processed {stats['images']} images ({stats['failed']} failed) in {elapsed:.1f}s "
+        f"with {workers} workers",
+        file=sys.stderr
+    )
+    return 1 if stats['failed'] else 0
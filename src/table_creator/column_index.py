@@ -0,0 +1,87 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+
+class ColumnIndex:
+    """
+    Index of column x-extents for first-match word-to-column lookups.
+
+    Columns are kept in a list sorted by their left edge. A lookup bisects
+    to the columns whose left edge lies between the word's left edge less
+    the widest column and its right edge, sorts them by insertion order and
+    tests them in turn, returning the earliest inserted column that matches,
+    which is the column a linear scan over the columns in insertion order
+    would have returned.
+
+    This is not a logarithmic interval tree: a lookup costs O(log n + k log k)
+    for k candidates, and k approaches n once one column is as wide as the
+    table, while adding or moving a column shifts the list in O(n). Tables
+    have tens of columns, where the bisected list beats a tree, and words
+    mostly fall within one column width, where k stays small.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty index."""
+        self._entries: List[Tuple[float, int, Hashable]] = []
+        self._boxes: Dict[Hashable, Sequence[float]] = {}
+        self._order: Dict[Hashable, int] = {}
+        self._max_width = 0
+
+    def __len__(self) -> int:
+        return len(self._boxes)
+
+    def add(self, key: Hashable, bbox: Sequence[float]) -> None:
+        """
+        Add a column after all existing ones.
+
+        Args:
+            key: Column name
+            bbox: Column bounding box [x1, y1, x2, y2]
+        """
+        self._order[key] = len(self._order)
+        self._insert(key, bbox)
+
+    def update(self, key: Hashable, bbox: Sequence[float]) -> None:
+        """
+        Replace the extent of a column, keeping its insertion order.
+
+        Args:
+            key: Column name
+            bbox: New column bounding box [x1, y1, x2, y2]
+        """
+        old = self._boxes[key]
+        pos = bisect_left(self._entries, (old[0], self._order[key]))
+        del self._entries[pos]
+        self._insert(key, bbox)
+
+    def find(
+        self,
+        word_bb: Sequence[float],
+        matches: Callable[[Sequence[float]], bool]
+    ) -> Optional[Hashable]:
+        """
+        Find the earliest inserted column matching a word.
+
+        Only columns whose left edge lies within the widest column's width
+        left of the word are tested, so matches must reject columns whose
+        x-extent does not strictly intersect the word, as any positive
+        overlap threshold does.
+
+        Args:
+            word_bb: Word bounding box [x1, y1, x2, y2]
+            matches: Predicate called with a candidate column bounding box
+
+        Returns:
+            Key of the matching column or None
+        """
+        lo = bisect_right(self._entries, (word_bb[0] - self._max_width, float('inf')))
+        hi = bisect_left(self._entries, (word_bb[2], -1))
+        for _, _, key in sorted(self._entries[lo:hi], key=lambda entry: entry[1]):
+            if matches(self._boxes[key]):
+                return key
+        return None
+
+    def _insert(self, key: Hashable, bbox: Sequence[float]) -> None:
+        self._boxes[key] = bbox
+        self._max_width = max(self._max_width, bbox[2] - bbox[0])
+        insort(self._entries, (bbox[0], self._order[key], key))
@@ -1,7 +1,11 @@
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
 import pandas as pd
 import numpy as np
+from models.box_utils import calculate_overlap, overlap_matrix
+from models.ocr_words import OCRWords
+
+ColumnWords = Union[pd.DataFrame, OCRWords]
 
 @dataclass
 class TableCell:
@@ -13,6 +17,8 @@ class TableCell:
         bbox: Bounding box coordinates [x1, y1, x2, y2]
         column_name: Name of the column this cell belongs to
     """
+    __slots__ = ('value', 'bbox', 'column_name')
+
     value: str
     bbox: List[int]
     column_name: str
@@ -29,6 +35,8 @@ class TableRow:
         min_y: Minimum y coordinate of the row
         max_y: Maximum y coordinate of the row
     """
+    __slots__ = ('cells', 'min_x', 'max_x', 'min_y', 'max_y')
+
     cells: Dict[str, TableCell]
     min_x: float
     max_x: float
@@ -37,8 +45,18 @@ class TableRow:
 
 class TableStructure:
     """
-    Maintains the structure of a table using a linked list representation.
+    Maintains the structure of a table as rows aligned across columns.
+    
+    Rows are stored column-wise: parallel lists of row extents indexed by row
+    id, one row-to-cell mapping per column and the table order as a list of
+    row ids, which is rebuilt once per column instead of inserting into it.
+    A cell is the index of a word in its column's input, so texts and boxes
+    are shared with the input rather than copied per cell; TableRow and
+    TableCell objects are only created when rows are requested.
     """
+
+    # Rows checked one by one before falling back to a vectorized scan
+    _SCAN_AHEAD = 4
     
     def __init__(self, debug: bool = False) -> None:
         """
@@ -47,15 +65,45 @@ class TableStructure:
         Args:
             debug: Enable debug logging
         """
-        self.rows: List[TableRow] = []
         self.debug = debug
+        self._reset()
+
+    def _reset(self) -> None:
+        """Drop all rows."""
+        self._order: List[int] = []
+        self._min_x: List[float] = []
+        self._max_x: List[float] = []
+        self._min_y: List[float] = []
+        self._max_y: List[float] = []
+        self._cells: Dict[str, Dict[int, int]] = {}
+        self._words: Dict[str, Tuple[List[str], Sequence]] = {}
+
+    @property
+    def rows(self) -> List[TableRow]:
+        """Rows in table order, materialized as TableRow objects."""
+        rows = []
+        for rid in self._order:
+            cells = {
+                col: TableCell(*self._cell(col, col_cells[rid]), col)
+                for col, col_cells in self._cells.items()
+                if rid in col_cells
+            }
+            rows.append(TableRow(
+                cells=cells,
+                min_x=self._min_x[rid],
+                max_x=self._max_x[rid],
+                min_y=self._min_y[rid],
+                max_y=self._max_y[rid]
+            ))
+        return rows
 
-    def build_structure(self, dataframes: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    def build_structure(self, dataframes: Dict[str, ColumnWords]) -> pd.DataFrame:
         """
         Build table structure from column-wise dataframes.
         
         Args:
-            dataframes: Dictionary of column name to DataFrame containing text and positions
+            dataframes: Dictionary of column name to the column's words, as a
+                DataFrame containing text and positions or as OCRWords
             
         Returns:
             DataFrame with structured table data
@@ -63,6 +111,8 @@ class TableStructure:
         if not dataframes:
             return pd.DataFrame()
 
+        self._reset()
+
         # Initialize with first column
         first_col = list(dataframes.keys())[0]
         self._initialize_rows(first_col, dataframes[first_col])
@@ -73,105 +123,156 @@ class TableStructure:
             
         return self._to_dataframe(dataframes.keys())
 
-    def _initialize_rows(self, column_name: str, df: pd.DataFrame) -> None:
+    def _cell(self, column_name: str, index: int) -> Tuple[str, List[int]]:
+        """Text and bounding box of the index-th word of a column."""
+        texts, boxes = self._words[column_name]
+        bbox = boxes[index]
+        return texts[index], (bbox.tolist() if isinstance(bbox, np.ndarray) else bbox)
+
+    def _add_column(self, column_name: str, words: ColumnWords) -> Iterator[Tuple[int, List[int]]]:
+        """Register a column's words and iterate over their (index, bbox)."""
+        if isinstance(words, pd.DataFrame):
+            texts, boxes = list(words['text']), list(words['boundingBox'])
+            bbox_list = boxes
+        else:
+            texts, boxes = words.texts, words.boxes
+            bbox_list = boxes.tolist()
+        self._words[column_name] = (texts, boxes)
+        self._cells.setdefault(column_name, {})
+        return enumerate(bbox_list)
+
+    def _initialize_rows(self, column_name: str, df: ColumnWords) -> None:
         """Initialize rows with the first column's data."""
-        for _, row in df.iterrows():
-            bbox = row['boundingBox']
-            self.rows.append(TableRow(
-                cells={column_name: TableCell(row['text'], bbox, column_name)},
-                min_x=bbox[0],
-                max_x=bbox[2],
-                min_y=bbox[1],
-                max_y=bbox[3]
-            ))
+        cells = self._cells.setdefault(column_name, {})
+        for index, bbox in self._add_column(column_name, df):
+            rid = self._new_row(bbox)
+            cells[rid] = index
+            self._order.append(rid)
 
-    def _process_column(self, column_name: str, df: pd.DataFrame) -> None:
-        """Process additional columns and align with existing rows."""
-        search_idx = 0
+    def _process_column(self, column_name: str, df: ColumnWords) -> None:
+        """
+        Process additional columns and align with existing rows.
         
-        for _, row in df.iterrows():
-            text = row['text']
-            bbox = row['boundingBox']
-            
-            matched = False
-            for idx, table_row in enumerate(self.rows[search_idx:], search_idx):
-                overlap = self._calculate_overlap(
-                    bbox,
-                    [bbox[0], table_row.min_y, bbox[2], table_row.max_y]
-                )
-                
-                if overlap > 10:
-                    self._update_row(idx, column_name, text, bbox)
-                    search_idx = idx + 1
-                    matched = True
-                    break
-                elif bbox[3] <= table_row.min_y:
-                    self._insert_row(idx, column_name, text, bbox)
-                    search_idx = idx + 1
-                    matched = True
-                    break
-                
-            if not matched and bbox[1] >= self.rows[-1].max_y:
-                self._append_row(column_name, text, bbox)
-
-    def _calculate_overlap(self, rect1: List[int], rect2: List[int]) -> float:
-        """Calculate percentage overlap between two rectangles."""
-        x_left = max(rect1[0], rect2[0])
-        y_top = max(rect1[1], rect2[1])
-        x_right = min(rect1[2], rect2[2])
-        y_bottom = min(rect1[3], rect2[3])
-
-        if x_right < x_left or y_bottom < y_top:
-            return 0.0
-
-        intersection = (x_right - x_left) * (y_bottom - y_top)
-        min_area = min(
-            (rect1[2] - rect1[0]) * (rect1[3] - rect1[1]),
-            (rect2[2] - rect2[0]) * (rect2[3] - rect2[1])
-        )
+        The column's cells are swept top to bottom against the current rows.
+        A cell updates the first row at or after the previous match that it
+        overlaps vertically, is inserted before the first row lying entirely
+        below it, or is appended after the last row when it lies below it.
+        """
+        order = self._order
+        n_rows = len(order)
+        min_y = [self._min_y[rid] for rid in order]
+        max_y = [self._max_y[rid] for rid in order]
+        arrays = (np.asarray(min_y), np.asarray(max_y))
+        tail: List[int] = []
+        tail_min_y: List[float] = []
+        tail_max_y: List[float] = []
+        inserted: Dict[int, List[int]] = {}
+        words = self._add_column(column_name, df)
+        cells = self._cells[column_name]
+
+        search_idx = 0
+        for index, bbox in words:
+            match = None
+            if search_idx < n_rows:
+                match = self._find_row(bbox, search_idx, min_y, max_y, arrays)
+            if match is None and tail:
+                match = self._find_row(bbox, max(search_idx - n_rows, 0), tail_min_y, tail_max_y)
+                if match is not None:
+                    match = (match[0] + n_rows, match[1])
+
+            if match is None:
+                last_max_y = tail_max_y[-1] if tail else (max_y[-1] if n_rows else None)
+                if last_max_y is None or bbox[1] >= last_max_y:
+                    rid = self._new_row(bbox)
+                    cells[rid] = index
+                    tail.append(rid)
+                    tail_min_y.append(bbox[1])
+                    tail_max_y.append(bbox[3])
+                continue
+
+            idx, overlaps = match
+            if overlaps:
+                rid = order[idx] if idx < n_rows else tail[idx - n_rows]
+                cells[rid] = index
+                self._min_x[rid] = min(self._min_x[rid], bbox[0])
+                self._max_x[rid] = max(self._max_x[rid], bbox[2])
+                search_idx = idx + 1
+            else:
+                rid = self._new_row(bbox)
+                cells[rid] = index
+                inserted.setdefault(idx, []).append(rid)
+                search_idx = idx
+
+        if not inserted:
+            self._order = order + tail
+            return
+        new_order = []
+        for idx, rid in enumerate(order + tail):
+            new_order.extend(inserted.get(idx, ()))
+            new_order.append(rid)
+        self._order = new_order
+
+    def _find_row(
+        self,
+        bbox: List[int],
+        start: int,
+        min_y: List[float],
+        max_y: List[float],
+        arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None
+    ) -> Optional[Tuple[int, bool]]:
+        """
+        Find the first row at or after start that a cell overlaps or lies above.
         
-        return (intersection / min_area * 100) if min_area > 0 else 0
-
-    def _update_row(self, idx: int, column_name: str, text: str, bbox: List[int]) -> None:
-        """Update existing row with new cell data."""
-        self.rows[idx].cells[column_name] = TableCell(text, bbox, column_name)
-        self.rows[idx].min_x = min(self.rows[idx].min_x, bbox[0])
-        self.rows[idx].max_x = max(self.rows[idx].max_x, bbox[2])
-
-    def _insert_row(self, idx: int, column_name: str, text: str, bbox: List[int]) -> None:
-        """Insert new row at specified index."""
-        self.rows.insert(idx, TableRow(
-            cells={column_name: TableCell(text, bbox, column_name)},
-            min_x=bbox[0],
-            max_x=bbox[2],
-            min_y=bbox[1],
-            max_y=bbox[3]
-        ))
-
-    def _append_row(self, column_name: str, text: str, bbox: List[int]) -> None:
-        """Append new row at the end."""
-        self.rows.append(TableRow(
-            cells={column_name: TableCell(text, bbox, column_name)},
-            min_x=bbox[0],
-            max_x=bbox[2],
-            min_y=bbox[1],
-            max_y=bbox[3]
-        ))
+        Returns:
+            (row position, whether the cell overlaps the row) or None
+        """
+        stop = min(start + self._SCAN_AHEAD, len(min_y))
+        for idx in range(start, stop):
+            if self._calculate_overlap(bbox, [bbox[0], min_y[idx], bbox[2], max_y[idx]]) > 10:
+                return idx, True
+            if bbox[3] <= min_y[idx]:
+                return idx, False
+        if stop == len(min_y):
+            return None
+
+        if arrays is None:
+            row_min_y, row_max_y = np.asarray(min_y[stop:]), np.asarray(max_y[stop:])
+        else:
+            row_min_y, row_max_y = arrays[0][stop:], arrays[1][stop:]
+        row_boxes = np.empty((len(row_min_y), 4), dtype=np.result_type(row_min_y, np.asarray(bbox)))
+        row_boxes[:, 0] = bbox[0]
+        row_boxes[:, 1] = row_min_y
+        row_boxes[:, 2] = bbox[2]
+        row_boxes[:, 3] = row_max_y
+        overlaps = overlap_matrix(np.asarray([bbox], dtype=row_boxes.dtype), row_boxes)[0] > 10
+        hits = np.flatnonzero(overlaps | (bbox[3] <= row_min_y))
+        if len(hits) == 0:
+            return None
+        return stop + int(hits[0]), bool(overlaps[hits[0]])
+
+    _calculate_overlap = staticmethod(calculate_overlap)
+
+    def _new_row(self, bbox: List[int]) -> int:
+        """Create a row spanning bbox and return its id."""
+        self._min_x.append(bbox[0])
+        self._max_x.append(bbox[2])
+        self._min_y.append(bbox[1])
+        self._max_y.append(bbox[3])
+        return len(self._min_x) - 1
 
     def _to_dataframe(self, columns: List[str]) -> pd.DataFrame:
-        """Convert table structure to DataFrame."""
-        data = []
-        for row in self.rows:
-            row_data = {
-                col: row.cells[col].value if col in row.cells else None
-                for col in columns
-            }
-            row_data.update({
-                'row_min_x': row.min_x,
-                'row_max_x': row.max_x,
-                'row_min_y': row.min_y,
-                'row_max_y': row.max_y
-            })
-            data.append(row_data)
-            
-        return pd.DataFrame(data)
\ No newline at end of file
+        """Convert table structure to DataFrame, one column at a time."""
+        if not self._order:
+            return pd.DataFrame()
+
+        order = self._order
+        data = {}
+        for col in columns:
+            cells = self._cells.get(col, {})
+            texts = self._words[col][0] if col in self._words else []
+            data[col] = [texts[cells[rid]] if rid in cells else None for rid in order]
+        data['row_min_x'] = [self._min_x[rid] for rid in order]
+        data['row_max_x'] = [self._max_x[rid] for rid in order]
+        data['row_min_y'] = [self._min_y[rid] for rid in order]
+        data['row_max_y'] = [self._max_y[rid] for rid in order]
+        return pd.DataFrame(data)
@@ -0,0 +1,305 @@
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+import cv2
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class TableGrid:
+    """
+    Cell grid of a bordered table, built from its ruling lines.
+
+    Attributes:
+        rows: (top, bottom) pixel band of each horizontal ruling line, top to bottom
+        cols: (left, right) pixel band of each vertical ruling line, left to right
+        cells: One [x1, y1, x2, y2] box per cell, inside the ruling lines;
+            a cell spanning several grid positions appears once
+        positions: (row, col) of the top-left grid position of each cell
+        spans: (row_span, col_span) of each cell
+        empty: Whether each cell holds no ink and needs no recognition
+        text_boxes: [x1, y1, x2, y2] extent of the ink of each cell, padded by
+            a few pixels; the whole cell for an empty one
+        line_boxes: [x1, y1, x2, y2] extent of each text line of each cell,
+            top to bottom, padded like text_boxes; none for an empty cell
+    """
+    rows: List[Tuple[int, int]]
+    cols: List[Tuple[int, int]]
+    cells: List[List[int]]
+    positions: List[Tuple[int, int]]
+    spans: List[Tuple[int, int]]
+    empty: List[bool]
+    text_boxes: List[List[int]]
+    line_boxes: List[List[List[int]]]
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """Number of grid rows and columns."""
+        return len(self.rows) - 1, len(self.cols) - 1
+
+    def to_dataframe(self, texts: Sequence[Optional[str]]) -> pd.DataFrame:
+        """
+        Lay out cell texts on the grid.
+
+        A spanning cell's text goes to its top-left position and the other
+        positions it covers stay empty. The first row names the columns, as
+        the header words do in TableStructure output.
+
+        Args:
+            texts: Text of each cell, None for an empty cell
+
+        Returns:
+            DataFrame with one row per grid row, including the header row
+        """
+        n_rows, n_cols = self.shape
+        grid: List[List[Optional[str]]] = [[None] * n_cols for _ in range(n_rows)]
+        for (row, col), text in zip(self.positions, texts):
+            grid[row][col] = text
+        header = [text if text is not None else '' for text in grid[0]]
+        return pd.DataFrame(grid, columns=header)
+
+
+class GridDetector:
+    """
+    Finds the ruling-line grid of a bordered table with OpenCV morphology.
+
+    Horizontal and vertical lines are isolated by opening the binarized crop
+    with long thin kernels, located by projecting each line mask onto its
+    axis, and accepted as a grid only when they cross where a lattice would.
+
+    Attributes:
+        line_scale (int): Kernel length as a fraction of the crop size, 1/line_scale
+        min_coverage (float): Fraction of the crop a projection must cover to count as a line
+        min_intersections (float): Fraction of expected line crossings that must be present
+        max_outside_ink (float): Largest fraction of the text allowed outside the outer lines
+    """
+
+    def __init__(
+        self,
+        line_scale: int = 20,
+        min_coverage: float = 0.5,
+        min_intersections: float = 0.85,
+        max_outside_ink: float = 0.05,
+        min_rows: int = 2,
+        min_cols: int = 2
+    ) -> None:
+        """
+        Initialize the detector.
+
+        Args:
+            line_scale: Kernel length as a fraction of the crop size, 1/line_scale
+            min_coverage: Fraction of the crop width (height) a horizontal
+                (vertical) line mask must cover to count as a ruling line
+            min_intersections: Fraction of expected line crossings that must be present
+            max_outside_ink: Largest fraction of the text ink allowed outside the
+                outer ruling lines; more means the grid is open or cut off
+            min_rows: Fewest grid rows accepted as a table
+            min_cols: Fewest grid columns accepted as a table
+        """
+        self.line_scale = line_scale
+        self.min_coverage = min_coverage
+        self.min_intersections = min_intersections
+        self.max_outside_ink = max_outside_ink
+        self.min_rows = min_rows
+        self.min_cols = min_cols
+
+    def find_grid(self, image: np.ndarray) -> Optional[TableGrid]:
+        """
+        Find the cell grid of a table crop.
+
+        Args:
+            image: RGB or grayscale table crop
+
+        Returns:
+            The grid, or None if the crop has no complete ruling-line grid
+        """
+        if image.ndim == 3:
+            image = cv2.cvtColor(np.ascontiguousarray(image), cv2.COLOR_RGB2GRAY)
+        h, w = image.shape[:2]
+        if h < 16 or w < 16:
+            return None
+        binary = cv2.adaptiveThreshold(~image, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, 15, -2)
+
+        horizontal = cv2.morphologyEx(
+            binary, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (max(w // self.line_scale, 10), 1))
+        )
+        vertical = cv2.morphologyEx(
+            binary, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (1, max(h // self.line_scale, 10)))
+        )
+        rows = self._line_bands(np.count_nonzero(horizontal, axis=1) >= self.min_coverage * w)
+        cols = self._line_bands(np.count_nonzero(vertical, axis=0) >= self.min_coverage * h)
+        if len(rows) < self.min_rows + 1 or len(cols) < self.min_cols + 1:
+            return None
+        if self._intersection_rate(horizontal, vertical, rows, cols) < self.min_intersections:
+            return None
+
+        lines = cv2.dilate(cv2.bitwise_or(horizontal, vertical), np.ones((3, 3), np.uint8))
+        text = cv2.bitwise_and(binary, cv2.bitwise_not(lines))
+        ink = cv2.integral(text // 255)
+        inside = self._ink(ink, cols[0][0], rows[0][0], cols[-1][1] + 1, rows[-1][1] + 1)
+        if ink[-1, -1] - inside > self.max_outside_ink * max(ink[-1, -1], 1):
+            # Text outside the outer ruling lines means the grid is open or cut off
+            return None
+        return self._build_cells(rows, cols, horizontal, vertical, binary, text, ink)
+
+    @staticmethod
+    def _ink(ink: np.ndarray, x1: int, y1: int, x2: int, y2: int) -> int:
+        """Ink pixels in [x1, x2) x [y1, y2) from the integral image of the text mask."""
+        if x2 <= x1 or y2 <= y1:
+            return 0
+        return int(ink[y2, x2] - ink[y1, x2] - ink[y2, x1] + ink[y1, x1])
+
+    @staticmethod
+    def _line_bands(mask: np.ndarray) -> List[Tuple[int, int]]:
+        """Group consecutive True positions of a projection into (start, end) bands."""
+        padded = np.concatenate([[False], mask, [False]]).astype(np.int8)
+        edges = np.flatnonzero(np.diff(padded))
+        return [(int(start), int(end) - 1) for start, end in zip(edges[::2], edges[1::2])]
+
+    @staticmethod
+    def _intersection_rate(
+        horizontal: np.ndarray,
+        vertical: np.ndarray,
+        rows: List[Tuple[int, int]],
+        cols: List[Tuple[int, int]]
+    ) -> float:
+        """Fraction of (row line, column line) crossings where both masks are present."""
+        crossings = cv2.bitwise_and(
+            cv2.dilate(horizontal, np.ones((5, 5), np.uint8)), cv2.dilate(vertical, np.ones((5, 5), np.uint8))
+        )
+        ys = np.array([(a + b) // 2 for a, b in rows])
+        xs = np.array([(a + b) // 2 for a, b in cols])
+        return float(np.count_nonzero(crossings[ys[:, None], xs[None, :]])) / (len(ys) * len(xs))
+
+    def _build_cells(
+        self,
+        rows: List[Tuple[int, int]],
+        cols: List[Tuple[int, int]],
+        horizontal: np.ndarray,
+        vertical: np.ndarray,
+        binary: np.ndarray,
+        text: np.ndarray,
+        ink: np.ndarray
+    ) -> TableGrid:
+        """Cut the grid into cells, merging positions whose separating line is missing."""
+        n_rows, n_cols = len(rows) - 1, len(cols) - 1
+        # Per-pixel presence of each inner ruling line, then its coverage of each grid span
+        v_present = np.stack([vertical[:, a:b + 1].any(axis=1) for a, b in cols[1:-1]]) if n_cols > 1 else None
+        h_present = np.stack([horizontal[a:b + 1, :].any(axis=0) for a, b in rows[1:-1]]) if n_rows > 1 else None
+
+        parent = list(range(n_rows * n_cols))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for r in range(n_rows):
+            top, bottom = rows[r][1] + 1, rows[r + 1][0]
+            for c in range(n_cols - 1):
+                if bottom > top and v_present[c, top:bottom].mean() < 0.5:
+                    parent[find(r * n_cols + c + 1)] = find(r * n_cols + c)
+        for c in range(n_cols):
+            left, right = cols[c][1] + 1, cols[c + 1][0]
+            for r in range(n_rows - 1):
+                if right > left and h_present[r, left:right].mean() < 0.5:
+                    parent[find((r + 1) * n_cols + c)] = find(r * n_cols + c)
+
+        groups = {}
+        for i in range(n_rows * n_cols):
+            groups.setdefault(find(i), []).append(i)
+
+        cells, positions, spans, empty, text_boxes, line_boxes = [], [], [], [], [], []
+        for members in sorted(groups.values(), key=min):
+            r0, c0 = divmod(min(members), n_cols)
+            r1 = max(i // n_cols for i in members)
+            c1 = max(i % n_cols for i in members)
+            x1, y1 = cols[c0][1] + 1, rows[r0][1] + 1
+            x2, y2 = cols[c1 + 1][0], rows[r1 + 1][0]
+            ink_pixels = self._ink(ink, x1, y1, x2, y2)
+            cells.append([x1, y1, x2, y2])
+            positions.append((r0, c0))
+            spans.append((r1 - r0 + 1, c1 - c0 + 1))
+            is_empty = bool(ink_pixels < max(8, 0.002 * (x2 - x1) * (y2 - y1)))
+            empty.append(is_empty)
+            text_boxes.append([x1, y1, x2, y2] if is_empty else self._text_box(text, x1, y1, x2, y2))
+            line_boxes.append([] if is_empty else self._line_boxes(binary, x1, y1, x2, y2))
+        return TableGrid(
+            rows=rows, cols=cols, cells=cells, positions=positions, spans=spans, empty=empty,
+            text_boxes=text_boxes, line_boxes=line_boxes
+        )
+
+    @staticmethod
+    def _text_box(text: np.ndarray, x1: int, y1: int, x2: int, y2: int, pad: int = 3) -> List[int]:
+        """Ink extent of a cell, so recognition is not given mostly blank space."""
+        region = text[y1:y2, x1:x2]
+        ys = np.flatnonzero(region.any(axis=1))
+        xs = np.flatnonzero(region.any(axis=0))
+        return [
+            max(x1, x1 + int(xs[0]) - pad), max(y1, y1 + int(ys[0]) - pad),
+            min(x2, x1 + int(xs[-1]) + 1 + pad), min(y2, y1 + int(ys[-1]) + 1 + pad)
+        ]
+
+    @classmethod
+    def _line_boxes(
+        cls,
+        binary: np.ndarray,
+        x1: int,
+        y1: int,
+        x2: int,
+        y2: int,
+        pad: int = 3,
+        margin: int = 2,
+        min_height: float = 0.35
+    ) -> List[List[int]]:
+        """
+        Ink extent of each text line of a cell, for the single-line recognizer.
+
+        Lines are the ink bands of the cell's row profile. A band shorter than
+        min_height of the tallest one, such as the dots of an i or an accent
+        line, belongs to the nearest band rather than being a line. The
+        profile is taken from the binarized crop rather than the text mask,
+        whose line masks also take out the stems of tall glyphs, leaving
+        blank rows inside a line; the border pixels of the cell, next to its
+        ruling lines, are left out instead.
+
+        Args:
+            binary: Binarized table crop
+            x1, y1, x2, y2: The cell, inside its ruling lines
+            pad: Pixels added around each line, within the cell
+            margin: Border pixels of the cell left out of the profile
+            min_height: Shortest line as a fraction of the tallest band
+
+        Returns:
+            One [x1, y1, x2, y2] box per line, top to bottom
+        """
+        region = np.zeros((y2 - y1, x2 - x1), dtype=bool)
+        region[margin:-margin, margin:-margin] = binary[y1 + margin:y2 - margin, x1 + margin:x2 - margin] > 0
+        bands = [list(band) for band in cls._line_bands(region.any(axis=1))]
+        if not bands:
+            return [[x1, y1, x2, y2]]
+        tallest = max(end - start + 1 for start, end in bands)
+        i = 0
+        while len(bands) > 1 and i < len(bands):
+            start, end = bands[i]
+            if end - start + 1 >= min_height * tallest:
+                i += 1
+                continue
+            gap_above = start - bands[i - 1][1] if i > 0 else np.inf
+            gap_below = bands[i + 1][0] - end if i + 1 < len(bands) else np.inf
+            if gap_above <= gap_below:
+                bands[i - 1][1] = end
+            else:
+                bands[i + 1][0] = start
+            del bands[i]
+            i = max(i - 1, 0)
+
+        boxes = []
+        for start, end in bands:
+            xs = np.flatnonzero(region[start:end + 1].any(axis=0))
+            boxes.append([
+                max(x1, x1 + int(xs[0]) - pad), max(y1, y1 + start - pad),
+                min(x2, x1 + int(xs[-1]) + 1 + pad), min(y2, y1 + end + 1 + pad)
+            ])
+        return boxes
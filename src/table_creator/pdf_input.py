@@ -0,0 +1,237 @@
+"""
+PDF input with lazy, page-parallel rendering.
+
+    for page in extract_pdf('statements.pdf', dpi=150, window=8):
+        print(page.page, page.boxes, page.result.ok)
+
+Pages are rendered with PyMuPDF only when the extraction pipeline has room
+for them, by a pool of render processes each holding its own copy of the
+document. Rendered pages flow through a PipelineExecutor, so rendering,
+detection, OCR and structuring of different pages overlap. At most `window`
+pages are rendered or being extracted at any time, which bounds peak memory
+independently of the page count.
+"""
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import numpy as np
+from table_creator.pipeline import PipelineExecutor
+from table_creator.table_extractor import ExtractionResult, TableExtraction
+
+# Document of the current render process, opened once by _open_document
+_document = None
+
+
+def _open_document(path: str) -> None:
+    global _document
+    import fitz
+
+    _document = fitz.open(path)
+
+
+def _render_page(document, index: int, dpi: float) -> np.ndarray:
+    """Render a 0-based page to an RGB array."""
+    import fitz
+
+    zoom = dpi / 72
+    pix = document.load_page(index).get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csRGB, alpha=False)
+    rows = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)
+    return rows[:, :pix.width * 3].reshape(pix.height, pix.width, 3)
+
+
+def _render_in_worker(index: int, dpi: float) -> np.ndarray:
+    return _render_page(_document, index, dpi)
+
+
+@dataclass
+class PdfPageResult:
+    """
+    Extraction result of one PDF page.
+
+    Attributes:
+        page: 1-based page number
+        size: (width, height) of the rendered page in pixels
+        result: Tables of the page, with boxes in rendered pixels
+        boxes: Table boxes as [x1, y1, x2, y2] fractions of the page size,
+            in the order of result.cords
+    """
+    page: int
+    size: Tuple[int, int]
+    result: ExtractionResult
+    boxes: List[List[float]] = field(default_factory=list)
+
+
+class PdfRenderer:
+    """
+    Renders the pages of a PDF in worker processes, a few pages ahead of the consumer.
+
+    Attributes:
+        path (Path): PDF file
+        dpi (float): Render resolution
+        workers (int): Render processes; 0 renders on the calling thread
+    """
+
+    def __init__(self, path: Union[str, Path], dpi: float = 150, workers: int = 2) -> None:
+        """
+        Initialize the renderer.
+
+        Args:
+            path: PDF file
+            dpi: Render resolution in dots per inch
+            workers: Render processes; 0 renders on the calling thread
+        """
+        self.path = Path(path)
+        self.dpi = dpi
+        self.workers = max(int(workers), 0)
+
+    @property
+    def page_count(self) -> int:
+        """Number of pages of the document."""
+        import fitz
+
+        with fitz.open(str(self.path)) as document:
+            return document.page_count
+
+    def render(
+        self,
+        pages: Iterable[int],
+        slots: Optional[threading.Semaphore] = None,
+        stop: Optional[threading.Event] = None
+    ) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Render pages lazily, in order.
+
+        Args:
+            pages: 1-based page numbers
+            slots: Acquired once per page before it is rendered; the consumer
+                releases it when done with the page, which bounds the pages alive
+            stop: Ends rendering early once set
+
+        Returns:
+            Iterator over (page number, RGB array) pairs; a page that fails
+            to render comes with the raised exception instead of an array
+        """
+        if self.workers == 0:
+            import fitz
+
+            with fitz.open(str(self.path)) as document:
+                for page in pages:
+                    if not self._acquire(slots, stop):
+                        return
+                    try:
+                        image = _render_page(document, page - 1, self.dpi)
+                    except Exception as e:
+                        image = e
+                    yield page, image
+            return
+
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=get_context('spawn'),
+            initializer=_open_document,
+            initargs=(str(self.path),)
+        )
+        pending = deque()
+        try:
+            for page in pages:
+                # Yield before reserving another slot, so the renders held
+                # here never take every slot of the window
+                while len(pending) >= self.workers:
+                    yield self._result(*pending.popleft())
+                if not self._acquire(slots, stop):
+                    return
+                pending.append((page, pool.submit(_render_in_worker, page - 1, self.dpi)))
+            while pending:
+                yield self._result(*pending.popleft())
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    @staticmethod
+    def _result(page: int, future) -> Tuple[int, Union[np.ndarray, Exception]]:
+        try:
+            return page, future.result()
+        except Exception as e:
+            return page, e
+
+    @staticmethod
+    def _acquire(slots: Optional[threading.Semaphore], stop: Optional[threading.Event]) -> bool:
+        if slots is not None:
+            slots.acquire()
+        return stop is None or not stop.is_set()
+
+
+def extract_pdf(
+    path: Union[str, Path],
+    extractor: Optional[TableExtraction] = None,
+    dpi: float = 150,
+    pages: Optional[Iterable[int]] = None,
+    multi_table: bool = False,
+    window: int = 8,
+    render_workers: int = 2,
+    threads: Optional[Dict[str, int]] = None
+) -> Iterator[PdfPageResult]:
+    """
+    Extract the tables of a PDF page by page.
+
+    Args:
+        path: PDF file
+        extractor: Extractor whose models and cache are used
+        dpi: Render resolution in dots per inch
+        pages: 1-based page numbers to extract, every page by default
+        multi_table: Extract every table of each page instead of the largest
+        window: Most pages rendered or being extracted at once
+        render_workers: Render processes; 0 renders on the pipeline's feeder
+            thread. At most window pages are rendered at once, so more
+            processes than window are never started
+        threads: Threads per pipeline stage, as for PipelineExecutor
+
+    Returns:
+        Iterator over one PdfPageResult per page, in page order; a page that
+        fails to render or extract has the error in its result
+    """
+    window = max(int(window), 1)
+    # Every render in flight holds a window slot until it is handed on
+    renderer = PdfRenderer(path, dpi, min(max(int(render_workers), 0), window))
+    page_numbers = list(pages) if pages is not None else list(range(1, renderer.page_count + 1))
+    executor = PipelineExecutor(extractor, threads=threads, queue_size=window, multi_table=multi_table)
+    slots = threading.Semaphore(window)
+    stop = threading.Event()
+    # (position, page, size) of pages fed to the pipeline, in order, and
+    # (position, result) of pages that failed to render
+    fed: deque = deque()
+    failed: deque = deque()
+
+    def images() -> Iterator[np.ndarray]:
+        for position, (page, image) in enumerate(renderer.render(page_numbers, slots, stop)):
+            if isinstance(image, Exception):
+                failed.append((position, PdfPageResult(page=page, size=(0, 0), result=ExtractionResult(error=image))))
+                slots.release()
+                continue
+            fed.append((position, page, (image.shape[1], image.shape[0])))
+            yield image
+
+    results = executor.run(images(), ordered=True)
+    try:
+        for result in results:
+            if not fed:
+                # The page stream itself failed
+                raise result.error
+            position, page, size = fed.popleft()
+            while failed and failed[0][0] < position:
+                yield failed.popleft()[1]
+            boxes = []
+            if result.ok and result.cords is not None:
+                boxes = executor.extractor._get_normalized_bounding_box(size, result.cords).values.tolist()
+            slots.release()
+            yield PdfPageResult(page=page, size=size, result=result, boxes=boxes)
+        while failed:
+            yield failed.popleft()[1]
+    finally:
+        # Wake a renderer waiting for a slot so the pipeline can shut down
+        stop.set()
+        slots.release(window)
+        results.close()
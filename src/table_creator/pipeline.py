@@ -0,0 +1,327 @@
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from models.image_utils import ImageInput
+from models.resolution import ScaledPage
+from models.tiling import TileSource
+from table_creator.table_extractor import ExtractionResult, TableExtraction
+
+# Marks the end of the input on a stage queue
+_DONE = object()
+
+
+@dataclass
+class StageStats:
+    """
+    Counters of one pipeline stage.
+
+    Attributes:
+        name: Stage name
+        threads: Number of threads running the stage
+        processed: Items the stage ran on
+        failed: Items whose stage function raised
+        busy_seconds: Time spent running the stage function, summed over threads
+        starved_seconds: Time spent waiting for input, summed over threads
+        blocked_seconds: Time spent waiting for room in the next queue, summed over threads
+        max_queue_depth: Largest number of items seen waiting in the stage's input queue
+    """
+    name: str
+    threads: int
+    processed: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0
+    starved_seconds: float = 0.0
+    blocked_seconds: float = 0.0
+    max_queue_depth: int = 0
+
+
+class _Stage:
+    """Threads applying one function to the items of a queue."""
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable,
+        threads: int,
+        inbox: queue.Queue,
+        outbox: queue.Queue,
+        stop: threading.Event
+    ) -> None:
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+        self.stats = StageStats(name=name, threads=threads)
+        self._stop = stop
+        self._lock = threading.Lock()
+        self._running = threads
+        self._threads = [
+            threading.Thread(target=self._work, name=f'pipeline-{name}-{i}', daemon=True)
+            for i in range(threads)
+        ]
+
+    def start(self) -> None:
+        for thread in self._threads:
+            thread.start()
+
+    def join(self) -> None:
+        for thread in self._threads:
+            thread.join()
+
+    def _work(self) -> None:
+        while True:
+            start = time.perf_counter()
+            item = _get(self.inbox, self._stop)
+            waited = time.perf_counter() - start
+            if item is None:
+                return
+            if item is _DONE:
+                self._finish(waited)
+                return
+
+            seq, payload = item
+            start = time.perf_counter()
+            failed = False
+            if not isinstance(payload, ExtractionResult):
+                # Finished items, errors and cache hits, pass through untouched
+                try:
+                    payload = self.fn(payload)
+                except Exception as e:
+                    payload = ExtractionResult(error=e)
+                    failed = True
+            busy = time.perf_counter() - start
+
+            start = time.perf_counter()
+            if not _put(self.outbox, (seq, payload), self._stop):
+                return
+            blocked = time.perf_counter() - start
+
+            with self._lock:
+                stats = self.stats
+                stats.processed += 1
+                stats.failed += failed
+                stats.busy_seconds += busy
+                stats.starved_seconds += waited
+                stats.blocked_seconds += blocked
+                stats.max_queue_depth = max(stats.max_queue_depth, self.inbox.qsize() + 1)
+
+    def _finish(self, waited: float) -> None:
+        """Let sibling threads see the end of input; the last one forwards it downstream."""
+        with self._lock:
+            self.stats.starved_seconds += waited
+            self._running -= 1
+            last = self._running == 0
+        if last:
+            _put(self.outbox, _DONE, self._stop)
+        else:
+            _put(self.inbox, _DONE, self._stop)
+
+
+def _get(q: queue.Queue, stop: threading.Event):
+    """Take an item from q, or return None once stop is set."""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return None
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    """Put item on q, returning False if stop was set first."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _acquire(slots: threading.Semaphore, stop: threading.Event) -> bool:
+    """Take one of the slots, returning False if stop was set first."""
+    while not stop.is_set():
+        if slots.acquire(timeout=0.1):
+            return True
+    return False
+
+
+def _close(page) -> None:
+    """Release the image file of a page opened for tiled reads."""
+    if isinstance(page, TileSource):
+        page.close()
+
+
+class PipelineExecutor:
+    """
+    Runs TableExtraction as a pipeline of concurrent stages.
+
+    Images flow through decode, detect, ocr and structure stages connected by
+    bounded queues, so image N+1 is decoded and detected while image N is in
+    OCR and image N-1 is being structured. Each stage runs on its own threads;
+    a full queue blocks the stage feeding it, which bounds memory and shows
+    up as blocked time in the stage statistics.
+
+    Attributes:
+        threads (Dict[str, int]): Number of threads per stage
+        queue_size (int): Capacity of each queue between stages
+    """
+
+    STAGES = ('decode', 'detect', 'ocr', 'structure')
+
+    def __init__(
+        self,
+        extractor: Optional[TableExtraction] = None,
+        threads: Optional[Dict[str, int]] = None,
+        queue_size: int = 4,
+        multi_table: bool = False
+    ) -> None:
+        """
+        Initialize the executor.
+
+        Args:
+            extractor: Extractor whose models and cache are used
+            threads: Threads per stage, keyed by stage name; unlisted stages get one.
+                More OCR threads only help when the extractor has as many OCR workers.
+            queue_size: Capacity of each queue between stages
+            multi_table: Extract every detected table, as for TableExtraction.detect
+        """
+        unknown = set(threads or {}) - set(self.STAGES)
+        if unknown:
+            raise ValueError(f"Unknown pipeline stages: {sorted(unknown)}")
+        self.extractor = extractor or TableExtraction()
+        self.threads = {name: max(int((threads or {}).get(name, 1)), 1) for name in self.STAGES}
+        self.queue_size = max(int(queue_size), 1)
+        self.multi_table = multi_table
+        self._stages: List[_Stage] = []
+
+    def stats(self) -> Dict[str, StageStats]:
+        """Counters of each stage of the current or last run, by stage name."""
+        return {stage.stats.name: stage.stats for stage in self._stages}
+
+    def run(self, images: Iterable[ImageInput], ordered: bool = True) -> Iterator[ExtractionResult]:
+        """
+        Extract tables from a stream of images.
+
+        The input iterable is consumed lazily, only as fast as the pipeline has
+        room. A failing image does not stop the stream, its error is reported
+        in its result instead. In order, results finished ahead of a slow
+        image wait for it, so a new image is only taken while fewer than
+        every queue and thread can hold are between it and the next result
+        due; memory stays bounded either way.
+
+        Args:
+            images: Image paths, encoded bytes, PIL images or RGB arrays
+            ordered: Yield results in input order instead of completion order
+
+        Returns:
+            Iterator over one ExtractionResult per image
+        """
+        stop = threading.Event()
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.STAGES) + 1)]
+        functions = {
+            'decode': self._decode,
+            'detect': self._detect,
+            'ocr': self._ocr,
+            'structure': self._structure
+        }
+        self._stages = [
+            _Stage(name, functions[name], self.threads[name], queues[i], queues[i + 1], stop)
+            for i, name in enumerate(self.STAGES)
+        ]
+        # In order, at most as many images as the stages hold at once are between the feeder and the next result due
+        window = self.queue_size * len(queues) + sum(self.threads.values())
+        admission = threading.Semaphore(window) if ordered else None
+        feeder = threading.Thread(target=self._feed, args=(images, queues[0], stop, admission), daemon=True)
+        for stage in self._stages:
+            stage.start()
+        feeder.start()
+
+        try:
+            pending: Dict[int, ExtractionResult] = {}
+            next_seq = 0
+            while True:
+                item = queues[-1].get()
+                if item is _DONE:
+                    break
+                seq, result = item
+                if not ordered:
+                    yield result
+                    continue
+                pending[seq] = result
+                while next_seq in pending:
+                    result = pending.pop(next_seq)
+                    next_seq += 1
+                    admission.release()
+                    yield result
+        finally:
+            # Also reached when the consumer stops early
+            stop.set()
+            feeder.join()
+            for stage in self._stages:
+                stage.join()
+
+    def _feed(
+        self,
+        images: Iterable[ImageInput],
+        inbox: queue.Queue,
+        stop: threading.Event,
+        admission: Optional[threading.Semaphore] = None
+    ) -> None:
+        """Put the input images on the first queue, each once admitted, then the end marker."""
+        seq = 0
+        iterator = iter(images)
+        while True:
+            if admission is not None and not _acquire(admission, stop):
+                return
+            try:
+                image = next(iterator)
+            except StopIteration:
+                break
+            except Exception as e:
+                # A failing input iterable ends the stream with its error
+                _put(inbox, (seq, ExtractionResult(error=e)), stop)
+                break
+            if not _put(inbox, (seq, image), stop):
+                return
+            seq += 1
+        _put(inbox, _DONE, stop)
+
+    def _decode(self, image: ImageInput):
+        """Serve cache hits, otherwise decode the image."""
+        extractor = self.extractor
+        key = None
+        if extractor._cache is not None:
+            key = extractor._cache.make_key(image, extractor._cache_params(self.multi_table))
+            cached = extractor._cache.get(key)
+            if cached is not None:
+                return ExtractionResult(*cached)
+        return key, extractor._open_page(image)
+
+    def _detect(self, item: Tuple) -> Tuple:
+        key, page = item
+        try:
+            return key, page, self.extractor._detect_page(page, self.multi_table)
+        except Exception:
+            _close(page)
+            raise
+
+    def _ocr(self, item: Tuple) -> Tuple:
+        key, page, cords = item
+        extractor = self.extractor
+        try:
+            reads_page = extractor._reads_page(cords, self.multi_table)
+            table_words = extractor._recognize_page(page, cords) if reads_page else []
+        finally:
+            # OCR is the last stage reading the page
+            _close(page)
+        return key, cords, table_words, page.report if isinstance(page, ScaledPage) else None
+
+    def _structure(self, item: Tuple) -> ExtractionResult:
+        key, cords, table_words, report = item
+        extractor = self.extractor
+        result = extractor._select_result(extractor._structure_tables(table_words), cords, self.multi_table)
+        if key is not None:
+            extractor._cache.put(key, result)
+        return ExtractionResult(*result, resolution=report)
@@ -0,0 +1,57 @@
+from dataclasses import asdict
+from typing import Sequence
+import pandas as pd
+from table_creator.table_extractor import ExtractionResult
+
+
+def table_record(tables: tuple, cords: Sequence, index: int, raw: bool = False) -> dict:
+    """
+    Serialize one extracted table to JSON-compatible values.
+
+    Args:
+        tables: The (raw_df, cleaned_df) pair of the table
+        cords: Table bounding boxes of the image
+        index: Position of the table in cords
+        raw: Serialize the raw table instead of the post-processed one
+
+    Returns:
+        Dictionary with the table index, bbox, column names and cell rows
+    """
+    raw_df, cleaned_df = tables
+    df = raw_df if raw else cleaned_df
+    return {
+        'table': index,
+        'bbox': [int(v) for v in cords[index]] if index < len(cords) else None,
+        'columns': [str(col) for col in df.columns],
+        'rows': [
+            [None if pd.isna(value) else str(value) for value in row]
+            for row in df.itertuples(index=False, name=None)
+        ]
+    }
+
+
+def result_record(result: ExtractionResult, multi_table: bool = False, raw: bool = False) -> dict:
+    """
+    Serialize the extraction result of one image to JSON-compatible values.
+
+    Args:
+        result: Result of the image
+        multi_table: Whether the result holds a list of tables
+        raw: Serialize the raw tables instead of the post-processed ones
+
+    Returns:
+        Dictionary with the error message, if any, the serialized tables and,
+        for extractors with a resolution policy, the decoding savings
+    """
+    record = {'error': None, 'tables': []}
+    if result.resolution is not None:
+        record['resolution'] = {**asdict(result.resolution), 'saved_bytes': result.resolution.saved_bytes}
+    if not result.ok:
+        record['error'] = f'{type(result.error).__name__}: {result.error}'
+        return record
+    tables = result.tables if multi_table else [result.tables]
+    try:
+        record['tables'] = [table_record(table, result.cords, i, raw) for i, table in enumerate(tables)]
+    except Exception as e:
+        record['error'] = f'{type(e).__name__}: {e}'
+    return record
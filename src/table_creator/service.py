@@ -0,0 +1,328 @@
+"""
+Local asyncio HTTP service around TableExtraction.
+
+    python -m table_creator serve --port 8080 --max-batch-size 8 --max-wait-ms 10
+
+Endpoints:
+
+* POST /extract with the encoded image as the request body; query parameters
+  multi_table=1 and raw=1 select every table and the raw tables
+* GET /stats with batching and request counters
+* GET /health
+
+Requests arriving within max_wait of each other are coalesced into one
+detect_batch call of up to max_batch_size images, so concurrent clients
+share YOLO forward passes and OCR recognition batches.
+"""
+import asyncio
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+from models.image_utils import ImageDecodeError
+from table_creator.records import result_record
+from table_creator.table_extractor import ExtractionResult, TableExtraction
+
+_REASONS = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    413: 'Payload Too Large', 500: 'Internal Server Error'
+}
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchStats:
+    """
+    Counters of a micro-batcher.
+
+    Attributes:
+        requests: Items submitted
+        batches: Batches run
+        max_batch_size: Largest batch run
+        busy_seconds: Time spent running batches
+    """
+    requests: int = 0
+    batches: int = 0
+    max_batch_size: int = 0
+    busy_seconds: float = 0.0
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.requests / self.batches if self.batches else 0.0
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent submissions into batched calls.
+
+    The first item of a batch waits at most max_wait for others to arrive, and
+    a batch is run as soon as it holds max_batch_size items. Batches run one at
+    a time on a worker thread, while the next batch is being collected.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[List], Sequence],
+        max_batch_size: int = 8,
+        max_wait: float = 0.01
+    ) -> None:
+        """
+        Initialize the batcher.
+
+        Args:
+            fn: Function mapping a list of items to one result per item
+            max_batch_size: Largest number of items per call
+            max_wait: Seconds the first item of a batch waits for more items
+        """
+        self.fn = fn
+        self.max_batch_size = max(int(max_batch_size), 1)
+        self.max_wait = max(float(max_wait), 0.0)
+        self.stats = BatchStats()
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='micro-batch')
+
+    def start(self) -> None:
+        """Start collecting batches on the running event loop."""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop collecting batches and release the worker thread."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=True)
+
+    async def submit(self, item):
+        """Submit an item and wait for its result."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        self.stats.requests += 1
+        return await future
+
+    async def _collect(self) -> List[Tuple[object, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            start = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(self._executor, self.fn, [item for item, _ in batch])
+            except Exception as e:
+                results = [e] * len(batch)
+            self.stats.batches += 1
+            self.stats.max_batch_size = max(self.stats.max_batch_size, len(batch))
+            self.stats.busy_seconds += time.perf_counter() - start
+
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    # The client went away
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+
+class ExtractionService:
+    """
+    HTTP/1.1 service extracting tables from posted images with micro-batching.
+
+    Attributes:
+        max_body_bytes (int): Largest accepted request body
+    """
+
+    def __init__(
+        self,
+        extractor: Optional[TableExtraction] = None,
+        max_batch_size: int = 8,
+        max_wait: float = 0.01,
+        max_body_bytes: int = 32 * 1024 * 1024
+    ) -> None:
+        """
+        Initialize the service.
+
+        Args:
+            extractor: Extractor whose models and cache are used
+            max_batch_size: Largest number of images per batched extraction
+            max_wait: Seconds a request waits for others to join its batch
+            max_body_bytes: Largest accepted request body
+        """
+        self.extractor = extractor or TableExtraction()
+        self.batcher = MicroBatcher(self._extract_batch, max_batch_size, max_wait)
+        self.max_body_bytes = max_body_bytes
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def _extract_batch(self, items: List[Tuple[bytes, bool]]) -> List[ExtractionResult]:
+        """Extract a batch of (image bytes, multi_table) items, one detect_batch call per mode."""
+        results: List[Optional[ExtractionResult]] = [None] * len(items)
+        for multi_table in (False, True):
+            indices = [i for i, (_, multi) in enumerate(items) if multi == multi_table]
+            if not indices:
+                continue
+            batch = self.extractor.detect_batch(
+                [items[i][0] for i in indices], batch_size=len(indices), multi_table=multi_table
+            )
+            for i, result in zip(indices, batch):
+                results[i] = result
+        return results
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8080) -> None:
+        """Start accepting connections."""
+        self.batcher.start()
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+
+    async def stop(self) -> None:
+        """Stop accepting connections and drain the batcher."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.batcher.stop()
+
+    async def serve_forever(self, host: str = '127.0.0.1', port: int = 8080) -> None:
+        """Run the service until cancelled."""
+        await self.start(host, port)
+        logger.info('Serving table extraction on http://%s:%s', host, port)
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            keep_alive = True
+            while keep_alive:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                if isinstance(request, int):
+                    await self._respond(writer, request, {'error': _REASONS[request]}, keep_alive=False)
+                    break
+                method, target, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                status, payload = await self._dispatch(method, target, body)
+                await self._respond(writer, status, payload, keep_alive)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        """Read one request, returning None at end of stream or an error status."""
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError:
+            return 400
+        lines = head.decode('latin-1').split('\r\n')
+        parts = lines[0].split()
+        if len(parts) != 3:
+            return 400
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        length = headers.get('content-length', '0')
+        # Plain decimal digits only, which int() alone would not enforce: no sign, no underscores
+        if not (length.isascii() and length.isdigit()):
+            return 400
+        length = int(length)
+        if length > self.max_body_bytes:
+            return 413
+        body = await reader.readexactly(length) if length else b''
+        return parts[0].upper(), parts[1], headers, body
+
+    async def _dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, dict]:
+        url = urlsplit(target)
+        if url.path == '/health':
+            return 200, {'status': 'ok'}
+        if url.path == '/stats':
+            stats = self.batcher.stats
+            return 200, {**asdict(stats), 'mean_batch_size': stats.mean_batch_size}
+        if url.path != '/extract':
+            return 404, {'error': 'Not Found'}
+        if method != 'POST':
+            return 405, {'error': 'Use POST with the image as the request body'}
+        if not body:
+            return 400, {'error': 'Empty request body'}
+
+        query = parse_qs(url.query)
+
+        def flag(name: str) -> bool:
+            return query.get(name, ['0'])[0].lower() in ('1', 'true', 'yes')
+
+        multi_table = flag('multi_table')
+        start = time.perf_counter()
+        try:
+            result = await self.batcher.submit((body, multi_table))
+        except Exception as e:
+            return 500, {'error': f'{type(e).__name__}: {e}'}
+        record = result_record(result, multi_table, flag('raw'))
+        record['seconds'] = round(time.perf_counter() - start, 4)
+        if record['error'] is None:
+            return 200, record
+        # Only an image that cannot be decoded is the client's fault
+        return (400 if isinstance(result.error, ImageDecodeError) else 500), record
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: Dict, keep_alive: bool) -> None:
+        body = json.dumps(payload).encode('utf-8')
+        head = (
+            f'HTTP/1.1 {status} {_REASONS.get(status, "")}\r\n'
+            f'Content-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'
+        )
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+
+def serve(
+    host: str = '127.0.0.1',
+    port: int = 8080,
+    max_batch_size: int = 8,
+    max_wait: float = 0.01,
+    ocr_workers: int = 1,
+    profile: Optional[str] = None
+) -> None:
+    """
+    Load the models and run the service until interrupted.
+
+    Args:
+        host: Interface to listen on
+        port: Port to listen on
+        max_batch_size: Largest number of images per batched extraction
+        max_wait: Seconds a request waits for others to join its batch
+        ocr_workers: Number of OCR model replicas
+        profile: Runtime profile preset of the models
+    """
+    extractor = TableExtraction(ocr_workers=ocr_workers, profile=profile)
+    extractor.warmup()
+    service = ExtractionService(extractor, max_batch_size=max_batch_size, max_wait=max_wait)
+    try:
+        asyncio.run(service.serve_forever(host, port))
+    except KeyboardInterrupt:
+        pass
@@ -1,14 +1,139 @@
 from models.table_detector import TableDetector
 from models.text_recognizer import TextRecognizer
+from models.registry import ModelRegistry
+from models.runtime_profile import RuntimeProfile
+from models.image_utils import ImageDecodeError, ImageInput
+from models.box_utils import calculate_overlap
+from models.ocr_words import OCRWords
+from models.resolution import ResolutionPolicy, ResolutionReport, ScaledPage, prepare_page
+from models.tiling import TileSource, TilingPolicy
+from models.profiling import NullProfiler, StageProfiler
 from table_creator.data_structures import TableStructure
+from table_creator.cache import ResultCache
+from table_creator.column_index import ColumnIndex
+from table_creator.grid_structure import GridDetector, TableGrid
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+import logging
 import pandas as pd
 import re
 
+logger = logging.getLogger(__name__)
+
+# Strips every string of an object array, as Series.str.strip does
+_STRIP = np.frompyfunc(str.strip, 1, 1)
+
+
+@dataclass
+class ExtractionResult:
+    """
+    Outcome of extracting the tables of one image in a batch.
+    
+    Attributes:
+        tables: The tables returned by detect, (raw_df, cleaned_df) or a list of them
+        cords: Table bounding box coordinates
+        error: Exception raised while processing the image, if any
+        resolution: Decoding savings when the extractor has a resolution policy
+    """
+    tables: Optional[tuple] = None
+    cords: Optional[list] = None
+    error: Optional[Exception] = None
+    resolution: Optional[ResolutionReport] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the image was processed successfully."""
+        return self.error is None
+
+
+STRUCTURE_ENGINES = ('auto', 'grid', 'text')
+
+
 class TableExtraction:
-    def __init__(self) -> None:
-        self._table_detection = TableDetector()
-        self._document_ocr = TextRecognizer()
+    def __init__(
+        self,
+        cache: Optional[ResultCache] = None,
+        registry: Optional[ModelRegistry] = None,
+        ocr_workers: int = 1,
+        detector_backend: str = 'torch',
+        precision: str = 'fp32',
+        profile: Optional[Union[str, RuntimeProfile]] = None,
+        structure_engine: str = 'auto',
+        resolution: Optional[ResolutionPolicy] = None,
+        tiling: Optional[TilingPolicy] = None,
+        profiler: Optional[StageProfiler] = None,
+        warm_start: bool = False
+    ) -> None:
+        """
+        Args:
+            cache: Result cache shared across calls
+            registry: Model registry the detector and OCR models are loaded through
+            ocr_workers: Number of OCR model replicas
+            detector_backend: 'torch' or 'onnx'
+            precision: 'fp32' or 'int8' models
+            profile: Runtime profile or preset name
+            structure_engine: 'auto' reads tables with a ruling-line grid cell by
+                cell and falls back to text detection for the others, 'grid'
+                requires a grid and 'text' always runs text detection
+            resolution: Detect on a downscaled copy and OCR at a scale fitted
+                to the page's text height; None keeps the full resolution
+            tiling: Detect tables and text lines in overlapping tiles read
+                from the image on demand, for pages too large to hold
+                decoded; tables are always read through text detection
+            profiler: Receives the wall time, CPU time, peak RSS delta and
+                item counts of every stage; nothing is measured by default
+            warm_start: Keep the fused or optimized detector on disk next to
+                its weights, so later processes load it ready to run
+        """
+        if structure_engine not in STRUCTURE_ENGINES:
+            raise ValueError(f"Unknown structure engine {structure_engine!r}, expected one of {STRUCTURE_ENGINES}")
+        if tiling is not None and resolution is not None:
+            raise ValueError('A tiling policy cannot be combined with a resolution policy')
+        if tiling is not None and structure_engine == 'grid':
+            raise ValueError("The 'grid' structure engine needs whole table crops and cannot run tiled")
+        self.structure_engine = structure_engine
+        self.resolution = resolution
+        self.tiling = tiling
+        self._grid_detector = GridDetector()
+        self.profile = RuntimeProfile.resolve(profile)
+        self.profiler = profiler or NullProfiler()
+        self._table_detection = TableDetector(
+            registry=registry, backend=detector_backend, precision=precision, profile=self.profile,
+            warm_start=warm_start
+        )
+        self._document_ocr = TextRecognizer(
+            registry=registry, workers=ocr_workers, precision=precision, profile=self.profile,
+            profiler=self.profiler
+        )
         self._linklist = TableStructure()
+        self._cache = cache
+
+    def warmup(self) -> None:
+        """Load the shared models and run a warm-up inference on each."""
+        self._table_detection.warmup()
+        self._document_ocr.warmup()
+
+    def _cache_params(self, multi_table: bool = False) -> dict:
+        """Parameters that change the extraction result, used in cache keys."""
+        return {
+            'multi_table': multi_table,
+            'detector': {
+                'model': str(self._table_detection.model_path),
+                'confidence': self._table_detection.min_conf,
+                'iou': self._table_detection.iou,
+                'backend': self._table_detection.backend,
+                'precision': self._table_detection.precision
+            },
+            'ocr': {
+                'models_dir': str(self._document_ocr.models_dir),
+                'precision': self._document_ocr.precision
+            },
+            'structure': {'postprocess': True, 'engine': self.structure_engine},
+            'profile': self.profile.result_params(),
+            'resolution': asdict(self.resolution) if self.resolution is not None else None,
+            'tiling': asdict(self.tiling) if self.tiling is not None else None
+        }
 
     def _merge_words(self, prev_obj, word, word_bb):
         """Merge the current word with the previous one if they overlap significantly."""
@@ -18,100 +143,253 @@ class TableExtraction:
         ]
         return (merged_text, merged_bb)
 
-    def _assign_to_column(self, word, word_bb, columns, df, debug=False):
+    def _assign_to_column(self, word, word_bb, columns, df, debug=False, column_index=None):
         """Assign a word to the correct column based on bounding box overlap."""
-        for key, col_bb in columns.items():
-            word_bb_temp = [word_bb[0], col_bb[1], word_bb[2], col_bb[3]]
-            overlap = self._table_detection._calculate_overlap(word_bb_temp, col_bb)
+        if column_index is None:
+            column_index = self._build_column_index(columns)
 
-            if overlap > 10:
-                if len(df[key]) > 0:
-                    prev_obj = df[key][-1]
-                    prev_overlap = self._table_detection._calculate_overlap(
-                        prev_obj[1], [prev_obj[1][0], word_bb[1], prev_obj[1][2], word_bb[3]]
-                    )
-                    if prev_overlap >= 30:
-                        word, word_bb = self._merge_words(prev_obj, word, word_bb)
-                        df[key][-1] = (word, word_bb)
-                    else:
-                        df[key].append((word, word_bb))
-                else:
-                    df[key].append((word, word_bb))
-                    # Dynamically adjust the column bounding box to fit the new word
-                    columns[key] = [
-                        min(word_bb[0], col_bb[0]), col_bb[1],
-                        max(word_bb[2], col_bb[2]), col_bb[3]
-                    ]
-                return True
-        return False
+        key = column_index.find(
+            word_bb,
+            lambda col_bb: calculate_overlap([word_bb[0], col_bb[1], word_bb[2], col_bb[3]], col_bb) > 10
+        )
+        if key is None:
+            return False
+
+        col_bb = columns[key]
+        if len(df[key]) > 0:
+            prev_obj = df[key][-1]
+            prev_overlap = calculate_overlap(
+                prev_obj[1], [prev_obj[1][0], word_bb[1], prev_obj[1][2], word_bb[3]]
+            )
+            if prev_overlap >= 30:
+                word, word_bb = self._merge_words(prev_obj, word, word_bb)
+                df[key][-1] = (word, word_bb)
+            else:
+                df[key].append((word, word_bb))
+        else:
+            df[key].append((word, word_bb))
+            # Dynamically adjust the column bounding box to fit the new word
+            columns[key] = [
+                min(word_bb[0], col_bb[0]), col_bb[1],
+                max(word_bb[2], col_bb[2]), col_bb[3]
+            ]
+            column_index.update(key, columns[key])
+        return True
+
+    @staticmethod
+    def _build_column_index(columns: dict) -> ColumnIndex:
+        """Index column extents in their dictionary order."""
+        column_index = ColumnIndex()
+        for key, col_bb in columns.items():
+            column_index.add(key, col_bb)
+        return column_index
     
-    def _get_normalized_bounding_box(self, imgsz : str, bb : list) -> pd.DataFrame:
-        names = ['pdf1','sample_pdf2.pdf']
-        pass
+    def _get_normalized_bounding_box(self, imgsz: Tuple[int, int], bb: list) -> pd.DataFrame:
+        """
+        Express table boxes as fractions of the image size.
+
+        Args:
+            imgsz: (width, height) of the image the boxes were found in
+            bb: [x1, y1, x2, y2] pixel boxes, as in the cords returned by detect
 
-    def get_words_in_column(self, cords: dict, df_word: pd.DataFrame, merge=True, debug=False):
+        Returns:
+            DataFrame with x1, y1, x2, y2 columns in [0, 1], one row per box
+        """
+        width, height = imgsz
+        boxes = np.asarray([list(box) for box in bb] if bb is not None else [], dtype=np.float64).reshape(-1, 4)
+        boxes = np.clip(boxes / [width, height, width, height], 0.0, 1.0)
+        return pd.DataFrame(boxes, columns=['x1', 'y1', 'x2', 'y2'])
+
+    def get_words_in_column(self, cords: dict, df_word: Union[pd.DataFrame, OCRWords], merge=True, debug=False):
         """Distribute words into their respective columns based on bounding box coordinates."""
+        df, unknown_data, unknown_columns = self._assign_columns(cords, df_word, merge, debug)
+
+        # Convert lists to DataFrames
+        df = {key: pd.DataFrame(val, columns=['text', 'boundingBox']) for key, val in df.items()}
+        return df, unknown_data, unknown_columns
+
+    def _assign_columns(self, cords: dict, words: Union[pd.DataFrame, OCRWords], merge=True, debug=False):
+        """Distribute words into columns, returning (text, bbox) lists per column."""
+        if isinstance(words, pd.DataFrame):
+            word_items = zip(
+                words.index, words['text'],
+                (list(map(int, bbox)) for bbox in words['boundingBox'])
+            )
+        else:
+            word_items = zip(range(len(words)), words.texts, words.boxes.tolist())
+
         df = {key: [] for key in cords}
         unknown_columns = {}
         unknown_data = {}
+        # Interval indexes over the column x-extents replace linear column scans
+        known_index = self._build_column_index(cords)
+        unknown_index = ColumnIndex()
 
-        for index, row in df_word.iterrows():
-            word, word_bb = row['text'], list(map(int, row['boundingBox']))
+        for index, word, word_bb in word_items:
             if debug:
-                print(f"\nProcessing word: '{word}'")
+                logger.debug("Processing word: '%s'", word)
 
-            if not self._assign_to_column(word, word_bb, cords, df, debug):
+            if not self._assign_to_column(word, word_bb, cords, df, debug, known_index):
                 # Handle words that do not match any known column
-                for key, val in unknown_columns.items():
-                    overlap = self._table_detection._calculate_overlap(
-                        val, [word_bb[0], val[1], word_bb[2], val[3]]
+                key = unknown_index.find(
+                    word_bb,
+                    lambda val: calculate_overlap(val, [word_bb[0], val[1], word_bb[2], val[3]]) > 30
+                )
+                if key is not None:
+                    prev_obj = unknown_data[key][-1]
+                    prev_overlap = calculate_overlap(
+                        prev_obj[1], [prev_obj[1][0], word_bb[1], prev_obj[1][2], word_bb[3]]
                     )
-                    if overlap > 30:
-                        prev_obj = unknown_data[key][-1]
-                        prev_overlap = self._table_detection._calculate_overlap(
-                            prev_obj[1], [prev_obj[1][0], word_bb[1], prev_obj[1][2], word_bb[3]]
-                        )
-                        if prev_overlap >= 30:
-                            word, word_bb = self._merge_words(prev_obj, word, word_bb)
-                            unknown_data[key][-1] = (word, word_bb)
-                        else:
-                            unknown_data[key].append((word, word_bb))
-                        break
+                    if prev_overlap >= 30:
+                        word, word_bb = self._merge_words(prev_obj, word, word_bb)
+                        unknown_data[key][-1] = (word, word_bb)
+                    else:
+                        unknown_data[key].append((word, word_bb))
                 else:
                     # Create a new unknown column if no match is found
                     unknown_key = f'{word}__{index}__'
                     unknown_columns[unknown_key] = word_bb
                     unknown_data[unknown_key] = [(word, word_bb)]
+                    unknown_index.add(unknown_key, word_bb)
 
         if merge:
             df.update(unknown_data)
-
-        # Convert lists to DataFrames
-        df = {key: pd.DataFrame(val, columns=['text', 'boundingBox']) for key, val in df.items()}
         return df, unknown_data, unknown_columns
 
+    @staticmethod
+    def _plan_header_merges(names: List[str], empty_columns: List[str]) -> Dict[int, List[int]]:
+        """
+        Plan the merge of empty-header columns into their left neighbours.
+
+        Replays, on column positions, the right-to-left merge in which each
+        empty-header column is appended to the column before the first column
+        of its name.
+
+        Returns:
+            Target column position to the positions of the original columns
+            joined into it, in order
+        """
+        first = {}
+        for i, name in enumerate(names):
+            first.setdefault(name, i)
+        merges: Dict[int, List[int]] = {}
+        for col in empty_columns[::-1]:
+            col_idx = first[col]
+            if col_idx > 0:
+                merges[col_idx - 1] = merges.get(col_idx - 1, [col_idx - 1]) + merges.get(col_idx, [col_idx])
+        return merges
+
+    @staticmethod
+    def _plan_header_groups(names: List[str], columns: Sequence[str]) -> Dict[str, List[int]]:
+        """Positions of the columns whose name contains each header, for the headers matching any."""
+        groups = {}
+        for header in columns:
+            if header not in groups:
+                groups[header] = [i for i, col in enumerate(names) if header in col]
+        return {header: indices for header, indices in groups.items() if indices}
+
+    @staticmethod
+    def _text_columns(parsed_df: pd.DataFrame, positions: Sequence[int]) -> Optional[Dict[int, tuple]]:
+        """
+        Values and missing-cell masks of the columns at the given positions.
+
+        Returns:
+            Column position to its object array and missing mask, None when
+            a column holds anything but strings, None and NaN
+        """
+        text = {}
+        for i in positions:
+            if i in text:
+                continue
+            column = parsed_df.iloc[:, i]
+            if column.dtype != object or pd.api.types.infer_dtype(column, skipna=True) not in ('string', 'empty'):
+                return None
+            values = column.to_numpy()
+            missing = pd.isna(values)
+            # pd.NA propagates through string addition instead of turning into NaN
+            if missing.any() and any(value is pd.NA for value in pd.unique(values[missing])):
+                return None
+            text[i] = (values, missing)
+        return text
+
+    @staticmethod
+    def _join_text(columns: List[tuple], strip: bool = False) -> np.ndarray:
+        """
+        Join text columns row by row, space separated, one whole column at a time.
+
+        Args:
+            columns: Object arrays and missing masks from _text_columns, in join order
+            strip: Strip every cell and join missing ones as empty strings, as
+                ' '.join(row.fillna('').str.strip()) does; otherwise a missing
+                cell makes the joined cell NaN, as adding the strings does
+
+        Returns:
+            Object array of the joined cells
+        """
+        if strip:
+            parts = [_STRIP(np.where(missing, '', values)) for values, missing in columns]
+            joined = parts[0]
+            for part in parts[1:]:
+                joined = joined + ' ' + part
+            return joined
+
+        # Only rows without a missing cell are concatenated, the others are NaN
+        rows = np.flatnonzero(~np.logical_or.reduce([missing for _, missing in columns]))
+        joined = np.full(len(columns[0][0]), np.nan, dtype=object)
+        if len(rows):
+            merged = columns[0][0][rows]
+            for values, _ in columns[1:]:
+                merged = merged + ' ' + values[rows]
+            joined[rows] = merged
+        return joined
+
     def postprocess(self, parsed_df: pd.DataFrame, columns=None):
-        """Post-process the parsed DataFrame to merge columns and clean data."""
+        """
+        Post-process the parsed DataFrame to merge columns and clean data.
+
+        Columns with an empty header cell are merged into the column on their
+        left, and with columns given, the columns whose name contains a header
+        are joined into one column per header. The merges are planned on
+        column positions first and each merged column is then built by
+        concatenating whole columns; tables with cells other than strings
+        take the cell-by-cell path, which produces the same result.
+        """
         try:
             parsed_df = parsed_df.dropna(how='all').reset_index(drop=True)
             new_df = pd.DataFrame()
             
             # Merge adjacent empty header columns
             empty_columns = parsed_df.columns[parsed_df.iloc[:1].isna().all()].tolist()
-            for col in empty_columns[::-1]:
-                col_idx = list(parsed_df.columns).index(col)
-                if col_idx > 0:
-                    parsed_df.iloc[:, col_idx - 1] += ' ' + parsed_df.iloc[:, col_idx]
+            names = list(parsed_df.columns)
+            merges = self._plan_header_merges(names, empty_columns)
+            text = None
+            if all(isinstance(name, str) for name in names):
+                text = self._text_columns(parsed_df, [i for positions in merges.values() for i in positions])
+            if text is not None:
+                # Every merged column is joined from the original columns before any is replaced
+                merged = {target: self._join_text([text[i] for i in positions]) for target, positions in merges.items()}
+                for target, values in merged.items():
+                    parsed_df.isetitem(target, values)
+            else:
+                for col in empty_columns[::-1]:
+                    col_idx = names.index(col)
+                    if col_idx > 0:
+                        parsed_df.iloc[:, col_idx - 1] += ' ' + parsed_df.iloc[:, col_idx]
             parsed_df = parsed_df.drop(columns=empty_columns)
 
             if not columns:
                 return parsed_df
 
+            groups = self._plan_header_groups(list(parsed_df.columns), columns)
             used_indices = set()
-            for header in columns:
-                match_indices = [i for i, col in enumerate(parsed_df.columns) if header in col]
-                if match_indices:
-                    used_indices.update(match_indices)
+            for header, match_indices in groups.items():
+                used_indices.update(match_indices)
+                text = self._text_columns(parsed_df, match_indices) if len(parsed_df) else None
+                if text is not None:
+                    new_df[header] = pd.Series(
+                        self._join_text([text[i] for i in match_indices], strip=True), index=parsed_df.index
+                    )
+                else:
                     new_df[header] = parsed_df.iloc[:, match_indices].apply(
                         lambda x: ' '.join(x.fillna('').str.strip()), axis=1
                     )
@@ -122,27 +400,297 @@ class TableExtraction:
 
             return new_df
         except Exception as e:
-            print(f"Error in postprocess: {e}")
+            logger.warning('Error in postprocess: %s', e)
             return parsed_df
 
-    def detect(self, image_path: str):
-        """Detect tables in an image and extract their data."""
-        cords = self._table_detection.detect(image_path)
-        all_table_df = self._document_ocr.recognize(image_path, cords)
+    def detect(self, image: ImageInput, multi_table: bool = False):
+        """
+        Detect tables in an image and extract their data.
+
+        The image may be a path, encoded bytes, a PIL image or an RGB array; it
+        is decoded once and the same buffer is shared by every stage.
+
+        By default only the largest table is extracted and ((raw_df, cleaned_df),
+        cords) is returned. With multi_table every detected table is extracted,
+        each crop OCR'd on its own, and ([(raw_df, cleaned_df), ...], cords) is
+        returned with one entry per box in cords. When no table is detected,
+        the whole page is read as the largest table, but there are no
+        tables with multi_table.
+        """
+        if self._cache is None:
+            return self._extract(image, multi_table)
+
+        key = self._cache.make_key(image, self._cache_params(multi_table))
+        result = self._cache.get(key)
+        if result is None:
+            result = self._extract(image, multi_table)
+            self._cache.put(key, result)
+        return result
+
+    def detect_batch(
+        self,
+        images: Sequence[ImageInput],
+        batch_size: int = 8,
+        multi_table: bool = False
+    ) -> List[ExtractionResult]:
+        """
+        Detect and extract tables from several images.
         
+        Images are sent to the detector in batches of batch_size and their text
+        recognition is grouped into shared OCR calls. A failing image does not
+        abort the batch, its error is reported in its result instead.
+        
+        Args:
+            images: Image paths, encoded bytes, PIL images or RGB arrays
+            batch_size: Number of images processed together
+            multi_table: Extract every detected table, as for detect
+            
+        Returns:
+            One ExtractionResult per image, in input order
+        """
+        if self.tiling is not None:
+            # Tiled pages are extracted one by one, their tiles are batched instead
+            tiled_results = []
+            for image in images:
+                try:
+                    tiled_results.append(ExtractionResult(*self.detect(image, multi_table)))
+                except Exception as e:
+                    tiled_results.append(ExtractionResult(error=e))
+            return tiled_results
+
+        results: List[Optional[ExtractionResult]] = [None] * len(images)
+        for start in range(0, len(images), batch_size):
+            pending, keys = [], {}
+            for idx in range(start, min(start + batch_size, len(images))):
+                try:
+                    if self._cache is not None:
+                        keys[idx] = self._cache.make_key(images[idx], self._cache_params(multi_table))
+                        cached = self._cache.get(keys[idx])
+                        if cached is not None:
+                            results[idx] = ExtractionResult(*cached)
+                            continue
+                    pending.append((idx, self._open_page(images[idx])))
+                except Exception as e:
+                    results[idx] = ExtractionResult(error=e)
+            if not pending:
+                continue
+
+            pages = [page for _, page in pending]
+            with self.profiler.stage('detection') as stage:
+                all_cords = self._table_detection.detect_batch(
+                    [page.detect_image for page in pages], batch_size, multi_table
+                )
+                stage.count(
+                    images=len(pages),
+                    boxes=sum(len(cords) for cords in all_cords if not isinstance(cords, Exception))
+                )
+            ocr_inputs = [
+                (idx, page, page.detected_to_full(cords))
+                for (idx, page), cords in zip(pending, all_cords)
+                if not isinstance(cords, Exception)
+            ]
+            to_ocr = [(page, cords) for _, page, cords in ocr_inputs if self._reads_page(cords, multi_table)]
+            recognized = iter(self._recognize_tables([page for page, _ in to_ocr], [cords for _, cords in to_ocr]))
+            all_tables = [
+                next(recognized) if self._reads_page(cords, multi_table) else []
+                for _, _, cords in ocr_inputs
+            ]
+
+            for (idx, _), cords in zip(pending, all_cords):
+                if isinstance(cords, Exception):
+                    results[idx] = ExtractionResult(error=cords)
+            for (idx, page, cords), table_words in zip(ocr_inputs, all_tables):
+                if isinstance(table_words, Exception):
+                    results[idx] = ExtractionResult(error=table_words)
+                    continue
+                try:
+                    result = self._select_result(self._structure_tables(table_words), cords, multi_table)
+                except Exception as e:
+                    results[idx] = ExtractionResult(error=e)
+                    continue
+                if self._cache is not None:
+                    self._cache.put(keys[idx], result)
+                results[idx] = ExtractionResult(*result, resolution=page.report)
+        return results
+
+    def _extract(self, image: ImageInput, multi_table: bool = False):
+        """Run detection, OCR and structuring on an image."""
+        page = self._open_page(image)
+        try:
+            cords = self._detect_page(page, multi_table)
+            table_words = self._recognize_page(page, cords) if self._reads_page(cords, multi_table) else []
+        finally:
+            if isinstance(page, TileSource):
+                page.close()
+        return self._select_result(self._structure_tables(table_words), cords, multi_table)
+
+    @staticmethod
+    def _reads_page(cords, multi_table: bool) -> bool:
+        """Whether a page needs OCR: only the largest-table mode reads a page without detected tables whole."""
+        return len(cords) > 0 or not multi_table
+
+    def _open_page(self, image: ImageInput) -> Union[ScaledPage, TileSource]:
+        """
+        Decode an image at the scales of the resolution policy, or open it for tiled reads.
+
+        Raises:
+            ImageDecodeError: The image cannot be read or decoded
+        """
+        with self.profiler.stage('decode') as stage:
+            stage.count(images=1)
+            try:
+                if self.tiling is not None:
+                    return TileSource(image)
+                return prepare_page(image, self.resolution)
+            except (OSError, SyntaxError, ValueError) as e:
+                # PIL reports unreadable, truncated and malformed images with these
+                raise ImageDecodeError(f'{type(e).__name__}: {e}') from e
+
+    def _detect_page(self, page: Union[ScaledPage, TileSource], multi_table: bool = False) -> list:
+        """Table boxes of a page opened by _open_page, in full-resolution coordinates."""
+        with self.profiler.stage('detection') as stage:
+            if isinstance(page, TileSource):
+                cords = self._table_detection.detect_tiled(
+                    page, multi_table, tile_size=self.tiling.detect_tile_size, overlap=self.tiling.overlap
+                )
+            else:
+                cords = page.detected_to_full(self._table_detection.detect(page.detect_image, multi_table))
+            stage.count(images=1, boxes=len(cords))
+        return cords
+
+    def _recognize_page(self, page: Union[ScaledPage, TileSource], cords) -> list:
+        """OCR the tables of a page opened by _open_page, as one item of _recognize_tables."""
+        if isinstance(page, TileSource):
+            return self._document_ocr.recognize_words_tiled(
+                page, cords, tile_size=self.tiling.ocr_tile_size, overlap=self.tiling.overlap
+            )
+        table_words = self._recognize_tables([page], [cords])[0]
+        if isinstance(table_words, Exception):
+            raise table_words
+        return table_words
+
+    def _find_grid(self, crop) -> Optional[TableGrid]:
+        """Ruling-line grid of a table crop, or None when the text engine should read it."""
+        if self.structure_engine == 'text':
+            return None
+        grid = self._grid_detector.find_grid(crop)
+        if grid is None and self.structure_engine == 'grid':
+            raise ValueError('No ruling-line grid found in the table')
+        return grid
+
+    def _recognize_tables(self, pages: List[ScaledPage], all_cords: list) -> List[Union[list, Exception]]:
+        """
+        OCR the tables of several decoded images.
+
+        Tables with a ruling-line grid skip text detection: the text lines of
+        their non-empty cells are cropped and recognized in one batch across
+        every image, and the lines of a cell joined with spaces.
+        The other tables are OCR'd as before, their text lines detected and
+        recognized together. Crops are cut from each page's OCR image and
+        word boxes are mapped back to full-resolution crop coordinates.
+
+        Args:
+            pages: Decoded pages
+            all_cords: Table boxes of each page, in full-resolution coordinates
+
+        Returns:
+            Per image, one item per table: OCRWords, or (TableGrid, cell texts)
+            for a table read through its grid; an image that fails is
+            returned as the raised exception
+        """
+        outputs: List[Union[list, Exception]] = [None] * len(pages)
+        text_crops, text_slots = [], []
+        cell_crops, grid_slots = [], []
+        for idx, (page, cords) in enumerate(zip(pages, all_cords)):
+            try:
+                crops = self._document_ocr.crop_regions(page.ocr_image, page.full_to_ocr(cords), (0, 0))
+                with self.profiler.stage('grid_detection') as stage:
+                    grids = [self._find_grid(crop) for crop in crops]
+                    stage.count(tables=len(crops), grids=sum(grid is not None for grid in grids))
+            except Exception as e:
+                outputs[idx] = e
+                continue
+            outputs[idx] = [None] * len(crops)
+            for pos, (crop, grid) in enumerate(zip(crops, grids)):
+                if grid is None:
+                    text_crops.append(crop)
+                    text_slots.append((idx, pos))
+                    continue
+                # A cell holding several lines is recognized line by line
+                boxes = [box for lines in grid.line_boxes for box in lines]
+                cell_crops.extend(crop[y1:y2, x1:x2] for x1, y1, x2, y2 in boxes)
+                grid_slots.append((idx, pos, grid, len(boxes)))
+
+        for (idx, pos), words in zip(text_slots, self._document_ocr.recognize_words_batch(text_crops)):
+            if isinstance(outputs[idx], Exception):
+                continue
+            if isinstance(words, Exception):
+                outputs[idx] = words
+            else:
+                scale = pages[idx].ocr_scale
+                outputs[idx][pos] = words[0] if scale == 1.0 else words[0].scaled(1 / scale)
+
+        if grid_slots:
+            try:
+                cell_texts = self._document_ocr.recognize_cells(cell_crops) if cell_crops else []
+            except Exception as e:
+                cell_texts = e
+            offset = 0
+            for idx, pos, grid, count in grid_slots:
+                start, offset = offset, offset + count
+                if isinstance(outputs[idx], Exception):
+                    continue
+                if isinstance(cell_texts, Exception):
+                    outputs[idx] = cell_texts
+                    continue
+                recognized = iter(cell_texts[start:offset])
+                texts = [
+                    ' '.join(line for line in (next(recognized) for _ in lines) if line is not None) or None
+                    for lines in grid.line_boxes
+                ]
+                outputs[idx][pos] = (grid, texts)
+        return outputs
+
+    @staticmethod
+    def _select_result(table_data: List[tuple], cords, multi_table: bool):
+        """Shape the structured tables into the value returned by detect."""
+        return (table_data if multi_table else table_data[0]), cords
+
+    def _structure_tables(self, all_table_words: List[Union[OCRWords, tuple]]) -> List[tuple]:
+        """Turn the OCR words or grid cells of each table into raw and post-processed DataFrames."""
         table_data = []
-        for table in all_table_df:
-            column_data, _, _ = self.get_words_in_column({}, table)
-            ordered_columns = sorted(column_data, key=lambda x: column_data[x].iloc[0]['boundingBox'][0])
+        for table in all_table_words:
+            if isinstance(table, tuple):
+                grid, texts = table
+                with self.profiler.stage('row_structuring') as stage:
+                    df = grid.to_dataframe(texts)
+                    stage.count(tables=1, cells=df.size)
+                with self.profiler.stage('postprocess') as stage:
+                    df_postp = self.postprocess(df)
+                    stage.count(tables=1, cells=df.size)
+                df.columns = [f"column {i+1}" for i in range(df.shape[1])]
+                table_data.append((df, df_postp))
+                continue
+
+            with self.profiler.stage('column_assignment') as stage:
+                column_words, _, _ = self._assign_columns({}, table)
+                column_data = {col: OCRWords.from_pairs(pairs) for col, pairs in column_words.items()}
+                stage.count(tables=1, words=len(table), columns=len(column_data))
+            ordered_columns = sorted(column_data, key=lambda x: column_data[x].boxes[0, 0])
             dictword = {col: column_data[col] for col in ordered_columns}
 
-            df = self._linklist.build_structure(dictword)
-            df = df.loc[:, ordered_columns]
-            df = df.rename(columns=lambda col: re.sub(r'__\d+__', '', str(col)).strip())
-            df_postp = self.postprocess(df)
+            with self.profiler.stage('row_structuring') as stage:
+                # A fresh structure per table keeps concurrent callers independent
+                df = TableStructure(debug=self._linklist.debug).build_structure(dictword)
+                df = df.loc[:, ordered_columns]
+                df = df.rename(columns=lambda col: re.sub(r'__\d+__', '', str(col)).strip())
+                stage.count(tables=1, cells=df.size)
+            with self.profiler.stage('postprocess') as stage:
+                df_postp = self.postprocess(df)
+                stage.count(tables=1, cells=df.size)
 
             # Assign generic column names
             df.columns = [f"column {i+1}" for i in range(df.shape[1])]
             table_data.append((df, df_postp))
 
-        return table_data[0], cords
+        return table_data